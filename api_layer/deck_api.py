@@ -0,0 +1,35 @@
+import json
+from pathlib import Path
+
+from models.Deck import Deck
+from utils.storage import atomic_write_json, file_lock
+
+
+class DeckAPI:
+    def __init__(self):
+        self.deck_file_path = Path(Deck.file_path)
+
+    def __get_decks(self) -> list[dict]:
+        """Reads the raw deck records."""
+        try:
+            with self.deck_file_path.open('r', encoding='utf-8') as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    def get_deck(self, user_id, level: int) -> Deck | None:
+        """Retrieves the deck of a user for the given level."""
+        for deck in self.__get_decks():
+            if deck['user_id'] == str(user_id) and deck['level'] == level:
+                return Deck(deck['user_id'], deck['level'], deck['seed'], deck['size'], deck['cursor'])
+        return None
+
+    def save_deck(self, deck: Deck):
+        """Adds or replaces the deck of a user for the deck's level."""
+        with file_lock(self.deck_file_path):
+            decks = [
+                existing_deck for existing_deck in self.__get_decks()
+                if not (existing_deck['user_id'] == str(deck.user_id) and existing_deck['level'] == deck.level)
+            ]
+            decks.append(deck.get_json_format())
+            atomic_write_json(self.deck_file_path, decks)
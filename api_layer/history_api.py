@@ -1,58 +1,153 @@
+import argparse
 import json
+import os
+import time
 from pathlib import Path
 
+from api_layer.history_index import HistoryIndex
+from api_layer.history_segments import HistorySegments, get_segment_key
 from models.History import History
 
+
 class HistoryAPI:
     def __init__(self):
-        self.history_file_path = Path(History.file_path)
-        # Ensure the history file exists
-        self.history_file_path.touch(exist_ok=True)
+        self.segments = HistorySegments(Path(History.segment_directory))
+        # Move the history over from the older single-file formats, only happens once
+        for legacy_file_path in [Path(History.legacy_file_path), Path(History.file_path)]:
+            if legacy_file_path.exists():
+                with self.lock():
+                    # Another process may have migrated it while this one waited for the lock
+                    if legacy_file_path.exists():
+                        self.migrate_legacy_history(legacy_file_path)
+        self.index = HistoryIndex(self.segments, Path(History.index_directory))
+        # Timestamps used to be stored as 'YYYY-MM-DD HH:MM' strings, only happens once
+        if self.segments.needs_timestamp_migration():
+            with self.lock():
+                if self.segments.migrate_timestamps():
+                    self.index.rebuild()
+
+    @staticmethod
+    def __to_history(game: dict) -> History:
+        """Packs a history record into a History object."""
+        return History(
+            game['uuid'],
+            game['user_id'],
+            game['word'],
+            game['result'],
+            game['guesses'],
+            game['score'],
+            game['timestamp']
+        )
+
+    def migrate_legacy_history(self, legacy_file_path: Path):
+        """
+        Splits a legacy history file, the history.json array or the history.jsonl file, into the monthly segments.
+        The legacy file is kept next to it with a .bak suffix.
+        """
+        with legacy_file_path.open('r', encoding='utf-8') as file:
+            if legacy_file_path.suffix == '.json':
+                try:
+                    history_data = json.load(file)
+                except json.JSONDecodeError:
+                    history_data = []
+            else:
+                history_data = []
+                for line in file:
+                    try:
+                        history_data.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+        self.segments.import_records(history_data)
+        os.replace(legacy_file_path, legacy_file_path.with_suffix(legacy_file_path.suffix + '.bak'))
+
+    def iter_records(self, start: int | None = None, end: int | None = None):
+        """
+        Streams the raw history records (dicts) between the timestamps, without building History objects.
+        :param start: earliest epoch timestamp, included
+        :param end: latest epoch timestamp, included
+        """
+        return self.segments.iter_records(start, end)
+
+    def iter_history(self, user_id=None, start: int | None = None, end: int | None = None):
+        """
+        Streams the game history one record at a time, optionally filtered by user ID and time range.
+        Only the segments overlapping the range are read, and nothing is loaded as a whole.
+        :param start: earliest epoch timestamp, included
+        :param end: latest epoch timestamp, included
+        """
+        for game in self.iter_records(start, end):
+            if user_id is not None and str(game['user_id']) != str(user_id):
+                continue
+            yield self.__to_history(game)
+
+    def iter_user_history(self, user_id, limit: int | None = None, offset: int = 0):
+        """
+        Lazily yields the games of one user, newest first.
+        Only the user's own rows are read, found through the per-user index.
+        :param limit: maximum number of games, None for all of them
+        :param offset: number of newest games to skip
+        """
+        self.index.refresh()
+        files = {}
+        try:
+            for segment_id, history_offset in self.index.iter_offsets(user_id, limit, offset):
+                if segment_id not in files:
+                    files[segment_id] = self.segments.get_segment(segment_id).file_path.open('rb')
+                file = files[segment_id]
+                file.seek(history_offset)
+                yield self.__to_history(json.loads(file.readline()))
+        finally:
+            for file in files.values():
+                file.close()
 
     def get_history(self, user_id=None) -> list[History]:
         """Retrieves the game history, optionally filtered by user ID."""
-        try:
-            with self.history_file_path.open('r', encoding='utf-8') as file:
-                history_data = json.load(file)
-        except json.JSONDecodeError:
-            return []
-
-        history = []
-        # Pack the history into a list of History objects
-        for game in history_data:
-            history.append(History(
-                game['uuid'],
-                game['user_id'],
-                game['word'],
-                game['result'],
-                game['guesses'],
-                game['score'],
-                game['timestamp']
-            ))
-
-        if user_id is not None:
-            # Filter the history by user ID
-            history = [game for game in history if str(game['user_id']) == str(user_id)]
-
-        return history
-
-    def add_history(self, new_entry: History):
-        """Adds a game result to the history."""
-        with self.history_file_path.open('r+', encoding='utf-8') as file:
-            try:
-                history = json.load(file)
-            except json.JSONDecodeError:
-                history = []
-
-            # Append the new game result
-            history.append(new_entry.get_json_format())
-
-            # Move back to the start of the file to overwrite it
-            file.seek(0)
-            json.dump(history, file, indent=4)
-            # Remove remaining parts of the old file
-            file.truncate()
+        return list(self.iter_history(user_id))
+
+    def lock(self):
+        """
+        Returns the lock of the history, held while games are saved.
+        Hold it across a save and the updates of the data derived from the history to keep them in step.
+        """
+        return self.segments.lock()
+
+    def get_version(self) -> int:
+        """
+        Returns a number that grows with every saved game, used to tell when data derived from the history is stale.
+        The segments are append-only, so the size of their rows serves as the version.
+        """
+        return self.segments.get_data_size()
+
+    def add_history(self, new_entry: History, fsync: bool = False):
+        """Adds a game result to the history, appending a single row to the segment of its month."""
+        self.add_histories([new_entry], fsync)
 
+    def add_histories(self, new_entries: list[History], fsync: bool = False):
+        """
+        Adds game results to the history as one group commit, with a single write per segment.
+        :param fsync: flush the games to the disk before returning
+        """
+        with self.lock():
+            rows = self.segments.append([entry.get_json_format() for entry in new_entries], fsync)
+            self.index.add([(entry.user_id, segment, offset, end)
+                            for entry, (segment, offset, end) in zip(new_entries, rows)])
 
+    def compact(self) -> dict:
+        """
+        Merges small segments of past months and builds their sparse timestamp index.
+        The per-user index points into the old segments, so it is rebuilt.
+        """
+        with self.lock():
+            report = self.segments.compact(get_segment_key(int(time.time())))
+            self.index.rebuild()
+        return report
 
 
+if __name__ == '__main__':
+    # Usage: python -m api_layer.history_api compact
+    parser = argparse.ArgumentParser(description='Maintain the history segments.')
+    parser.add_argument('command', choices=['compact'], help='merge small segments and build the timestamp index')
+    parser.parse_args()
+    compaction_report = HistoryAPI().compact()
+    print(f"Compacted {compaction_report['segments_before']} segments into {compaction_report['segments_after']} "
+          f"({compaction_report['merged']} merged)")
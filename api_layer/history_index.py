@@ -0,0 +1,176 @@
+import bisect
+import hashlib
+import json
+import os
+import re
+import struct
+from pathlib import Path
+
+from api_layer.history_segments import HistorySegments, HistorySegment, HEADER_SIZE
+from utils.storage import atomic_write_json, copy_file_mode
+
+# Every index entry is the segment id and byte offset of a history row, as unsigned 32 and 64-bit integers
+OFFSET_FORMAT = '<IQ'
+OFFSET_SIZE = struct.calcsize(OFFSET_FORMAT)
+# Number of offsets read from an index file at once while paging
+READ_BATCH = 256
+
+
+class HistoryIndex:
+    """
+    Per-user index of the history segments.
+    Each user has a file with the segment and byte offset of their games, sorted by segment and offset, so one
+    user's games are read without touching anyone else's. New games are appended, a game saved late into the
+    segment of an earlier month is inserted in its place. The meta file records how much of each
+    segment is indexed, anything written past that is indexed on the next read.
+    """
+
+    def __init__(self, segments: HistorySegments, index_directory: Path):
+        self.segments = segments
+        self.index_directory = Path(index_directory)
+        self.meta_file_path = self.index_directory / '_meta.json'
+
+    def __get_index_file_path(self, user_id) -> Path:
+        """Returns the index file of the user, ids that are not safe as file names are hashed."""
+        user_id = str(user_id)
+        if not re.fullmatch(r'[\w-]{1,64}', user_id):
+            user_id = hashlib.sha1(user_id.encode('utf-8')).hexdigest()
+        return self.index_directory / f'{user_id}.idx'
+
+    def __get_indexed_sizes(self) -> dict | None:
+        """Returns the number of bytes of each segment covered by the index, None if there is no index."""
+        try:
+            with self.meta_file_path.open('r', encoding='utf-8') as file:
+                return json.load(file)['indexed_sizes']
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+
+    def __set_indexed_sizes(self, indexed_sizes: dict):
+        atomic_write_json(self.meta_file_path, {'indexed_sizes': indexed_sizes})
+
+    def __get_last_entry(self, index_file_path: Path) -> tuple[int, int] | None:
+        """Returns the last (segment id, offset) in the index file of a user."""
+        try:
+            with index_file_path.open('rb') as file:
+                file.seek(0, 2)
+                if file.tell() < OFFSET_SIZE:
+                    return None
+                file.seek(file.tell() - OFFSET_SIZE)
+                return struct.unpack(OFFSET_FORMAT, file.read(OFFSET_SIZE))
+        except FileNotFoundError:
+            return None
+
+    def __append_entry(self, user_id, segment_id: int, offset: int):
+        """
+        Adds the row to the index of the user, unless it is already there.
+        Rows after the last entry are appended, which is the common case, others are inserted in order.
+        """
+        index_file_path = self.__get_index_file_path(user_id)
+        last_entry = self.__get_last_entry(index_file_path)
+        if last_entry is None or last_entry < (segment_id, offset):
+            with index_file_path.open('ab') as file:
+                file.write(struct.pack(OFFSET_FORMAT, segment_id, offset))
+        elif last_entry != (segment_id, offset):
+            self.__insert_entry(index_file_path, (segment_id, offset))
+
+    @staticmethod
+    def __insert_entry(index_file_path: Path, entry: tuple[int, int]):
+        """Inserts an entry in the sorted index file of a user, unless it is already there, and replaces the file."""
+        entries = list(struct.iter_unpack(OFFSET_FORMAT, index_file_path.read_bytes()))
+        position = bisect.bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            return
+        entries.insert(position, entry)
+        temp_path = index_file_path.with_name(f'.{index_file_path.name}.tmp')
+        temp_path.write_bytes(b''.join(struct.pack(OFFSET_FORMAT, *item) for item in entries))
+        copy_file_mode(temp_path, index_file_path)
+        os.replace(temp_path, index_file_path)
+
+    def rebuild(self):
+        """Drops the index and indexes every segment again."""
+        if self.index_directory.exists():
+            for index_file_path in self.index_directory.glob('*.idx'):
+                index_file_path.unlink()
+        indexed_sizes = {}
+        for segment in self.segments.get_segments():
+            indexed_sizes[segment.key] = self.__index_from(segment, HEADER_SIZE)
+        self.__set_indexed_sizes(indexed_sizes)
+
+    def __index_from(self, segment: HistorySegment, start: int) -> int:
+        """Indexes every complete row of the segment from the byte offset on, returns the indexed size."""
+        self.index_directory.mkdir(parents=True, exist_ok=True)
+        indexed_size = start
+        for offset, end, line in segment.iter_lines(start):
+            indexed_size = end
+            try:
+                game = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            self.__append_entry(game['user_id'], segment.id, offset)
+        return indexed_size
+
+    def refresh(self):
+        """Brings the index up-to-date with the history segments."""
+        with self.segments.lock():
+            self.__refresh()
+
+    def __refresh(self):
+        segments = self.segments.get_segments()
+        sizes = {segment.key: segment.get_size() for segment in segments}
+        indexed_sizes = self.__get_indexed_sizes()
+        if indexed_sizes is None or any(key not in sizes or indexed_size > sizes[key]
+                                        for key, indexed_size in indexed_sizes.items()):
+            # No index yet, or segments were compacted or replaced
+            self.rebuild()
+            return
+        changed = False
+        for segment in segments:
+            indexed_size = indexed_sizes.get(segment.key, HEADER_SIZE)
+            if indexed_size < sizes[segment.key]:
+                indexed_sizes[segment.key] = self.__index_from(segment, indexed_size)
+                changed = True
+        if changed:
+            self.__set_indexed_sizes(indexed_sizes)
+
+    def add(self, rows: list[tuple]):
+        """
+        Records rows that were just appended to the history segments.
+        :param rows: (user id, segment, offset where the row starts, offset where it ends) of each row,
+                     in the order they were appended
+        """
+        indexed_sizes = self.__get_indexed_sizes()
+        if indexed_sizes is None:
+            self.refresh()
+            return
+        self.index_directory.mkdir(parents=True, exist_ok=True)
+        for user_id, segment, offset, end in rows:
+            if indexed_sizes.get(segment.key, HEADER_SIZE) != offset:
+                # Rows were appended without being indexed, catch up first
+                self.__set_indexed_sizes(indexed_sizes)
+                self.refresh()
+                return
+            self.__append_entry(user_id, segment.id, offset)
+            indexed_sizes[segment.key] = end
+        self.__set_indexed_sizes(indexed_sizes)
+
+    def iter_offsets(self, user_id, limit: int | None = None, offset: int = 0):
+        """
+        Yields the (segment id, offset) of the user's games, newest first: by month, then by save order.
+        :param limit: maximum number of games, None for all of them
+        :param offset: number of newest games to skip
+        """
+        index_file_path = self.__get_index_file_path(user_id)
+        if not index_file_path.exists():
+            return
+        with index_file_path.open('rb') as file:
+            file.seek(0, 2)
+            count = file.tell() // OFFSET_SIZE
+            position = count - offset
+            stop = 0 if limit is None else max(0, position - limit)
+            while position > stop:
+                batch_start = max(stop, position - READ_BATCH)
+                file.seek(batch_start * OFFSET_SIZE)
+                batch = file.read((position - batch_start) * OFFSET_SIZE)
+                for entry in reversed(list(struct.iter_unpack(OFFSET_FORMAT, batch))):
+                    yield entry
+                position = batch_start
@@ -0,0 +1,358 @@
+import bisect
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from utils.helpers import format_date, parse_date
+from utils.storage import atomic_write_json, copy_file_mode, file_lock
+
+# Every segment starts with a fixed-size JSON header line, so it can be updated in place
+HEADER_SIZE = 128
+# Every this many rows of a segment get an entry in its sparse timestamp index
+SPARSE_INDEX_INTERVAL = 64
+# Sealed segments with fewer rows than this are merged with their neighbours on compaction
+COMPACT_MIN_ROWS = 1024
+
+
+def get_segment_key(timestamp: int) -> str:
+    """Returns the segment a game belongs to, one per month ('YYYY-MM')."""
+    return format_date(timestamp, '%Y-%m')
+
+
+def to_epoch_timestamp(game: dict) -> dict:
+    """Converts the timestamp of a game from the old 'YYYY-MM-DD HH:MM' strings to epoch seconds."""
+    if isinstance(game['timestamp'], str):
+        game['timestamp'] = parse_date(game['timestamp'])
+    return game
+
+
+class HistorySegment:
+    """
+    One time-based segment of the history: a JSON Lines file starting with a fixed-size header
+    that records the time range and row count of the segment. Rows are kept in the order they
+    were saved, which is not always the order of their timestamps, e.g. when a game is saved late
+    from another process. The header tells if the timestamps are ascending, only then range scans
+    stop early and use the sparse index.
+    """
+
+    def __init__(self, file_path: Path):
+        self.file_path = Path(file_path)
+        self.key = self.file_path.stem
+        # Number used to refer to the segment from the per-user index, 2024-04 -> 202404
+        self.id = int(self.key.replace('-', ''))
+        self.sparse_index_file_path = self.file_path.with_suffix('.tsidx')
+
+    @staticmethod
+    def encode_header(header: dict) -> bytes:
+        line = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        if len(line) >= HEADER_SIZE:
+            raise ValueError(f"Segment header is longer than {HEADER_SIZE} bytes: {line!r}")
+        return line.ljust(HEADER_SIZE - 1) + b'\n'
+
+    @classmethod
+    def create(cls, file_path: Path) -> 'HistorySegment':
+        """Creates an empty segment, unless it already exists."""
+        try:
+            with Path(file_path).open('xb') as file:
+                file.write(cls.encode_header({'start': None, 'end': None, 'rows': 0, 'sorted': True}))
+        except FileExistsError:
+            pass
+        return cls(file_path)
+
+    def read_header(self) -> dict:
+        """
+        Returns the time range and row count of the segment, {'start', 'end', 'rows', 'sorted'}.
+        Segments written before the sorted flag existed lack it, build_sparse_index adds it.
+        """
+        with self.file_path.open('rb') as file:
+            return json.loads(file.read(HEADER_SIZE))
+
+    @staticmethod
+    def is_sorted(header: dict) -> bool:
+        """Tells if the rows are known to be in ascending timestamp order."""
+        return header.get('sorted') is True
+
+    def get_size(self) -> int:
+        return self.file_path.stat().st_size
+
+    def get_data_size(self) -> int:
+        """Returns the number of bytes taken by the rows, the header excluded."""
+        return self.get_size() - HEADER_SIZE
+
+    def overlaps(self, start: int | None, end: int | None) -> bool:
+        """Tells if any row of the segment may fall between the timestamps, both ends included."""
+        header = self.read_header()
+        if header['rows'] == 0:
+            return False
+        return (start is None or header['end'] >= start) and (end is None or header['start'] <= end)
+
+    def append(self, lines: list[bytes], timestamps: list[int], fsync: bool = False) -> list[int]:
+        """
+        Appends rows to the segment with one write and returns the offsets they were written at.
+        The header is widened before the rows are written, so a crash in between never hides a row from range queries.
+        :param fsync: flush the rows to the disk before returning
+        """
+        with self.file_path.open('r+b') as file:
+            header = json.loads(file.read(HEADER_SIZE))
+            header['sorted'] = self.is_sorted(header) and (header['end'] is None or timestamps[0] >= header['end']) \
+                and all(previous <= timestamp for previous, timestamp in zip(timestamps, timestamps[1:]))
+            header['start'] = min(timestamps) if header['start'] is None else min(header['start'], *timestamps)
+            header['end'] = max(timestamps) if header['end'] is None else max(header['end'], *timestamps)
+            header['rows'] += len(lines)
+            file.seek(0)
+            file.write(self.encode_header(header))
+            offset = file.seek(0, 2)
+            file.write(b''.join(lines))
+            if fsync:
+                file.flush()
+                os.fsync(file.fileno())
+        offsets = []
+        for line in lines:
+            offsets.append(offset)
+            offset += len(line)
+        return offsets
+
+    def iter_lines(self, start_offset: int = HEADER_SIZE):
+        """Yields (offset, end offset, line) of every complete row from the offset on."""
+        with self.file_path.open('rb') as file:
+            file.seek(max(start_offset, HEADER_SIZE))
+            while True:
+                offset = file.tell()
+                line = file.readline()
+                if not line.endswith(b'\n'):
+                    # End of file, or a row that is still being written
+                    break
+                yield offset, file.tell(), line
+
+    def iter_records(self, start: int | None = None, end: int | None = None):
+        """
+        Yields the rows of the segment between the timestamps, both ends included.
+        When the timestamps are ascending, the sparse index is used to skip the rows before the start
+        and the scan stops after the end, otherwise every row is read.
+        """
+        is_sorted = self.is_sorted(self.read_header())
+        for _, _, line in self.iter_lines(self.find_offset(start) if is_sorted else HEADER_SIZE):
+            try:
+                game = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn row from an interrupted write, skip it
+                continue
+            if start is not None and game['timestamp'] < start:
+                continue
+            if end is not None and game['timestamp'] > end:
+                if is_sorted:
+                    # Nothing later in the segment is in range
+                    break
+                continue
+            yield game
+
+    def get_sparse_index(self) -> list:
+        """Returns the [timestamp, offset] entries of the sparse index, empty if it was not built."""
+        try:
+            with self.sparse_index_file_path.open('r', encoding='utf-8') as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    def build_sparse_index(self) -> int:
+        """
+        Indexes the timestamp of every SPARSE_INDEX_INTERVAL-th row, returns the number of entries.
+        Every row is checked on the way and the sorted flag of the header is updated, a segment whose
+        timestamps are not ascending gets no index. Hold the history lock.
+        """
+        entries = []
+        is_sorted = True
+        previous = None
+        for row, (offset, _, line) in enumerate(self.iter_lines()):
+            try:
+                timestamp = json.loads(line)['timestamp']
+            except json.JSONDecodeError:
+                continue
+            if previous is not None and timestamp < previous:
+                is_sorted = False
+            previous = timestamp
+            if row % SPARSE_INDEX_INTERVAL == 0:
+                entries.append([timestamp, offset])
+
+        with self.file_path.open('r+b') as file:
+            header = json.loads(file.read(HEADER_SIZE))
+            if header.get('sorted') != is_sorted:
+                header['sorted'] = is_sorted
+                file.seek(0)
+                file.write(self.encode_header(header))
+        if not is_sorted:
+            self.sparse_index_file_path.unlink(missing_ok=True)
+            return 0
+        atomic_write_json(self.sparse_index_file_path, entries, indent=None)
+        return len(entries)
+
+    def find_offset(self, start: int | None) -> int:
+        """Returns an offset at or before the first row at the start timestamp, only valid for sorted segments."""
+        if start is None:
+            return HEADER_SIZE
+        entries = self.get_sparse_index()
+        position = bisect.bisect_left([timestamp for timestamp, _ in entries], start)
+        return entries[position - 1][1] if position > 0 else HEADER_SIZE
+
+    def delete(self):
+        self.file_path.unlink(missing_ok=True)
+        self.sparse_index_file_path.unlink(missing_ok=True)
+
+
+class HistorySegments:
+    """
+    The history split into monthly segments, see HistorySegment.
+    Games are appended to the segment of their month, and range queries only open
+    the segments whose header overlaps the range. Writers hold the lock of the segment
+    directory, readers do not need it since rows are only ever appended.
+    """
+
+    def __init__(self, segment_directory: Path):
+        self.segment_directory = Path(segment_directory)
+        self.segment_directory.mkdir(parents=True, exist_ok=True)
+
+    def lock(self):
+        """Returns the lock that writers of the segments and of the data derived from them hold, see file_lock."""
+        return file_lock(self.segment_directory)
+
+    def get_segments(self) -> list[HistorySegment]:
+        """Returns every segment, oldest first."""
+        return [HistorySegment(file_path) for file_path in sorted(self.segment_directory.glob('*.jsonl'))]
+
+    def get_segment(self, segment_id: int) -> HistorySegment:
+        key = f'{segment_id // 100:04d}-{segment_id % 100:02d}'
+        return HistorySegment(self.segment_directory / f'{key}.jsonl')
+
+    def get_data_size(self) -> int:
+        """Returns the number of bytes taken by the rows of every segment, grows with every saved game."""
+        return sum(segment.get_data_size() for segment in self.get_segments())
+
+    def append(self, games: list[dict], fsync: bool = False) -> list[tuple[HistorySegment, int, int]]:
+        """
+        Appends games to the segments of their months, with one write per segment.
+        :param fsync: flush the games to the disk before returning
+        :return: for each game, the segment and the offsets where its row starts and ends
+        """
+        by_key = {}
+        for position, game in enumerate(games):
+            by_key.setdefault(get_segment_key(game['timestamp']), []).append(position)
+        rows = [None] * len(games)
+        for key, positions in by_key.items():
+            segment = HistorySegment.create(self.segment_directory / f'{key}.jsonl')
+            lines = [(json.dumps(games[position]) + '\n').encode('utf-8') for position in positions]
+            offsets = segment.append(lines, [games[position]['timestamp'] for position in positions], fsync)
+            for position, line, offset in zip(positions, lines, offsets):
+                rows[position] = (segment, offset, offset + len(line))
+        return rows
+
+    def iter_records(self, start: int | None = None, end: int | None = None):
+        """Yields the games between the timestamps, both ends included, skipping the segments out of range."""
+        for segment in self.get_segments():
+            if start is None and end is None or segment.overlaps(start, end):
+                yield from segment.iter_records(start, end)
+
+    def __write_segment(self, key: str, lines) -> HistorySegment:
+        """Writes the rows into a new segment, atomically replacing any segment with the same key."""
+        segment = HistorySegment(self.segment_directory / f'{key}.jsonl')
+        header = {'start': None, 'end': None, 'rows': 0, 'sorted': True}
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.segment_directory, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as file:
+                file.write(HistorySegment.encode_header(header))
+                for line in lines:
+                    file.write(line)
+                    try:
+                        timestamp = json.loads(line)['timestamp']
+                    except json.JSONDecodeError:
+                        continue
+                    if header['end'] is not None and timestamp < header['end']:
+                        header['sorted'] = False
+                    header['start'] = timestamp if header['start'] is None else min(header['start'], timestamp)
+                    header['end'] = timestamp if header['end'] is None else max(header['end'], timestamp)
+                    header['rows'] += 1
+                file.seek(0)
+                file.write(HistorySegment.encode_header(header))
+                file.flush()
+                os.fsync(file.fileno())
+            # The offsets in the old sparse index do not apply to the new file
+            segment.sparse_index_file_path.unlink(missing_ok=True)
+            copy_file_mode(temp_path, segment.file_path)
+            os.replace(temp_path, segment.file_path)
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+        return segment
+
+    def write_segment(self, key: str, games) -> HistorySegment:
+        """Writes the games into a new segment, replacing any segment with the same key."""
+        return self.__write_segment(key, ((json.dumps(game) + '\n').encode('utf-8') for game in games))
+
+    def import_records(self, games):
+        """Splits games from a single history file into segments, used when migrating the old formats."""
+        by_key = {}
+        for game in map(to_epoch_timestamp, games):
+            by_key.setdefault(get_segment_key(game['timestamp']), []).append(game)
+        for key, key_games in by_key.items():
+            existing = self.segment_directory / f'{key}.jsonl'
+            if existing.exists():
+                key_games = list(HistorySegment(existing).iter_records()) + key_games
+            self.write_segment(key, key_games)
+
+    def needs_timestamp_migration(self) -> bool:
+        """Tells if any segment still stores its timestamps as strings, which only needs its header read."""
+        return any(isinstance(segment.read_header()['start'], str) for segment in self.get_segments())
+
+    def migrate_timestamps(self) -> int:
+        """
+        Rewrites the segments storing their timestamps as strings with epoch seconds.
+        Offsets change, so the per-user index has to be rebuilt.
+        :return: number of rewritten segments
+        """
+        migrated = 0
+        for segment in self.get_segments():
+            if isinstance(segment.read_header()['start'], str):
+                self.write_segment(segment.key, [to_epoch_timestamp(game) for game in segment.iter_records()])
+                migrated += 1
+        return migrated
+
+    def compact(self, current_key: str, min_rows: int = COMPACT_MIN_ROWS) -> dict:
+        """
+        Merges runs of neighbouring small segments and builds the sparse timestamp index of every segment.
+        The segment of the current month is still being written to and is left alone.
+        Rows are copied byte for byte, so the data size, and the history version, stay the same.
+        :return: dict with the number of segments before and after, and the merged ones
+        """
+        segments = self.get_segments()
+        report = {'segments_before': len(segments), 'merged': 0}
+
+        groups = []
+        group = []
+        group_rows = 0
+        for segment in segments:
+            rows = segment.read_header()['rows']
+            if segment.key >= current_key or rows >= min_rows:
+                if len(group) > 1:
+                    groups.append(group)
+                group, group_rows = [], 0
+                continue
+            group.append(segment)
+            group_rows += rows
+            if group_rows >= min_rows:
+                if len(group) > 1:
+                    groups.append(group)
+                group, group_rows = [], 0
+        if len(group) > 1:
+            groups.append(group)
+
+        for group in groups:
+            self.__write_segment(group[0].key, (line for segment in group for _, _, line in segment.iter_lines()))
+            for segment in group[1:]:
+                segment.delete()
+            report['merged'] += len(group)
+
+        segments = self.get_segments()
+        for segment in segments:
+            segment.build_sparse_index()
+        report['segments_after'] = len(segments)
+        return report
@@ -0,0 +1,6 @@
+from api_layer.sidecar_api import SidecarAPI
+
+
+class LeaderboardAPI(SidecarAPI):
+    """The materialized leaderboard aggregates, leaderboard.json and its patch log, see SidecarAPI."""
+    database = 'leaderboard.json'
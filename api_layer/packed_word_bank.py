@@ -0,0 +1,123 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+
+# Header layout: magic, format version, word length, reserved, word count
+HEADER_FORMAT = '<4sBBHI'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+MAGIC = b'WBNK'
+VERSION = 1
+
+
+def get_packed_file_path(word_len: int) -> Path:
+    """Returns the path of the packed word bank for the given word length."""
+    return Path(f"data_layer/repository/word_bank/{word_len}_letter_words.bin")
+
+
+def get_json_file_path(word_len: int) -> Path:
+    """Returns the path of the JSON word bank for the given word length."""
+    return Path(f"data_layer/repository/word_bank/{word_len}_letter_words.json")
+
+
+def write_packed_word_bank(file_path: Path, word_len: int, words) -> int:
+    """
+    Writes the words to a packed word bank file.
+    Words are upper-cased, deduplicated and sorted so the file supports binary search.
+    :return: number of words written
+    """
+    packed_words = sorted({word.upper().encode('ascii') for word in words})
+    for word in packed_words:
+        if len(word) != word_len:
+            raise ValueError(f"Word {word.decode('ascii')} is not {word_len} letters long.")
+
+    temp_path = file_path.with_suffix(file_path.suffix + '.tmp')
+    with temp_path.open('wb') as file:
+        file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, word_len, 0, len(packed_words)))
+        file.write(b''.join(packed_words))
+    os.replace(temp_path, file_path)
+    return len(packed_words)
+
+
+def convert_word_bank(word_len: int) -> int:
+    """
+    Converts the JSON word bank for the given word length to the packed format.
+    :return: number of words written
+    """
+    with get_json_file_path(word_len).open('r', encoding='utf-8') as file:
+        words = json.load(file)
+    return write_packed_word_bank(get_packed_file_path(word_len), word_len, words)
+
+
+class PackedWordBank:
+    """
+    Read-only view over a packed word bank file.
+    The file is a small header followed by sorted, fixed-width ASCII words, and is memory-mapped,
+    so opening it costs nothing regardless of size and lookups never copy the whole bank.
+    """
+
+    def __init__(self, file_path: Path):
+        self.file_path = Path(file_path)
+        with self.file_path.open('rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, word_len, _, count = struct.unpack_from(HEADER_FORMAT, self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"{self.file_path} is not a packed word bank.")
+        if len(self._mmap) != HEADER_SIZE + word_len * count:
+            self._mmap.close()
+            raise ValueError(f"{self.file_path} is truncated or corrupted.")
+
+        self.word_len = word_len
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError('word index out of range')
+        start = HEADER_SIZE + index * self.word_len
+        return self._mmap[start:start + self.word_len].decode('ascii')
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
+
+    def __contains__(self, word: str) -> bool:
+        return self.index_of(word) is not None
+
+    def index_of(self, word: str) -> int | None:
+        """Finds the index of the word with a binary search, or None if it is not in the bank."""
+        if len(word) != self.word_len:
+            return None
+        key = word.upper().encode('ascii', errors='replace')
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            start = HEADER_SIZE + middle * self.word_len
+            current = self._mmap[start:start + self.word_len]
+            if current < key:
+                low = middle + 1
+            elif current > key:
+                high = middle
+            else:
+                return middle
+        return None
+
+    def close(self):
+        """Releases the memory map."""
+        self._mmap.close()
+
+
+if __name__ == '__main__':
+    # Usage: python -m api_layer.packed_word_bank [word_len ...]
+    lengths = [int(arg) for arg in sys.argv[1:]] or [3, 4, 5, 6]
+    for length in lengths:
+        total = convert_word_bank(length)
+        print(f"Packed {total} words into {get_packed_file_path(length)}")
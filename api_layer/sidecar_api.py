@@ -0,0 +1,151 @@
+import json
+import os
+from pathlib import Path
+
+from common.constants import SIDECAR_LOG_COMPACT_BYTES
+from utils.storage import atomic_write_json, copy_file_mode
+
+
+class SidecarAPI:
+    """
+    Base class of the files holding data derived from the history, like the leaderboard.
+    The data is stored as a compact JSON snapshot plus an append-only log of patches, one line per
+    group of saved games that sets or deletes the entries the games touched. Saving games only appends
+    a line, and once the log grows past SIDECAR_LOG_COMPACT_BYTES it is folded into a new snapshot.
+    Loaded data is kept in memory, so later loads only replay the lines appended since.
+    Every line carries the history versions before and after it, a line that does not follow on
+    from the data means it is stale and has to be rebuilt.
+    """
+    database = None
+    # file path -> (snapshot signature, log inode, log offset, data), shared by every instance in the process
+    _cache = {}
+
+    def __init__(self):
+        self.file_path = Path(f'data_layer/repository/{self.database}')
+        self.log_file_path = self.file_path.with_suffix('.log')
+
+    @staticmethod
+    def __get_signature(file_path: Path):
+        """Returns the (inode, mtime, size) of the file, None if it does not exist."""
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def get_path(data: dict, path) -> object:
+        """Returns the value at the path of keys, None if any key is missing."""
+        for key in path:
+            if not isinstance(data, dict) or key not in data:
+                return None
+            data = data[key]
+        return data
+
+    @staticmethod
+    def apply_patch(data: dict, patch: list):
+        """Applies [path, value] pairs to the data, a None value deletes the entry."""
+        for path, value in patch:
+            parent = data
+            for key in path[:-1]:
+                parent = parent.setdefault(key, {})
+            if value is None:
+                parent.pop(path[-1], None)
+            else:
+                parent[path[-1]] = value
+
+    @classmethod
+    def make_patch(cls, data: dict, paths) -> list:
+        """Returns the patch that sets every path to its current value in the data."""
+        return [[list(path), cls.get_path(data, path)] for path in paths]
+
+    def __replay(self, data: dict, offset: int) -> int | None:
+        """
+        Applies the log lines from the offset on to the data.
+        :return: offset after the last complete line, None if a line does not follow on from the data
+        """
+        try:
+            file = self.log_file_path.open('rb')
+        except FileNotFoundError:
+            return offset
+        with file:
+            file.seek(offset)
+            for line in file:
+                if not line.endswith(b'\n'):
+                    # A line that is still being written
+                    break
+                entry = json.loads(line)
+                if entry['after'] <= data['version']:
+                    # Already part of the snapshot, the log was not emptied yet when it was written
+                    offset += len(line)
+                    continue
+                if entry['before'] != data['version']:
+                    return None
+                self.apply_patch(data, entry['set'])
+                data['version'] = entry['after']
+                offset += len(line)
+        return offset
+
+    def get(self) -> dict | None:
+        """Retrieves the stored data with the logged patches applied, None if there is none or it is stale."""
+        snapshot_signature = self.__get_signature(self.file_path)
+        if snapshot_signature is None:
+            return None
+        log_signature = self.__get_signature(self.log_file_path)
+        log_inode = log_signature[0] if log_signature is not None else None
+        log_size = log_signature[2] if log_signature is not None else 0
+
+        cached = self._cache.get(self.file_path)
+        if cached is not None and cached[0] == snapshot_signature and cached[1] == log_inode and cached[2] <= log_size:
+            data, offset = cached[3], cached[2]
+            if offset == log_size:
+                return data
+        else:
+            try:
+                with self.file_path.open('r', encoding='utf-8') as file:
+                    data = json.load(file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                return None
+            offset = 0
+
+        offset = self.__replay(data, offset)
+        if offset is None:
+            self._cache.pop(self.file_path, None)
+            return None
+        self._cache[self.file_path] = (snapshot_signature, log_inode, offset, data)
+        return data
+
+    def save(self, data: dict):
+        """Replaces the stored data with a new snapshot and an empty log."""
+        atomic_write_json(self.file_path, data, indent=None)
+        empty_log_path = self.log_file_path.with_name(f'.{self.log_file_path.name}.tmp')
+        empty_log_path.write_bytes(b'')
+        copy_file_mode(empty_log_path, self.log_file_path)
+        os.replace(empty_log_path, self.log_file_path)
+        self._cache[self.file_path] = (self.__get_signature(self.file_path),
+                                       self.__get_signature(self.log_file_path)[0], 0, data)
+
+    def append(self, data: dict, paths, version_before: int, version_after: int):
+        """
+        Stores the changes made to data, as returned by get, by saving games to the history.
+        Hold the history lock, appends must not interleave.
+        :param paths: paths of keys of the entries that were set or deleted
+        """
+        line = (json.dumps({'before': version_before, 'after': version_after,
+                            'set': self.make_patch(data, paths)}, separators=(',', ':')) + '\n').encode('utf-8')
+        cached = self._cache.get(self.file_path)
+        try:
+            with self.log_file_path.open('ab') as file:
+                offset = file.seek(0, 2)
+                file.write(line)
+        except BaseException:
+            self._cache.pop(self.file_path, None)
+            raise
+        data['version'] = version_after
+        if offset + len(line) > SIDECAR_LOG_COMPACT_BYTES:
+            self.save(data)
+        elif cached is not None and cached[3] is data and cached[2] == offset:
+            # The data in memory already has the changes, only skip over the new line
+            self._cache[self.file_path] = (cached[0], cached[1], offset + len(line), data)
+        else:
+            self._cache.pop(self.file_path, None)
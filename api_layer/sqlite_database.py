@@ -0,0 +1,131 @@
+import sqlite3
+import threading
+
+from common.constants import SQLITE_DATABASE_PATH
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    uuid TEXT NOT NULL UNIQUE,
+    user_id TEXT NOT NULL,
+    word TEXT NOT NULL,
+    result TEXT NOT NULL,
+    guesses INTEGER NOT NULL,
+    score NUMERIC NOT NULL,
+    timestamp INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_user_timestamp ON history (user_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history (timestamp);
+CREATE TABLE IF NOT EXISTS words (
+    id INTEGER PRIMARY KEY,
+    word TEXT NOT NULL UNIQUE,
+    length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_words_length ON words (length, id);
+-- Counts the changes to a table, so its readers can cache it without watching the whole database
+CREATE TABLE IF NOT EXISTS table_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS words_insert_version AFTER INSERT ON words BEGIN
+    INSERT INTO table_versions (name, version) VALUES ('words', 1)
+        ON CONFLICT (name) DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS words_update_version AFTER UPDATE ON words BEGIN
+    INSERT INTO table_versions (name, version) VALUES ('words', 1)
+        ON CONFLICT (name) DO UPDATE SET version = version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS words_delete_version AFTER DELETE ON words BEGIN
+    INSERT INTO table_versions (name, version) VALUES ('words', 1)
+        ON CONFLICT (name) DO UPDATE SET version = version + 1;
+END;
+"""
+
+# Timestamps used to be stored as 'YYYY-MM-DD HH:MM' strings in local time, the table is rebuilt with epoch seconds
+MIGRATE_HISTORY_TIMESTAMPS = """
+CREATE TABLE history_migrated (
+    id INTEGER PRIMARY KEY,
+    uuid TEXT NOT NULL UNIQUE,
+    user_id TEXT NOT NULL,
+    word TEXT NOT NULL,
+    result TEXT NOT NULL,
+    guesses INTEGER NOT NULL,
+    score NUMERIC NOT NULL,
+    timestamp INTEGER NOT NULL
+);
+INSERT INTO history_migrated (id, uuid, user_id, word, result, guesses, score, timestamp)
+    SELECT id, uuid, user_id, word, result, guesses, score,
+           CASE WHEN typeof(timestamp) = 'text' THEN CAST(strftime('%s', timestamp, 'utc') AS INTEGER)
+                ELSE timestamp END
+    FROM history;
+DROP TABLE history;
+ALTER TABLE history_migrated RENAME TO history;
+CREATE INDEX idx_history_user_timestamp ON history (user_id, timestamp);
+CREATE INDEX idx_history_timestamp ON history (timestamp);
+"""
+
+
+class SQLiteDatabase:
+    """
+    The SQLiteDatabase class hands out connections to the SQLite repository.
+    Every thread gets its own connection, the database runs in WAL mode so
+    readers do not block the writer and several processes can share the file.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        """
+        This method is used to implement the singleton pattern.
+        """
+        if cls._instance is None:
+            cls._instance = super(SQLiteDatabase, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, database_path: str = SQLITE_DATABASE_PATH):
+        if not hasattr(self, 'is_initialized'):
+            self.is_initialized = True
+            self.database_path = database_path
+            self._local = threading.local()
+
+    def get_connection(self) -> sqlite3.Connection:
+        """Returns the connection of the calling thread, opening it on first use."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Statements are parameterized, sqlite3 keeps them prepared in its statement cache
+            connection = sqlite3.connect(self.database_path, timeout=30, cached_statements=256)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('PRAGMA foreign_keys=ON')
+            connection.executescript(SCHEMA)
+            self.__migrate_history_timestamps(connection)
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def __migrate_history_timestamps(connection: sqlite3.Connection):
+        """Rebuilds a history table from before timestamps were stored as epoch seconds."""
+        columns = {row[1]: row[2] for row in connection.execute('PRAGMA table_info(history)')}
+        if columns.get('timestamp') != 'TEXT':
+            return
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            # Another process may have migrated it while this one waited for the write lock
+            columns = {row[1]: row[2] for row in connection.execute('PRAGMA table_info(history)')}
+            if columns.get('timestamp') == 'TEXT':
+                for statement in MIGRATE_HISTORY_TIMESTAMPS.split(';'):
+                    if statement.strip():
+                        connection.execute(statement)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def get_table_version(self, name: str) -> int:
+        """Returns a counter that changes whenever the table is modified, by any connection, see table_versions."""
+        row = self.get_connection().execute('SELECT version FROM table_versions WHERE name = ?', (name,)).fetchone()
+        return row[0] if row is not None else 0
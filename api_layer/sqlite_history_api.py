@@ -0,0 +1,94 @@
+from api_layer.sqlite_database import SQLiteDatabase
+from models.History import History
+from utils.storage import file_lock
+
+HISTORY_COLUMNS = 'uuid, user_id, word, result, guesses, score, timestamp'
+
+
+class SQLiteHistoryAPI:
+    def __init__(self):
+        self.database = SQLiteDatabase()
+
+    def __select(self, user_id=None, start: int | None = None, end: int | None = None):
+        """Runs the history query, filtered by user ID and time range through the indexes."""
+        conditions = []
+        parameters = []
+        if user_id is not None:
+            conditions.append('user_id = ?')
+            parameters.append(str(user_id))
+        if start is not None:
+            conditions.append('timestamp >= ?')
+            parameters.append(start)
+        if end is not None:
+            conditions.append('timestamp <= ?')
+            parameters.append(end)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ''
+        return self.database.get_connection().execute(
+            f'SELECT {HISTORY_COLUMNS} FROM history {where}ORDER BY id', parameters
+        )
+
+    def iter_history(self, user_id=None, start: int | None = None, end: int | None = None):
+        """
+        Streams the game history, optionally filtered by user ID and time range.
+        :param start: earliest epoch timestamp, included
+        :param end: latest epoch timestamp, included
+        """
+        for row in self.__select(user_id, start, end):
+            yield History(*row)
+
+    def iter_records(self, start: int | None = None, end: int | None = None):
+        """
+        Streams the raw history records (dicts) between the timestamps, without building History objects.
+        :param start: earliest epoch timestamp, included
+        :param end: latest epoch timestamp, included
+        """
+        columns = [column.strip() for column in HISTORY_COLUMNS.split(',')]
+        for row in self.__select(None, start, end):
+            yield dict(zip(columns, row))
+
+    def iter_user_history(self, user_id, limit: int | None = None, offset: int = 0):
+        """
+        Lazily yields the games of one user, newest first, through the (user_id, timestamp) index.
+        :param limit: maximum number of games, None for all of them
+        :param offset: number of newest games to skip
+        """
+        rows = self.database.get_connection().execute(
+            f'SELECT {HISTORY_COLUMNS} FROM history WHERE user_id = ? '
+            'ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?',
+            (str(user_id), -1 if limit is None else limit, offset)
+        )
+        for row in rows:
+            yield History(*row)
+
+    def get_history(self, user_id=None) -> list[History]:
+        """Retrieves the game history, optionally filtered by user ID."""
+        return list(self.iter_history(user_id))
+
+    def lock(self):
+        """
+        Returns a lock to hold across a save and the updates of the data derived from the history.
+        The database serializes the writes themselves, the lock keeps the derived data in step with them.
+        """
+        return file_lock(self.database.database_path)
+
+    def get_version(self) -> int:
+        """Returns a number that grows with every saved game, the id of the newest row."""
+        row = self.database.get_connection().execute('SELECT COALESCE(MAX(id), 0) FROM history').fetchone()
+        return row[0]
+
+    def add_history(self, new_entry: History, fsync: bool = False):
+        """Adds a game result to the history."""
+        self.add_histories([new_entry], fsync)
+
+    def add_histories(self, new_entries: list[History], fsync: bool = False):
+        """
+        Adds game results to the history in a single transaction.
+        :param fsync: unused, the durability of a commit is set by the database's synchronous pragma
+        """
+        games = [entry.get_json_format() for entry in new_entries]
+        with self.database.get_connection() as connection:
+            connection.executemany(
+                f'INSERT INTO history ({HISTORY_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                ((game['uuid'], game['user_id'], game['word'], game['result'], game['guesses'], game['score'],
+                  game['timestamp']) for game in games)
+            )
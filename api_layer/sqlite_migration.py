@@ -0,0 +1,50 @@
+import argparse
+
+from api_layer.history_api import HistoryAPI
+from api_layer.sqlite_database import SQLiteDatabase
+from api_layer.user_api import UserAPI
+from api_layer.word_bank_api import WordBankAPI
+from common.constants import MIN_WORD_LENGTH, MAX_WORD_LENGTH
+
+
+def migrate_json_to_sqlite(database: SQLiteDatabase | None = None) -> dict:
+    """
+    Copies users, history and word banks from the JSON files into the SQLite database.
+    Records that already exist in the database are skipped, so the migration can be rerun.
+    :return: dict with the number of rows inserted per table
+    """
+    database = database if database is not None else SQLiteDatabase()
+    report = {}
+    with database.get_connection() as connection:
+        # rowcount counts the inserted rows only, total_changes would also count the rows written by triggers
+        users = [user.get_json_format() for user in UserAPI().get_users() or []]
+        # UserAPI.get_users hands out the username as the name and the other way around
+        report['users'] = connection.executemany(
+            'INSERT OR IGNORE INTO users (id, username, name) VALUES (?, ?, ?)',
+            ((user['id'], user['name'], user['username']) for user in users)
+        ).rowcount
+
+        report['history'] = connection.executemany(
+            'INSERT OR IGNORE INTO history (uuid, user_id, word, result, guesses, score, timestamp) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            ((game['uuid'], game['user_id'], game['word'], game['result'], game['guesses'], game['score'],
+              game['timestamp'])
+             for game in (history.get_json_format() for history in HistoryAPI().iter_history()))
+        ).rowcount
+
+        report['words'] = 0
+        for word_len in range(MIN_WORD_LENGTH, MAX_WORD_LENGTH + 1):
+            report['words'] += connection.executemany(
+                'INSERT OR IGNORE INTO words (word, length) VALUES (?, ?)',
+                ((word, word_len) for word in WordBankAPI(word_len).get_word_bank() or [])
+            ).rowcount
+    return report
+
+
+if __name__ == '__main__':
+    # Usage: python -m api_layer.sqlite_migration, then run the game with WORDLE_BACKEND=sqlite
+    parser = argparse.ArgumentParser(description='Migrate the JSON repository files into the SQLite database.')
+    parser.parse_args()
+    migration_report = migrate_json_to_sqlite()
+    print(f"Migrated {migration_report['users']} users, {migration_report['history']} games "
+          f"and {migration_report['words']} words into {SQLiteDatabase().database_path}")
@@ -0,0 +1,56 @@
+import sqlite3
+
+from api_layer.sqlite_database import SQLiteDatabase
+from models.User import User
+
+
+class SQLiteUserAPI:
+    def __init__(self):
+        self.database = SQLiteDatabase()
+
+    def get_users(self):
+        """Retrieves all users."""
+        rows = self.database.get_connection().execute('SELECT id, username, name FROM users ORDER BY rowid')
+        return [User(user_id, username, name) for user_id, username, name in rows]
+
+    def get_user(self, selected_user):
+        """Retrieves a user by ID or username, both lookups are indexed."""
+        row = self.database.get_connection().execute(
+            'SELECT id, username, name FROM users WHERE username = ? OR id = ? LIMIT 1',
+            (str(selected_user), str(selected_user))
+        ).fetchone()
+        if row is None:
+            return None
+
+        user_id, username, name = row
+        return User(user_id, name, username)
+
+    def get_users_by_ids(self, user_ids) -> dict:
+        """
+        Retrieves many users by ID with one query per chunk of ids, through the primary key.
+        :return: dict of user id -> User, ids without a user are left out
+        """
+        user_ids = list({str(user_id) for user_id in user_ids})
+        users = {}
+        connection = self.database.get_connection()
+        # Stay below SQLite's limit on the number of query parameters
+        for start in range(0, len(user_ids), 500):
+            chunk = user_ids[start:start + 500]
+            rows = connection.execute(
+                f"SELECT id, username, name FROM users WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+            )
+            for user_id, username, name in rows:
+                users[user_id] = User(user_id, name, username)
+        return users
+
+    def add_user(self, user: User):
+        """Adds a new user."""
+        user_data = user.get_json_format()
+        try:
+            with self.database.get_connection() as connection:
+                connection.execute(
+                    'INSERT INTO users (id, username, name) VALUES (?, ?, ?)',
+                    (user_data['id'], user_data['username'], user_data['name'])
+                )
+        except sqlite3.IntegrityError:
+            raise ValueError(f"User with username {user.username} already exists.")
@@ -0,0 +1,64 @@
+from random import randrange
+
+from api_layer.sqlite_database import SQLiteDatabase
+
+
+class SQLiteWordBankAPI:
+    # word_len -> (words table version, words, word set), shared by every instance in the process
+    _cache = {}
+
+    def __init__(self, word_len) -> None:
+        self.word_len = word_len
+        self.database = SQLiteDatabase()
+
+    def __get_entry(self):
+        """Returns the cached words of this length, reloading them only if the words table changed."""
+        table_version = self.database.get_table_version('words')
+        entry = self._cache.get(self.word_len)
+        if entry is None or entry[0] != table_version:
+            rows = self.database.get_connection().execute(
+                'SELECT word FROM words WHERE length = ? ORDER BY id', (self.word_len,)
+            )
+            words = [word for word, in rows]
+            entry = (table_version, words, frozenset(words))
+            self._cache[self.word_len] = entry
+        return entry
+
+    def get_packed_word_bank(self):
+        """The packed format only exists for the JSON backend."""
+        return None
+
+    def get_word_bank(self):
+        """Retrieves a word bank by word length."""
+        return self.__get_entry()[1]
+
+    def has_word(self, word: str) -> bool:
+        """Checks if the word exists in the word bank."""
+        return word.upper() in self.__get_entry()[2]
+
+    def get_random_word(self):
+        """Retrieves a random word from the word bank."""
+        word_bank = self.get_word_bank()
+        if not word_bank:
+            return None
+        return word_bank[randrange(len(word_bank))]
+
+    def add_word(self, word: str):
+        """Adds a new word to the word bank."""
+        added, _ = self.add_words([word])
+        if added == 0:
+            raise ValueError(f"Word {word.upper()} already exists in the word bank.")
+
+    def add_words(self, words) -> tuple[int, int]:
+        """
+        Adds many words to the word bank in a single transaction.
+        :return: (number of words added, number of duplicates skipped)
+        """
+        words = [word.upper() for word in words]
+        with self.database.get_connection() as connection:
+            # rowcount counts the inserted words only, total_changes would also count the version trigger's rows
+            added = connection.executemany(
+                'INSERT OR IGNORE INTO words (word, length) VALUES (?, ?)',
+                ((word, self.word_len) for word in words)
+            ).rowcount
+        return added, len(words) - added
@@ -1,46 +1,129 @@
 import json
+import os
 from pathlib import Path
 
 from models.User import User
+from utils.storage import atomic_write_json, file_lock
+
+
+class UserCache:
+    """
+    Process-wide index of the user file, by id and by username.
+    The file is parsed once and only reloaded when it changes on disk.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        """
+        This method is used to implement the singleton pattern.
+        """
+        if cls._instance is None:
+            cls._instance = super(UserCache, cls).__new__(cls, *args, **kwargs)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'is_initialized'):
+            self.is_initialized = True
+            # (signature, user records, id -> record, username -> record)
+            self._entry = None
+
+    @staticmethod
+    def _get_signature(file_path: Path):
+        """Returns the (inode, mtime, size) triple used to detect changes to the file, it is replaced on every write."""
+        stat = os.stat(file_path)
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _get_entry(self, file_path: Path):
+        """Returns the cached index, reloading it if the file changed."""
+        signature = self._get_signature(file_path)
+        if self._entry is not None and self._entry[0] == signature:
+            return self._entry
+
+        try:
+            with file_path.open('r', encoding='utf-8') as file:
+                users = json.load(file)
+        except json.JSONDecodeError:
+            users = None
+
+        by_id = {}
+        by_username = {}
+        for user in users or []:
+            # The first record wins, like the linear scan this replaces
+            by_id.setdefault(str(user['id']), user)
+            by_username.setdefault(user['username'], user)
+        self._entry = (signature, users, by_id, by_username)
+        return self._entry
+
+    def get_users(self, file_path: Path) -> list[dict] | None:
+        """Returns the user records, or None if the file is unreadable."""
+        return self._get_entry(file_path)[1]
+
+    def get_by_id(self, file_path: Path) -> dict:
+        """Returns the user records by id."""
+        return self._get_entry(file_path)[2]
+
+    def get_by_username(self, file_path: Path) -> dict:
+        """Returns the user records by username."""
+        return self._get_entry(file_path)[3]
+
+    def invalidate(self):
+        """Drops the cached index."""
+        self._entry = None
 
 
 class UserAPI:
     def __init__(self):
         self.user_file_path = Path(User.file_path)
-        # Ensure the user file exists
-        self.user_file_path.touch(exist_ok=True)
+        # Ensure the user file exists, touching an existing file would bump its mtime and invalidate the cache
+        if not self.user_file_path.exists():
+            self.user_file_path.touch()
+        self.cache = UserCache()
 
     def get_users(self):
         """Retrieves all users."""
-        try:
-            with self.user_file_path.open('r', encoding='utf-8') as file:
-                users = json.load(file)
-        except json.JSONDecodeError:
+        users = self.cache.get_users(self.user_file_path)
+        if users is None:
             return None
 
         return [User(user['id'], user['username'], user['name']) for user in users]
 
     def get_user(self, selected_user):
-        """Retrieves a user by ID."""
-        try:
-            with self.user_file_path.open('r', encoding='utf-8') as file:
-                users = json.load(file)
-        except json.JSONDecodeError:
+        """Retrieves a user by username or ID, both are looked up in the cached index."""
+        if self.cache.get_users(self.user_file_path) is None:
             return None
 
-        for user in users:
-            if user['username'] == selected_user or str(user['id']) == str(selected_user):
-                return User(user['id'], user['name'], user['username'])
+        user = self.cache.get_by_username(self.user_file_path).get(selected_user)
+        if user is None:
+            user = self.cache.get_by_id(self.user_file_path).get(str(selected_user))
+        if user is None:
+            return None
 
-        return None
+        return User(user['id'], user['name'], user['username'])
+
+    def get_users_by_ids(self, user_ids) -> dict:
+        """
+        Retrieves many users by ID with a single read of the user file.
+        :return: dict of user id -> User, ids without a user are left out
+        """
+        by_id = self.cache.get_by_id(self.user_file_path)
+        users = {}
+        for user_id in user_ids:
+            user = by_id.get(str(user_id))
+            if user is not None:
+                users[str(user_id)] = User(user['id'], user['name'], user['username'])
+        return users
 
     def add_user(self, user: User):
-        """Adds a new user to the user file."""
-        with self.user_file_path.open('r+', encoding='utf-8') as file:
-            try:
-                users = json.load(file)
-            except json.JSONDecodeError:
-                users = []
+        """
+        Adds a new user to the user file.
+        The file is locked while it is read and rewritten, so users added from other processes are not lost.
+        """
+        with file_lock(self.user_file_path):
+            with self.user_file_path.open('r', encoding='utf-8') as file:
+                try:
+                    users = json.load(file)
+                except json.JSONDecodeError:
+                    users = []
 
             # Check if the user already exists
             for existing_user in users:
@@ -49,8 +132,7 @@ class UserAPI:
 
             # Append the new user
             users.append(user.get_json_format())
+            atomic_write_json(self.user_file_path, users)
 
-            # Move back to the start of the file to overwrite it
-            file.seek(0)
-            json.dump(users, file, indent=4)
-            file.truncate()
+            # The file changed, make sure the next read picks up the new user
+            self.cache.invalidate()
@@ -0,0 +1,6 @@
+from api_layer.sidecar_api import SidecarAPI
+
+
+class UserStatsAPI(SidecarAPI):
+    """The statistics of every user, user_stats.json and its patch log, see SidecarAPI."""
+    database = 'user_stats.json'
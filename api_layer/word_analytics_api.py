@@ -0,0 +1,6 @@
+from api_layer.sidecar_api import SidecarAPI
+
+
+class WordAnalyticsAPI(SidecarAPI):
+    """The word analytics report, word_analytics.json and its patch log, see SidecarAPI."""
+    database = 'word_analytics.json'
@@ -1,29 +1,159 @@
 import json
+import os
 from pathlib import Path
 from random import randrange
 
+from api_layer.packed_word_bank import PackedWordBank, get_packed_file_path, write_packed_word_bank
+from utils.storage import atomic_write_json, file_lock
+
+
+class WordBankCache:
+    """
+    Process-wide cache of parsed word banks, keyed by word length.
+    Each bank is loaded once and only reloaded when its file changes on disk.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        """
+        This method is used to implement the singleton pattern.
+        """
+        if cls._instance is None:
+            cls._instance = super(WordBankCache, cls).__new__(cls, *args, **kwargs)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'is_initialized'):
+            self.is_initialized = True
+            # word_len -> (signature, words, word_set)
+            self._banks = {}
+            # word_len -> [signature, PackedWordBank, decoded words or None until first asked for]
+            self._packed_banks = {}
+
+    @staticmethod
+    def _get_signature(file_path: Path):
+        """Returns the (mtime, size) pair used to detect changes to the file."""
+        stat = os.stat(file_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _get_entry(self, word_len: int, file_path: Path):
+        """Returns the cached entry for the word length, reloading it if the file changed."""
+        signature = self._get_signature(file_path)
+        entry = self._banks.get(word_len)
+        if entry is not None and entry[0] == signature:
+            return entry
+
+        try:
+            with file_path.open('r', encoding='utf-8') as file:
+                word_bank = json.load(file)
+        except json.JSONDecodeError:
+            word_bank = None
+
+        if word_bank is None:
+            entry = (signature, None, frozenset())
+        else:
+            words = [word.upper() for word in word_bank]
+            entry = (signature, words, frozenset(words))
+        self._banks[word_len] = entry
+        return entry
+
+    def get_words(self, word_len: int, file_path: Path):
+        """Returns the normalized (upper-case) list of words, or None if the bank is unreadable."""
+        return self._get_entry(word_len, file_path)[1]
+
+    def get_word_set(self, word_len: int, file_path: Path):
+        """Returns the normalized words as a set for constant-time membership checks."""
+        return self._get_entry(word_len, file_path)[2]
+
+    def _get_packed_entry(self, word_len: int, file_path: Path):
+        """Returns the cached packed entry for the word length, reopening the bank if the file changed."""
+        signature = self._get_signature(file_path)
+        entry = self._packed_banks.get(word_len)
+        if entry is None or entry[0] != signature:
+            if entry is not None:
+                # Unmap the replaced file instead of waiting for the garbage collector
+                entry[1].close()
+            entry = [signature, PackedWordBank(file_path), None]
+            self._packed_banks[word_len] = entry
+        return entry
+
+    def get_packed(self, word_len: int, file_path: Path):
+        """Returns the memory-mapped packed bank for the word length, reopening it if the file changed."""
+        return self._get_packed_entry(word_len, file_path)[1]
+
+    def get_packed_words(self, word_len: int, file_path: Path):
+        """Returns the words of the packed bank as a list, decoded once until the file changes."""
+        entry = self._get_packed_entry(word_len, file_path)
+        if entry[2] is None:
+            entry[2] = list(entry[1])
+        return entry[2]
+
+    def invalidate(self, word_len: int | None = None):
+        """Drops the cached bank for the word length, or every bank if no length is given."""
+        if word_len is None:
+            self._banks.clear()
+            packed_entries = list(self._packed_banks.values())
+            self._packed_banks.clear()
+        else:
+            self._banks.pop(word_len, None)
+            packed_entry = self._packed_banks.pop(word_len, None)
+            packed_entries = [packed_entry] if packed_entry is not None else []
+        for packed_entry in packed_entries:
+            packed_entry[1].close()
+
 
 class WordBankAPI:
     def __init__(self, word_len) -> None:
         self.word_len = word_len
         self.user_file_path = Path(f"data_layer/repository/word_bank/{self.word_len}_letter_words.json")
-        # Ensure the user file exists
-        self.user_file_path.touch(exist_ok=True)
+        self.packed_file_path = get_packed_file_path(self.word_len)
+        # Ensure the user file exists, unless the bank only ships in the packed format.
+        # Touching an existing file would bump its mtime and invalidate the cache.
+        if not self.packed_file_path.exists() and not self.user_file_path.exists():
+            self.user_file_path.touch()
+        self.cache = WordBankCache()
 
-    def get_word_bank(self):
-        """Retrieves a word bank by word length."""
-        try:
-            with self.user_file_path.open('r', encoding='utf-8') as file:
-                word_bank = json.load(file)
-        except json.JSONDecodeError:
+    def __has_json_bank(self) -> bool:
+        """Checks if the JSON word bank exists and is not empty."""
+        return self.user_file_path.exists() and self.user_file_path.stat().st_size > 0
+
+    def get_packed_word_bank(self) -> PackedWordBank | None:
+        """
+        Retrieves the packed word bank, if there is one that is up-to-date with the JSON word bank.
+        :return: PackedWordBank or None
+        """
+        if not self.packed_file_path.exists():
             return None
+        if self.__has_json_bank() and self.packed_file_path.stat().st_mtime_ns < self.user_file_path.stat().st_mtime_ns:
+            # The JSON file was edited after the conversion, the packed file is stale
+            return None
+        return self.cache.get_packed(self.word_len, self.packed_file_path)
 
-        return list(map(lambda w: w.upper(),word_bank))
+    def get_word_bank(self):
+        """Retrieves a word bank by word length, the same list until the bank changes."""
+        if not self.__has_json_bank():
+            if self.get_packed_word_bank() is not None:
+                return self.cache.get_packed_words(self.word_len, self.packed_file_path)
+        return self.cache.get_words(self.word_len, self.user_file_path)
+
+    def has_word(self, word: str) -> bool:
+        """
+        Checks if the word exists in the word bank.
+        Uses the cached hash set, which is built once per level and shared by every game,
+        and falls back to a binary search when the bank only exists in the packed format.
+        """
+        if not self.__has_json_bank():
+            packed_word_bank = self.get_packed_word_bank()
+            if packed_word_bank is not None:
+                return word in packed_word_bank
+        return word.upper() in self.cache.get_word_set(self.word_len, self.user_file_path)
 
     def get_random_word(self):
         """Retrieves a random word from the word bank."""
-        word_bank = self.get_word_bank()
+        word_bank = self.get_packed_word_bank()
         if word_bank is None:
+            word_bank = self.get_word_bank()
+        if not word_bank:
             return None
 
         random_index = randrange(len(word_bank))
@@ -31,22 +161,41 @@ class WordBankAPI:
 
     def add_word(self, word: str):
         """Adds a new word to the word bank."""
-        with self.user_file_path.open('r+', encoding='utf-8') as file:
-            try:
-                word_bank = json.load(file)
-            except json.JSONDecodeError:
-                word_bank = []
+        added, _ = self.add_words([word])
+        if added == 0:
+            raise ValueError(f"Word {word.upper()} already exists in the word bank.")
+
+    def add_words(self, words) -> tuple[int, int]:
+        """
+        Adds many words to the word bank with a single atomic write.
+        The word bank is locked while it is read and rewritten, so words added from other processes are not lost.
+        Words are upper-cased and deduplicated against the bank and against each other.
+        :param words: iterable of words of this bank's length
+        :return: (number of words added, number of duplicates skipped)
+        """
+        with file_lock(self.user_file_path):
+            word_bank = list(self.get_word_bank() or [])
+            existing_words = set(word_bank)
+            added = 0
+            skipped = 0
+            for word in words:
+                word = word.upper()
+                if word in existing_words:
+                    skipped += 1
+                    continue
+                existing_words.add(word)
+                word_bank.append(word)
+                added += 1
 
-            word_bank = list(map(lambda w: w.upper(), word_bank))
+            if added == 0:
+                return 0, skipped
 
-            # Check if the word already exists
-            if word.upper() in word_bank:
-                raise ValueError(f"Word {word.upper()} already exists in the word bank.")
+            atomic_write_json(self.user_file_path, word_bank)
 
-            # Append the new word
-            word_bank.append(word.upper())
+            # Keep the packed bank in sync with the JSON one
+            if self.packed_file_path.exists():
+                write_packed_word_bank(self.packed_file_path, self.word_len, word_bank)
 
-            # Move back to the start of the file to overwrite it
-            file.seek(0)
-            json.dump(word_bank, file, indent=4)
-            file.truncate()
+            # The file changed, make sure the next read picks up the new words
+            self.cache.invalidate(self.word_len)
+            return added, skipped
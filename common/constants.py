@@ -1,3 +1,25 @@
+import os
+
+# Storage backend for users, history and word banks: 'json' or 'sqlite'
+REPOSITORY_BACKEND = os.environ.get('WORDLE_BACKEND', 'json')
+SQLITE_DATABASE_PATH = 'data_layer/repository/wordle.db'
+# Save games from a background writer thread, set WORDLE_WRITE_BEHIND=1 to enable
+HISTORY_WRITE_BEHIND = os.environ.get('WORDLE_WRITE_BEHIND', '0') == '1'
+# When saved games are flushed to the disk: 'always' on every commit, 'interval' at most once per
+# HISTORY_FSYNC_INTERVAL seconds, 'never' leaves it to the operating system
+HISTORY_FSYNC_POLICY = os.environ.get('WORDLE_FSYNC', 'never')
+HISTORY_FSYNC_INTERVAL = 1.0
+# Maximum number of games the background writer commits at once
+HISTORY_WRITE_BATCH_SIZE = 256
+# Seconds to wait for pending games to be written before a read or when the program exits
+HISTORY_FLUSH_TIMEOUT = 10.0
+# Times the background writer retries a failed commit, and the seconds between tries, before the games
+# are moved to the recovery file
+HISTORY_WRITE_RETRIES = 3
+HISTORY_RETRY_DELAY = 0.5
+# Size of the patch log of a file derived from the history, like the leaderboard, before it is folded into the file
+SIDECAR_LOG_COMPACT_BYTES = 1024 * 1024
+
 DEFAULT_PADDING = 4
 DEFAULT_PADDING_LEFT = DEFAULT_PADDING
 DEFAULT_PADDING_RIGHT = DEFAULT_PADDING
@@ -12,7 +34,28 @@ HEADER_HEIGHT = 15
 FOOTER_HEIGHT = 5
 MAX_COLUMN_WIDTH = 40
 DEFAULT_LEVEL = 5
+MIN_WORD_LENGTH = 3
+MAX_WORD_LENGTH = 6
 DEFAULT_MAX_ATTEMPTS = 6
+DEFAULT_VALID_GUESSES_ONLY = False
+# Number of users kept on each leaderboard window
+LEADERBOARD_TOP_K = 10
+# Daily and weekly leaderboards older than this are dropped from the sidecar file
+LEADERBOARD_DAILY_RETENTION = 31
+LEADERBOARD_WEEKLY_RETENTION = 26
+# Seconds a hint may take before the best guess found so far is returned
+DEFAULT_HINT_TIME_BUDGET = 2.0
+# Number of guesses scored per task sent to the solver's process pool
+SOLVER_CHUNK_SIZE = 512
+# Feedback of a single letter, a guess is encoded as sum(feedback[i] * 3 ** i)
+FEEDBACK_ABSENT = 0
+FEEDBACK_PRESENT = 1
+FEEDBACK_CORRECT = 2
+# State of a key on the keyboard, a key only moves up to a better known state
+KEY_UNUSED = 0
+KEY_ABSENT = 1
+KEY_PRESENT = 2
+KEY_CORRECT = 3
 
 
 class bcolors:
@@ -14,9 +14,17 @@ class InvalidLetterException(Exception):
     pass
 
 
+class InvalidWordException(Exception):
+    pass
+
+
 class WordGuessedException(Exception):
     pass
 
 
 class ShouldGoBackException(Exception):
     pass
+
+
+class HistoryWriteException(Exception):
+    pass
@@ -1,3 +1,5 @@
+from typing import Callable
+
 from models.User import User
 from utils.printing import print_with_borders, print_separator_line
 
@@ -22,6 +24,8 @@ class State:
                 'losses': 0,
                 'games_played': 0
             }
+            # (user id, games played, statistics) of the logged-in user, kept for the session
+            self._user_stats = None
 
     def get_state(self, key) -> int | User:
         """Dynamically retrieves the value for the given state key."""
@@ -38,8 +42,29 @@ class State:
         """Returns a string representation of the current state."""
         return f"State: {self._state}"
 
-    def print_state(self):
-        """Prints the current state."""
+    def get_user_stats(self, load_user_stats: Callable[[str], tuple[dict | None, bool]]) -> dict | None:
+        """
+        Returns the persistent statistics of the logged-in user, kept for the session.
+        They are only loaded again when another user logs in or a game was played since,
+        or while the last load was missing games that were still being saved.
+        :param load_user_stats: loads the (statistics, complete) of a user id without blocking,
+                                e.g. HistoryService.get_user_stats_snapshot
+        """
+        user = self.get_state('user')
+        if user is None:
+            return None
+        key = (user.get_id(), self.get_state('games_played'))
+        if self._user_stats is None or self._user_stats[:2] != key:
+            stats, complete = load_user_stats(user.get_id())
+            self._user_stats = (*key, stats) if complete else None
+            return stats
+        return self._user_stats[2]
+
+    def print_state(self, load_user_stats: Callable[[str], tuple[dict | None, bool]] | None = None):
+        """
+        Prints the current state.
+        :param load_user_stats: loads the statistics of a user id, see get_user_stats, they are left out if not given
+        """
         if self.get_state('games_played') > 0:
             print_separator_line()
             print_with_borders(f"Games Played: {self.get_state('games_played')}", 'center')
@@ -47,6 +72,21 @@ class State:
             print_with_borders(f"Losses: {self.get_state('losses')}", 'center')
         if self.get_state('user') is not None:
             print_with_borders(f"User: {self.get_state('user').name} ({self.get_state('user').username})", 'center')
+            if load_user_stats is not None:
+                self.print_user_stats(self.get_user_stats(load_user_stats))
+
+    @staticmethod
+    def print_user_stats(stats: dict | None):
+        """Prints the persistent statistics of a user, see UserStats.get_user_stats."""
+        if stats is None:
+            return
+        print_with_borders(f"Win Streak: {stats['current_streak']} (Best: {stats['max_streak']})", 'center')
+        win_rates = ', '.join(
+            f"{level} letters {level_stats['wins'] / level_stats['games']:.0%}"
+            for level, level_stats in sorted(stats['levels'].items(), key=lambda item: int(item[0]))
+            if level_stats['games']
+        )
+        print_with_borders(f"Win Rate: {win_rates}", 'center')
 
     @staticmethod
     def test():
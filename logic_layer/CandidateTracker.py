@@ -0,0 +1,96 @@
+from common.constants import FEEDBACK_CORRECT, FEEDBACK_ABSENT
+from logic_layer.FeedbackEngine import FeedbackEngine
+
+ALL_LETTERS_MASK = (1 << 26) - 1
+
+
+def letter_bit(letter: str) -> int:
+    """Returns the bit of the letter in a 26-bit letter mask."""
+    return 1 << (ord(letter) - ord('A'))
+
+
+class CandidateTracker:
+    """
+    The CandidateTracker class keeps the answers that are still possible during a game.
+    Every guess narrows the constraints, a bitmask of allowed letters per position and
+    min/max counts per letter, and only the remaining candidates are checked against them.
+    """
+
+    def __init__(self, words: list[str], length: int):
+        self.__length = length
+        self.__remaining = words if words is not None else []
+        self.__allowed_letters = [ALL_LETTERS_MASK] * length
+        self.__min_counts = {}
+        self.__max_counts = {}
+
+    # GETTERS
+    def get_remaining_count(self) -> int:
+        return len(self.__remaining)
+
+    def get_remaining(self) -> list[str]:
+        return self.__remaining
+
+    def iter_remaining(self):
+        return iter(self.__remaining)
+
+    def get_allowed_letters(self) -> list[int]:
+        return self.__allowed_letters
+
+    def get_min_counts(self) -> dict:
+        return self.__min_counts
+
+    def get_max_counts(self) -> dict:
+        return self.__max_counts
+
+    def update(self, guess: str, code: int):
+        """
+        Narrows the candidates with the feedback code of a guess.
+        Only the constraints learned from this guess are checked, the remaining
+        candidates already satisfy every earlier one, so the cost is O(remaining).
+        """
+        guess = guess.upper()
+        feedback = FeedbackEngine.decode(code, self.__length)
+
+        # Letters that must or must not be at each position
+        required = [0] * self.__length
+        forbidden = [0] * self.__length
+        marked_counts = {}
+        absent_letters = set()
+        for i, (letter, letter_feedback) in enumerate(zip(guess, feedback)):
+            if letter_feedback == FEEDBACK_CORRECT:
+                required[i] = letter_bit(letter)
+                self.__allowed_letters[i] = letter_bit(letter)
+            else:
+                forbidden[i] = letter_bit(letter)
+                self.__allowed_letters[i] &= ~letter_bit(letter)
+            if letter_feedback == FEEDBACK_ABSENT:
+                absent_letters.add(letter)
+            else:
+                marked_counts[letter] = marked_counts.get(letter, 0) + 1
+
+        # Every marked copy of a letter is in the answer, an absent copy caps the count
+        min_counts = {}
+        max_counts = {}
+        for letter in set(guess):
+            marked = marked_counts.get(letter, 0)
+            if marked > 0:
+                min_counts[letter] = marked
+                self.__min_counts[letter] = max(self.__min_counts.get(letter, 0), marked)
+            if letter in absent_letters:
+                max_counts[letter] = marked
+                self.__max_counts[letter] = min(self.__max_counts.get(letter, marked), marked)
+
+        def matches(word: str) -> bool:
+            for i, letter in enumerate(word):
+                bit = letter_bit(letter)
+                if required[i] and required[i] != bit or forbidden[i] == bit:
+                    return False
+            for letter, count in min_counts.items():
+                if word.count(letter) < count:
+                    return False
+            for letter, count in max_counts.items():
+                if word.count(letter) > count:
+                    return False
+            return True
+
+        self.__remaining = [word for word in self.__remaining if matches(word)]
@@ -0,0 +1,59 @@
+from random import Random, SystemRandom
+
+from api_layer.deck_api import DeckAPI
+from logic_layer.WordBankService import WordBankService
+from models.Deck import Deck
+
+
+class DeckService:
+    """
+    The DeckService class deals answers from a shuffled deck per user and level,
+    so no answer repeats until the whole word bank has been played.
+    Decks of logged-in users are persisted, guest decks only live for the session.
+    """
+    # (seed, size) -> shuffled word indexes, shared by every game in the process
+    _permutations = {}
+    # level -> Deck of the guest user
+    _guest_decks = {}
+
+    def __init__(self, level: int):
+        self.level = level
+        self.deck_dao = DeckAPI()
+        self.word_bank_service = WordBankService(level)
+
+    @classmethod
+    def get_permutation(cls, seed: int, size: int) -> list[int]:
+        """Returns the shuffled word indexes for the seed, shuffling only on first use."""
+        key = (seed, size)
+        if key not in cls._permutations:
+            permutation = list(range(size))
+            Random(seed).shuffle(permutation)
+            cls._permutations[key] = permutation
+        return cls._permutations[key]
+
+    def __get_deck(self, user_id, size: int) -> Deck:
+        """Returns the current deck, reshuffling when it ran out or the word bank changed size."""
+        deck = self._guest_decks.get(self.level) if user_id is None else self.deck_dao.get_deck(user_id, self.level)
+        if deck is None or deck.size != size or deck.is_exhausted():
+            deck = Deck(user_id, self.level, SystemRandom().getrandbits(32), size)
+        return deck
+
+    def draw_word(self, user_id=None) -> str | None:
+        """
+        Deals the next answer from the deck of the user.
+        :param user_id: the id of the logged-in user, None for a guest
+        :return: the next word or None if the word bank is empty
+        """
+        word_bank = self.word_bank_service.get_word_bank()
+        if not word_bank:
+            return None
+
+        deck = self.__get_deck(user_id, len(word_bank))
+        word = word_bank[self.get_permutation(deck.seed, deck.size)[deck.cursor]]
+        deck.cursor += 1
+
+        if user_id is None:
+            self._guest_decks[self.level] = deck
+        else:
+            self.deck_dao.save_deck(deck)
+        return word
@@ -0,0 +1,195 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from common.constants import FEEDBACK_ABSENT, FEEDBACK_PRESENT, FEEDBACK_CORRECT, MIN_WORD_LENGTH, MAX_WORD_LENGTH
+from logic_layer.WordBankService import WordBankService
+from utils.storage import copy_file_mode
+
+# Number of matrix cells computed per vectorized step, bounds the memory used while building
+BUILD_CHUNK_CELLS = 2_000_000
+
+
+class FeedbackEngine:
+    """
+    The FeedbackEngine class computes the green/yellow/grey feedback of a guess against an answer.
+    Each feedback pattern is encoded as one base-3 integer, the digit of letter i is weighted by 3 ** i.
+    For every level it precomputes a matrix of every word in the bank guessed against every other word,
+    which is cached as a .npy file and memory-mapped on later runs.
+    """
+    directory = 'data_layer/repository/feedback'
+    # level -> (word bank, fingerprint, word index, matrix), shared by every engine in the process
+    _matrices = {}
+
+    def __init__(self, level: int):
+        self.level = level
+        self.word_bank_service = WordBankService(level)
+
+    @staticmethod
+    def encode(guess: str, answer: str) -> int:
+        """
+        Computes the feedback code of the guess against the answer.
+        Letters in the right spot are correct, the remaining letters are present
+        as many times as they are left over in the answer, all others are absent.
+        """
+        guess = guess.upper()
+        answer = answer.upper()
+        feedback = [FEEDBACK_ABSENT] * len(guess)
+        remaining = {}
+        for i, (guessed_letter, answer_letter) in enumerate(zip(guess, answer)):
+            if guessed_letter == answer_letter:
+                feedback[i] = FEEDBACK_CORRECT
+            else:
+                remaining[answer_letter] = remaining.get(answer_letter, 0) + 1
+
+        for i, guessed_letter in enumerate(guess):
+            if feedback[i] != FEEDBACK_CORRECT and remaining.get(guessed_letter, 0) > 0:
+                feedback[i] = FEEDBACK_PRESENT
+                remaining[guessed_letter] -= 1
+
+        code = 0
+        for i in reversed(range(len(feedback))):
+            code = code * 3 + feedback[i]
+        return code
+
+    @staticmethod
+    def decode(code: int, length: int) -> list[int]:
+        """Splits a feedback code into the feedback of each letter."""
+        feedback = []
+        for _ in range(length):
+            code, digit = divmod(code, 3)
+            feedback.append(digit)
+        return feedback
+
+    @staticmethod
+    def get_dtype(length: int):
+        """Returns the smallest integer type that holds every feedback code of the word length."""
+        return np.uint8 if 3 ** length <= 256 else np.uint16
+
+    @staticmethod
+    def words_to_array(words: list[str]) -> np.ndarray:
+        """Converts equally long words to a (words, letters) array of character codes."""
+        if not words:
+            return np.zeros((0, 0), dtype=np.uint8)
+        return np.frombuffer(''.join(words).encode('ascii'), dtype=np.uint8).reshape(len(words), -1)
+
+    @classmethod
+    def build_matrix(cls, guesses: list[str], answers: list[str]) -> np.ndarray:
+        """
+        Computes the feedback codes of every guess against every answer.
+        :return: (guesses, answers) matrix of feedback codes
+        """
+        guess_letters = cls.words_to_array(guesses)
+        answer_letters = cls.words_to_array(answers)
+        length = guess_letters.shape[1] if len(guesses) else 0
+        matrix = np.zeros((len(guesses), len(answers)), dtype=cls.get_dtype(length))
+        chunk_size = max(1, BUILD_CHUNK_CELLS // max(1, len(answers)))
+        weights = (3 ** np.arange(length)).astype(matrix.dtype)
+
+        for start in range(0, len(guesses), chunk_size):
+            guess_chunk = guess_letters[start:start + chunk_size]
+            # (guesses, answers, letters)
+            correct = guess_chunk[:, None, :] == answer_letters[None, :, :]
+            present = np.zeros_like(correct)
+            for i in range(length):
+                letter = guess_chunk[:, i][:, None, None]
+                # copies of the letter in the answer that are not already matched in place
+                available = ((answer_letters[None, :, :] == letter) & ~correct).sum(axis=2, dtype=np.int8)
+                # minus the copies already claimed by earlier present letters of the guess
+                for j in range(i):
+                    same_letter = (guess_chunk[:, j] == guess_chunk[:, i])[:, None]
+                    available -= same_letter & present[:, :, j]
+                present[:, :, i] = ~correct[:, :, i] & (available > 0)
+
+            feedback = correct.astype(matrix.dtype) * FEEDBACK_CORRECT + present.astype(matrix.dtype) * FEEDBACK_PRESENT
+            matrix[start:start + chunk_size] = (feedback * weights).sum(axis=2, dtype=matrix.dtype)
+
+        return matrix
+
+    @staticmethod
+    def get_fingerprint(words: list[str]) -> str:
+        """Returns a short hash of the word bank, used to tell when a cached matrix is stale."""
+        return hashlib.sha1('\n'.join(words).encode('ascii')).hexdigest()[:16]
+
+    def __get_file_path(self, fingerprint: str) -> Path:
+        return Path(self.directory) / f'{self.level}_letter_feedback_{fingerprint}.npy'
+
+    def __save_matrix(self, matrix: np.ndarray, file_path: Path):
+        """Saves the matrix atomically and removes the matrices of older word banks."""
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=file_path.parent, suffix='.tmp')
+        with os.fdopen(file_descriptor, 'wb') as file:
+            np.save(file, matrix)
+        copy_file_mode(temp_path, file_path)
+        os.replace(temp_path, file_path)
+
+        for stale_path in file_path.parent.glob(f'{self.level}_letter_feedback_*.npy'):
+            if stale_path != file_path:
+                stale_path.unlink(missing_ok=True)
+
+    def __load(self):
+        """Returns the (word bank, fingerprint, word index, matrix) entry for the level, building it if needed."""
+        word_bank = self.word_bank_service.get_word_bank() or []
+        entry = self._matrices.get(self.level)
+        # The word bank cache hands out the same list until the bank changes
+        if entry is not None and entry[0] is word_bank:
+            return entry
+
+        fingerprint = self.get_fingerprint(word_bank)
+        if entry is None or entry[1] != fingerprint:
+            file_path = self.__get_file_path(fingerprint)
+            matrix = None
+            if file_path.exists():
+                matrix = np.load(file_path, mmap_mode='r')
+                if matrix.shape != (len(word_bank), len(word_bank)):
+                    matrix = None
+            if matrix is None:
+                self.__save_matrix(self.build_matrix(word_bank, word_bank), file_path)
+                matrix = np.load(file_path, mmap_mode='r')
+            index = {word: i for i, word in enumerate(word_bank)}
+        else:
+            index, matrix = entry[2], entry[3]
+
+        entry = (word_bank, fingerprint, index, matrix)
+        self._matrices[self.level] = entry
+        return entry
+
+    def is_matrix_ready(self) -> bool:
+        """Checks if the matrix of the current word bank is built, so loading it will not compute it."""
+        word_bank = self.word_bank_service.get_word_bank() or []
+        entry = self._matrices.get(self.level)
+        if entry is not None and entry[0] is word_bank:
+            return True
+        return self.__get_file_path(self.get_fingerprint(word_bank)).exists()
+
+    def get_words(self) -> list[str]:
+        """Returns the words in the order of the matrix rows and columns."""
+        return self.__load()[0]
+
+    def get_word_index(self) -> dict:
+        """Returns the mapping from word to its matrix row and column."""
+        return self.__load()[2]
+
+    def get_matrix(self) -> np.ndarray:
+        """Returns the memory-mapped (guesses, answers) matrix of feedback codes."""
+        return self.__load()[3]
+
+    def get_pattern(self, guess: str, answer: str) -> int:
+        """Returns the feedback code of the guess against the answer."""
+        _, _, index, matrix = self.__load()
+        guess_index = index.get(guess.upper())
+        answer_index = index.get(answer.upper())
+        if guess_index is None or answer_index is None:
+            # Words outside of the bank are not in the matrix
+            return self.encode(guess, answer)
+        return int(matrix[guess_index, answer_index])
+
+
+if __name__ == '__main__':
+    # Usage: python -m logic_layer.FeedbackEngine, precomputes the matrices of every level
+    for word_len in range(MIN_WORD_LENGTH, MAX_WORD_LENGTH + 1):
+        feedback_matrix = FeedbackEngine(word_len).get_matrix()
+        print(f"{word_len} letter words: {feedback_matrix.shape[0]}x{feedback_matrix.shape[1]} feedback matrix ready")
@@ -1,6 +1,10 @@
-from common.constants import bcolors
-from common.exceptions import WordUsedException, InvalidWordLengthException, InvalidLetterException
+from common.constants import KEY_UNUSED
+from common.exceptions import WordUsedException, InvalidWordLengthException, InvalidLetterException, \
+    InvalidWordException
 from common.state import State
+from logic_layer.CandidateTracker import CandidateTracker
+from logic_layer.DeckService import DeckService
+from logic_layer.FeedbackEngine import FeedbackEngine
 from logic_layer.HistoryService import HistoryService
 from logic_layer.WordBankService import WordBankService
 from models.History import History
@@ -8,18 +12,23 @@ from utils.helpers import calculate_score
 
 
 class Game:
-    def __init__(self, level: int = 5, max_attempts: int = 6):
+    def __init__(self, level: int = 5, max_attempts: int = 6, valid_guesses_only: bool = False,
+                 answer: str | None = None):
         self.__chosen_level = level
+        self.__valid_guesses_only = valid_guesses_only
         self.__word_bank_service = WordBankService(level)
         self.__history_service = HistoryService()
+        self.__deck_service = DeckService(level)
         self.__word_bank = self.__word_bank_service.get_word_bank()
-        self.__used_words_from_bank = []
         self.__used_words = []
-        self.__used_letters = {}
-        self.__current_word = self.select_random_word()
+        self.__used_words_set = set()
+        # A fixed answer is used to replay games headless, without dealing from the user's deck
+        self.__current_word = answer.upper() if answer is not None else self.select_random_word()
         self.__max_attempts = max_attempts
         self.__guesses = 0
-        self.__word_guesses_positions = []
+        self.__feedback_codes = []
+        self.__keyboard_state = bytearray([KEY_UNUSED] * 26)
+        self.__candidates = CandidateTracker(self.__word_bank, level)
 
     # GETTERS
     def get_level(self) -> int:
@@ -31,20 +40,29 @@ class Game:
     def get_max_attempts(self) -> int:
         return self.__max_attempts
 
+    def is_valid_guesses_only(self) -> bool:
+        return self.__valid_guesses_only
+
     def get_guesses(self):
         return self.__guesses
 
     def get_used_words(self):
         return self.__used_words
 
-    def get_word_guesses_positions(self):
-        return self.__word_guesses_positions
+    def get_feedback_codes(self) -> list[int]:
+        return self.__feedback_codes
+
+    def get_keyboard_state(self) -> bytearray:
+        return self.__keyboard_state
+
+    def get_remaining_candidates_count(self) -> int:
+        return self.__candidates.get_remaining_count()
 
-    def get_used_letters(self):
-        return self.__used_letters
+    def iter_remaining_candidates(self):
+        return self.__candidates.iter_remaining()
 
-    def is_letter_used(self, letter: str) -> tuple:
-        return self.__used_letters[letter.upper()] if letter.upper() in self.__used_letters else (None, None)
+    def get_candidate_tracker(self) -> CandidateTracker:
+        return self.__candidates
 
     # SETTERS
     def update_guesses(self):
@@ -52,29 +70,35 @@ class Game:
 
     def update_used_words(self, letter):
         self.__used_words.append(letter)
+        self.__used_words_set.add(letter)
 
     def __validate_word(self, word: str):
         """Validate the word."""
 
         # Check if word is already used
-        if word in self.__used_words:
+        if word in self.__used_words_set:
             raise WordUsedException
 
         # Check if word is correct length
         if len(word) != self.__chosen_level:
             raise InvalidWordLengthException
 
-        # Check if each letter is valid character (a-z)
+        # Check if each letter is valid character (a-z), letters like É have no key on the keyboard
         for letter in word:
-            if not letter.isalpha():
+            if not ('A' <= letter <= 'Z' or 'a' <= letter <= 'z'):
                 raise InvalidLetterException
 
-    def save_game(self, result: str = 'win'):
-        """Save the to the history."""
+        # Check if the word is in the word bank, the lookup is a shared hash set per level
+        if self.__valid_guesses_only and not self.__word_bank_service.has_word(word):
+            raise InvalidWordException
+
+    def save_game(self, result: str = 'win', user_id=None):
+        """Save the to the history, for the given user or the logged-in one."""
         game_state = State()
-        if game_state.get_state('user') is not None:
-            score = calculate_score(self.get_level(), result, self.get_max_attempts(), self.get_guesses())
+        if user_id is None and game_state.get_state('user') is not None:
             user_id = game_state.get_state('user').uuid
+        if user_id is not None:
+            score = calculate_score(self.get_level(), result, self.get_max_attempts(), self.get_guesses())
             history = History(None, user_id, self.get_current_word(), result, self.get_guesses(), score)
             self.__history_service.add_history(history)
 
@@ -83,50 +107,27 @@ class Game:
         self.__validate_word(word)
         self.update_guesses()
         self.update_used_words(word)
-        self.get_letter_positions(word)
+        self.__candidates.update(word, self.record_feedback(word))
         if word == self.__current_word:
             return True
         return False
 
-    def get_letter_positions(self, word: str):
-        """Get the positions of the letters in the word."""
-        correct_positions = list(self.__current_word)
-        guessed_positions = list(word)
-        result = [bcolors.WHITE] * len(correct_positions)
-
-        # First check for correct positions
-        for i in range(len(correct_positions)):
-            letter = guessed_positions[i].upper()
-            if letter not in self.__used_letters:
-                self.__used_letters[letter] = (False, False)
-            if correct_positions[i] == guessed_positions[i]:
-                result[i] = bcolors.OKGREEN
-                correct_positions[i] = None
-                self.__used_letters[letter] = (True, False)
-
-        # Then check for correct letters in wrong positions
-        for i in range(len(correct_positions)):
-            letter = guessed_positions[i].upper()
-            if guessed_positions[i] in correct_positions:
-                result[i] = bcolors.WARNING
-                correct_positions[correct_positions.index(guessed_positions[i])] = None
-                self.__used_letters[letter] = (self.__used_letters[letter][0], True)
-            elif result[i] != bcolors.OKGREEN:
-                result[i] = bcolors.FAIL
-
-        self.__word_guesses_positions.append(result)
+    def record_feedback(self, word: str) -> int:
+        """
+        Compute the feedback code of the word, store it and update the keyboard state.
+        :return: the feedback code, see FeedbackEngine.encode
+        """
+        code = FeedbackEngine.encode(word, self.__current_word)
+        self.__feedback_codes.append(code)
 
-    def select_random_word(self):
-        """Selects a random word from the word bank."""
-        random_word = self.__word_bank_service.get_random_word()
-
-        # If the random word is already used, get a new random word
-        if random_word in self.__used_words_from_bank:
-            return self.select_random_word()
+        for letter, letter_feedback in zip(word.upper(), FeedbackEngine.decode(code, len(word))):
+            key = ord(letter) - ord('A')
+            # Feedback values map onto the key states shifted by one
+            self.__keyboard_state[key] = max(self.__keyboard_state[key], letter_feedback + 1)
+        return code
 
-        self.__current_word = self.__word_bank_service.get_random_word()
-        self.__used_words_from_bank.append(self.__current_word)
+    def select_random_word(self):
+        """Deals the next word from the user's deck, so answers never repeat until the deck runs out."""
+        user = State().get_state('user')
+        self.__current_word = self.__deck_service.draw_word(user.uuid if user is not None else None)
         return self.__current_word
-
-
-
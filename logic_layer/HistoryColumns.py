@@ -0,0 +1,202 @@
+import threading
+from array import array
+from uuid import UUID
+
+import numpy as np
+
+from models.History import History
+
+# Codes of the result column
+RESULT_LOSE = 0
+RESULT_WIN = 1
+# Keys the aggregates can be grouped by
+GROUP_KEYS = ['user', 'word', 'level']
+
+
+class HistoryColumns:
+    """
+    The HistoryColumns class keeps the history in memory as columns instead of one History object per game.
+    Numbers live in typed arrays, game ids as 16 raw bytes, and user ids and words are interned and stored
+    as integer codes, about 45 bytes per game. Aggregates are vectorized with NumPy, and History objects
+    are only created for the rows that are asked for.
+    """
+    # (history version, HistoryColumns) of the history loaded last, shared by every service
+    _cached = None
+
+    def __init__(self):
+        self.__lock = threading.RLock()
+        self.__uuids = bytearray()
+        self.__user_codes = array('i')
+        self.__word_codes = array('i')
+        self.__results = array('b')
+        self.__guesses = array('h')
+        self.__scores = array('d')
+        self.__timestamps = array('q')
+        # Interned values, code -> value and value -> code
+        self.__users = []
+        self.__user_index = {}
+        self.__words = []
+        self.__word_index = {}
+        # Game ids that are not UUIDs, by row
+        self.__other_uuids = {}
+
+    def __len__(self) -> int:
+        return len(self.__scores)
+
+    @staticmethod
+    def __intern(values: list, index: dict, value: str) -> int:
+        """Returns the code of the value, adding it on first sight."""
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(values)
+            values.append(value)
+        return code
+
+    def append(self, game: dict):
+        """Adds a raw history record, like the ones stored in the history files."""
+        with self.__lock:
+            try:
+                self.__uuids += UUID(str(game['uuid'])).bytes
+            except ValueError:
+                self.__other_uuids[len(self)] = str(game['uuid'])
+                self.__uuids += bytes(16)
+            self.__user_codes.append(self.__intern(self.__users, self.__user_index, str(game['user_id'])))
+            self.__word_codes.append(self.__intern(self.__words, self.__word_index, game['word']))
+            self.__results.append(RESULT_WIN if game['result'] == 'win' else RESULT_LOSE)
+            self.__guesses.append(game['guesses'])
+            self.__scores.append(game['score'])
+            self.__timestamps.append(game['timestamp'])
+
+    @classmethod
+    def from_records(cls, games) -> 'HistoryColumns':
+        """Builds the columns from raw history records in one streaming pass."""
+        columns = cls()
+        for game in games:
+            columns.append(game)
+        return columns
+
+    @classmethod
+    def load(cls, history_dao) -> 'HistoryColumns':
+        """Returns the columns of the whole history, reading it again only when it changed since the last load."""
+        version = history_dao.get_version()
+        cached = cls._cached
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        columns = cls.from_records(history_dao.iter_records())
+        cls._cached = (version, columns)
+        return columns
+
+    @classmethod
+    def record_games(cls, games: list[History], version_before: int, version_after: int):
+        """
+        Adds games that were just saved to the loaded columns, so they do not have to be read again.
+        :param version_before: history version before the games were saved
+        :param version_after: history version after the games were saved
+        """
+        cached = cls._cached
+        if cached is None:
+            return
+        if cached[0] != version_before:
+            # Games were saved elsewhere, the next load reads the history again
+            cls._cached = None
+            return
+        for game in games:
+            cached[1].append(game.get_json_format())
+        cls._cached = (version_after, cached[1])
+
+    def get_history(self, row: int) -> History:
+        """Creates the History object of a single row."""
+        with self.__lock:
+            uuid = self.__other_uuids.get(row)
+            if uuid is None:
+                uuid = str(UUID(bytes=bytes(self.__uuids[row * 16:row * 16 + 16])))
+            return History(
+                uuid,
+                self.__users[self.__user_codes[row]],
+                self.__words[self.__word_codes[row]],
+                'win' if self.__results[row] == RESULT_WIN else 'lose',
+                self.__guesses[row],
+                # Scores are stored as floats, whole ones were saved as ints
+                int(score) if (score := self.__scores[row]).is_integer() else score,
+                self.__timestamps[row]
+            )
+
+    def iter_history(self, rows=None):
+        """Lazily yields the History objects of the rows, every row if none are given."""
+        for row in range(len(self)) if rows is None else rows:
+            yield self.get_history(int(row))
+
+    def get_users(self) -> list[str]:
+        """Returns the interned user ids, the index of each is its code in the user column."""
+        return list(self.__users)
+
+    def get_words(self) -> list[str]:
+        """Returns the interned words, the index of each is its code in the word column."""
+        return list(self.__words)
+
+    def get_column(self, name: str) -> np.ndarray:
+        """
+        Returns a copy of a column as a NumPy array.
+        :param name: 'user', 'word', 'result', 'guesses', 'score' or 'timestamp', user and word hold the codes
+        """
+        columns = {
+            'user': (self.__user_codes, np.intc),
+            'word': (self.__word_codes, np.intc),
+            'result': (self.__results, np.byte),
+            'guesses': (self.__guesses, np.short),
+            'score': (self.__scores, np.float64),
+            'timestamp': (self.__timestamps, np.int64),
+        }
+        if name not in columns:
+            raise ValueError(f"Unknown history column {name}, use one of {sorted(columns)}.")
+        values, dtype = columns[name]
+        with self.__lock:
+            # Copied, a view would keep the array from growing
+            return np.array(np.frombuffer(values, dtype=dtype)) if len(values) else np.zeros(0, dtype=dtype)
+
+    def group_by(self, key: str = 'user') -> dict:
+        """
+        Aggregates the games per user, word or level (word length) in a few vectorized passes.
+        :param key: 'user', 'word' or 'level'
+        :return: dict of user id, word or level -> {'count', 'wins', 'max', 'mean', 'mean_guesses'}
+        """
+        if key not in GROUP_KEYS:
+            raise ValueError(f"Unknown group key {key}, use one of {GROUP_KEYS}.")
+        with self.__lock:
+            if key == 'user':
+                codes = self.get_column('user')
+                labels = list(self.__users)
+            else:
+                codes = self.get_column('word')
+                labels = list(self.__words)
+            scores = self.get_column('score')
+            results = self.get_column('result')
+            guesses = self.get_column('guesses')
+        if key == 'level':
+            # Map word codes to levels, the labels become the distinct word lengths
+            word_levels = np.array([len(word) for word in labels], dtype=np.intc)
+            levels = np.unique(word_levels)
+            codes = np.searchsorted(levels, word_levels[codes]) if len(codes) else codes
+            labels = [int(level) for level in levels]
+        if not len(codes):
+            return {}
+
+        groups = len(labels)
+        counts = np.bincount(codes, minlength=groups)
+        wins = np.bincount(codes, weights=results, minlength=groups)
+        totals = np.bincount(codes, weights=scores, minlength=groups)
+        guess_totals = np.bincount(codes, weights=guesses, minlength=groups)
+        maxes = np.full(groups, -np.inf)
+        np.maximum.at(maxes, codes, scores)
+
+        aggregates = {}
+        for code in np.flatnonzero(counts):
+            count = int(counts[code])
+            aggregates[labels[code]] = {
+                'count': count,
+                'wins': int(wins[code]),
+                'max': float(maxes[code]),
+                'mean': float(totals[code] / count),
+                'mean_guesses': float(guess_totals[code] / count),
+            }
+        return aggregates
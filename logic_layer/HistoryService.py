@@ -1,54 +1,234 @@
-from api_layer.history_api import *
-from models import History
+import json
+import os
+import time
+from pathlib import Path
+
+from api_layer.history_api import HistoryAPI
+from api_layer.sqlite_history_api import SQLiteHistoryAPI
+from common.constants import REPOSITORY_BACKEND, HISTORY_WRITE_BEHIND, HISTORY_FSYNC_POLICY, HISTORY_FSYNC_INTERVAL, \
+    HISTORY_FLUSH_TIMEOUT
+from logic_layer.HistoryColumns import HistoryColumns
+from logic_layer.HistoryWriter import HistoryWriter
+from logic_layer.Leaderboard import Leaderboard
+from logic_layer.UserStats import UserStats
+from logic_layer.WordAnalytics import WordAnalytics
+from models.History import History
 from utils.helpers import format_date
+from utils.storage import file_lock
 
 
 class HistoryService:
     """
     The HistoryService class is responsible for handling the game history.
-    It uses the HistoryAPI class to interact with the history file.
+    It uses the HistoryAPI class to interact with the history file,
+    or the SQLiteHistoryAPI class when the SQLite backend is selected.
+    With HISTORY_WRITE_BEHIND games are saved by a background HistoryWriter, and every read waits for
+    the pending games first, up to HISTORY_FLUSH_TIMEOUT, so the caller sees its own games.
+    Games the writer fails to save go to a recovery file and are saved again when the next writer starts.
     """
+    _writer = None
+    _last_fsync = 0.0
+
     def __init__(self):
-        self.history_dao = HistoryAPI()
+        self.history_dao = SQLiteHistoryAPI() if REPOSITORY_BACKEND == 'sqlite' else HistoryAPI()
+        self.leaderboard = Leaderboard(self.history_dao)
+        self.user_stats = UserStats(self.history_dao)
+        self.word_analytics = WordAnalytics(self.history_dao)
 
     def get_history(self):
         """Retrieves the game history."""
+        self.flush()
         return self.history_dao.get_history()
 
-    def get_user_history(self, user_id):
-        """Retrieves the game history for a specific user."""
-        return self.history_dao.get_history(user_id)
+    def get_history_between(self, start: int | None = None, end: int | None = None, user_id=None):
+        """
+        Retrieves the games played between two timestamps, both included.
+        Only the history segments overlapping the range are read.
+        :param start: earliest epoch timestamp, None for no lower bound
+        :param end: latest epoch timestamp, None for no upper bound
+        :return: a lazy iterator of History, oldest first
+        """
+        self.flush()
+        return self.history_dao.iter_history(user_id, start, end)
+
+    def get_user_history(self, user_id, limit: int | None = None, offset: int = 0):
+        """
+        Retrieves the game history for a specific user, newest first.
+        :return: a lazy iterator of History, paged with limit and offset
+        """
+        self.flush()
+        return self.history_dao.iter_user_history(user_id, limit, offset)
+
+    def get_history_columns(self) -> HistoryColumns:
+        """
+        Retrieves the whole history as columns, for aggregates that the materialized ones do not cover.
+        The columns stay in memory and are only read again when games were saved by another process.
+        """
+        self.flush()
+        return HistoryColumns.load(self.history_dao)
+
+    def get_user_aggregates(self) -> dict:
+        """
+        Retrieves the materialized score aggregates of every user.
+        :return: dict of user id -> {'best', 'total', 'count', 'best_game', 'best_timestamp'}
+        """
+        self.flush()
+        return self.leaderboard.get_user_aggregates()
+
+    def get_user_stats(self, user_id) -> dict | None:
+        """
+        Retrieves the persistent statistics of a user: win streaks, and games, wins and guess distribution per level.
+        :return: dict, None if the user has not played yet
+        """
+        self.flush()
+        return self.user_stats.get_user_stats(user_id)
+
+    def get_user_stats_snapshot(self, user_id) -> tuple[dict | None, bool]:
+        """
+        Retrieves the statistics of a user like get_user_stats, without waiting for the background writer,
+        for status panels that must not block on a game that was just saved.
+        :return: (statistics, complete), complete is False while games are still waiting to be saved
+        """
+        writer = self._writer
+        complete = writer is None or writer.get_queue_depth() == 0
+        return self.user_stats.get_user_stats(user_id), complete
+
+    def get_word_analytics(self) -> dict:
+        """
+        Retrieves the cached play statistics of every answer and level, see WordAnalytics.get_word_rows
+        to sort and filter them.
+        :return: dict with 'words': word -> stats and 'levels': level -> stats
+        """
+        self.flush()
+        return self.word_analytics.get_report()
+
+    def get_top_scores(self, window: str = 'all', bucket: str | int | None = None) -> list:
+        """
+        Retrieves the top users of a leaderboard window.
+        :param window: 'all', 'daily', 'weekly' or 'level'
+        :param bucket: the day ('YYYY-MM-DD'), week ('YYYY-Www') or level, defaults to the current day or week
+        :return: list of (user id, aggregate) pairs, best first
+        """
+        self.flush()
+        return self.leaderboard.get_top(window, bucket)
 
     def get_highest_score_for_each_user(self):
         """
-        Retrieves the highest score for each user.
+        Retrieves the highest score for each user, read from the materialized aggregates.
         :return: list[dict]
         """
-        history = self.get_history()
-        user_scores = {}
-        for game in history:
-            user_id = game.user_id
-            score = game.score
-            if user_id not in user_scores or score > user_scores[user_id]['score']:
-                user_scores[user_id] = {
-                    'score': score,
-                    'game': game.uuid,
-                    'timestamp': game.timestamp
-                }
-
-        highest_scores = []
-        for user_id, data in user_scores.items():
-            highest_scores.append({
+        return [
+            {
                 'user_id': user_id,
-                'score': data['score'],
-                'game': data['game'],
-                'timestamp': format_date(data['timestamp'])
-            })
+                'score': aggregate['best'],
+                'game': aggregate['best_game'],
+                'timestamp': format_date(aggregate['best_timestamp'])
+            }
+            for user_id, aggregate in self.get_user_aggregates().items()
+        ]
+
+    @classmethod
+    def get_writer(cls) -> HistoryWriter | None:
+        """Returns the background writer shared by every service, None if games are saved synchronously."""
+        if HISTORY_WRITE_BEHIND and cls._writer is None:
+            history_service = HistoryService()
+            history_service.replay_recovered_histories()
+            cls._writer = HistoryWriter(history_service.commit_histories, recover=cls.save_recovered_histories)
+        return cls._writer
+
+    @staticmethod
+    def save_recovered_histories(histories: list[History]):
+        """Appends games that could not be saved to the recovery file, see replay_recovered_histories."""
+        recovery_file_path = Path(History.recovery_file_path)
+        with file_lock(recovery_file_path), recovery_file_path.open('a', encoding='utf-8') as file:
+            file.writelines(json.dumps(history.get_json_format()) + '\n' for history in histories)
+            file.flush()
+            os.fsync(file.fileno())
 
-        return highest_scores
+    def replay_recovered_histories(self) -> int:
+        """
+        Saves the games of the recovery file to the history and removes the file.
+        :return: number of saved games
+        """
+        recovery_file_path = Path(History.recovery_file_path)
+        if not recovery_file_path.exists():
+            return 0
+        with file_lock(recovery_file_path):
+            try:
+                with recovery_file_path.open('r', encoding='utf-8') as file:
+                    games = [json.loads(line) for line in file if line.endswith('\n')]
+            except FileNotFoundError:
+                # Another process replayed it while this one waited for the lock
+                return 0
+            histories = [History(game['uuid'], game['user_id'], game['word'], game['result'], game['guesses'],
+                                 game['score'], game['timestamp']) for game in games]
+            if histories:
+                # A game may have been written before its commit failed
+                self.commit_histories(histories, retry=True)
+            recovery_file_path.unlink()
+        return len(histories)
+
+    def flush(self, timeout: float | None = HISTORY_FLUSH_TIMEOUT) -> bool:
+        """
+        Waits until the games queued on the background writer are saved.
+        :param timeout: seconds to wait at most, None to wait until they are
+        :return: False if the timeout ran out first, the read then goes ahead without the pending games
+        :raises HistoryWriteException: if the writer gave up on games since the last flush
+        """
+        writer = self._writer
+        return writer.flush(timeout) if writer is not None else True
+
+    def get_writer_metrics(self) -> dict | None:
+        """Returns the queue depth and commit latency metrics of the background writer, None if it is not used."""
+        writer = self.get_writer()
+        return writer.get_metrics() if writer is not None else None
+
+    def __should_fsync(self) -> bool:
+        """Tells if this commit should flush the history to the disk, following HISTORY_FSYNC_POLICY."""
+        if HISTORY_FSYNC_POLICY == 'always':
+            return True
+        if HISTORY_FSYNC_POLICY == 'interval' and time.monotonic() - HistoryService._last_fsync >= HISTORY_FSYNC_INTERVAL:
+            HistoryService._last_fsync = time.monotonic()
+            return True
+        return False
+
+    def __get_unsaved(self, histories: list[History]) -> list[History]:
+        """Returns the games that are not in the history yet, looked up by uuid among the games of their time range."""
+        uuids = {str(history.uuid) for history in histories}
+        timestamps = [history.timestamp for history in histories]
+        saved = {str(game['uuid']) for game in self.history_dao.iter_records(min(timestamps), max(timestamps))
+                 if str(game['uuid']) in uuids}
+        return [history for history in histories if str(history.uuid) not in saved]
+
+    def commit_histories(self, histories: list[History], retry: bool = False):
+        """
+        Saves game results to the history as one group commit and updates the data derived from it.
+        The history stays locked throughout, so saves from other processes cannot slip in between.
+        Only saving the games can fail the commit. Once they are saved, data derived from them that fails to
+        update stays behind the history version and is rebuilt on its next read, so a retry never saves a game twice.
+        :param retry: the games were committed before and may be partly saved, those are skipped
+        """
+        with self.history_dao.lock():
+            if retry:
+                histories = self.__get_unsaved(histories)
+                if not histories:
+                    return
+            version_before = self.history_dao.get_version()
+            self.history_dao.add_histories(histories, self.__should_fsync())
+            version_after = self.history_dao.get_version()
+            for derived in [self.leaderboard, self.user_stats, self.word_analytics, HistoryColumns]:
+                try:
+                    derived.record_games(histories, version_before, version_after)
+                except Exception:
+                    # Left at the old version, the next read rebuilds it from the history and reports any error
+                    continue
 
     def add_history(self, history: History):
-        """Adds a game result to the history."""
+        """Adds a game result to the history, in the background when the write-behind writer is enabled."""
         if not (history, History.__class__):
             raise ValueError("The history must be an instance of the History class.")
-        self.history_dao.add_history(history)
+        writer = self.get_writer()
+        if writer is not None:
+            writer.submit(history)
+        else:
+            self.commit_histories([history])
@@ -0,0 +1,177 @@
+import atexit
+import queue
+import sys
+import threading
+import time
+
+from common.constants import HISTORY_WRITE_BATCH_SIZE, HISTORY_FLUSH_TIMEOUT, HISTORY_WRITE_RETRIES, \
+    HISTORY_RETRY_DELAY
+from common.exceptions import HistoryWriteException
+
+# Put on the queue to stop the writer thread
+_STOP = object()
+
+
+class HistoryWriter:
+    """
+    The HistoryWriter class saves games from a background thread, so the caller never waits on the disk.
+    Every game queued while a commit is running goes into the next one, so under load many games
+    share a single write. Pending games are written when the program exits, also after Ctrl+C.
+    A commit that keeps failing is given up after HISTORY_WRITE_RETRIES retries, its games are handed
+    to the recover callable and the error is raised by the next flush.
+    """
+
+    def __init__(self, commit, batch_size: int = HISTORY_WRITE_BATCH_SIZE, recover=None):
+        """
+        :param commit: callable that saves a list of games, called from the writer thread.
+                       Retries pass retry=True, games saved by the failed try must then be skipped
+        :param batch_size: maximum number of games per commit
+        :param recover: callable that keeps a list of games that could not be saved, e.g. in a recovery file
+        """
+        self.__commit = commit
+        self.__batch_size = batch_size
+        self.__recover = recover
+        # Error of the last batch that was given up, raised by the next flush
+        self.__error = None
+        self.__queue = queue.Queue()
+        self.__condition = threading.Condition()
+        # Games queued but not committed yet
+        self.__pending = 0
+        self.__metrics = {
+            'commits': 0,
+            'committed': 0,
+            'errors': 0,
+            'failed': 0,
+            'recovered': 0,
+            'last_error': None,
+            'last_commit_latency': 0.0,
+            'max_commit_latency': 0.0,
+            'total_commit_latency': 0.0,
+        }
+        self.__thread = threading.Thread(target=self.__run, name='history-writer', daemon=True)
+        self.__thread.start()
+        atexit.register(self.close)
+
+    def submit(self, game):
+        """Queues a game to be saved, returns right away."""
+        with self.__condition:
+            self.__pending += 1
+        self.__queue.put(game)
+
+    def __next_batch(self) -> tuple[list, bool]:
+        """Waits for a game, then takes every other queued game up to the batch size. Returns (batch, stop)."""
+        game = self.__queue.get()
+        if game is _STOP:
+            return [], True
+        batch = [game]
+        while len(batch) < self.__batch_size:
+            try:
+                game = self.__queue.get_nowait()
+            except queue.Empty:
+                break
+            if game is _STOP:
+                return batch, True
+            batch.append(game)
+        return batch, False
+
+    def __give_up(self, batch: list, error: Exception):
+        """Hands games that could not be saved to the recover callable and keeps the error for the next flush."""
+        recovered = False
+        if self.__recover is not None:
+            try:
+                self.__recover(batch)
+                recovered = True
+            except Exception as recover_error:
+                error = recover_error
+        message = f"{len(batch)} games could not be saved" + \
+                  (", they are kept in the recovery file" if recovered else ", they are lost") + f": {error!r}"
+        with self.__condition:
+            self.__metrics['failed'] += len(batch)
+            self.__metrics['recovered'] += len(batch) if recovered else 0
+            self.__error = HistoryWriteException(message)
+            self.__error.__cause__ = error
+            self.__pending -= len(batch)
+            self.__condition.notify_all()
+
+    def __run(self):
+        stop = False
+        while not stop:
+            batch, stop = self.__next_batch()
+            for attempt in range(HISTORY_WRITE_RETRIES + 1):
+                started = time.perf_counter()
+                try:
+                    self.__commit(batch, retry=attempt > 0)
+                except Exception as error:
+                    with self.__condition:
+                        self.__metrics['errors'] += 1
+                        self.__metrics['last_error'] = repr(error)
+                    if attempt == HISTORY_WRITE_RETRIES:
+                        self.__give_up(batch, error)
+                    else:
+                        # Keep the games and try again, they are not lost to a transient error
+                        time.sleep(HISTORY_RETRY_DELAY)
+                    continue
+                latency = time.perf_counter() - started
+                with self.__condition:
+                    self.__metrics['commits'] += 1
+                    self.__metrics['committed'] += len(batch)
+                    self.__metrics['last_commit_latency'] = latency
+                    self.__metrics['max_commit_latency'] = max(self.__metrics['max_commit_latency'], latency)
+                    self.__metrics['total_commit_latency'] += latency
+                    self.__pending -= len(batch)
+                    self.__condition.notify_all()
+                break
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Waits until every queued game is saved or given up.
+        :return: False if the timeout ran out first
+        :raises HistoryWriteException: if games were given up since the last flush
+        """
+        with self.__condition:
+            flushed = self.__condition.wait_for(lambda: self.__pending == 0, timeout)
+            error, self.__error = self.__error, None
+        if error is not None:
+            raise error
+        return flushed
+
+    def close(self, timeout: float = HISTORY_FLUSH_TIMEOUT):
+        """
+        Writes the pending games and stops the writer thread.
+        Games still queued when the timeout runs out are handed to the recover callable.
+        """
+        if not self.__thread.is_alive():
+            return
+        self.__queue.put(_STOP)
+        self.__thread.join(timeout)
+        if not self.__thread.is_alive():
+            return
+        left = []
+        while True:
+            try:
+                game = self.__queue.get_nowait()
+            except queue.Empty:
+                break
+            if game is not _STOP:
+                left.append(game)
+        if left:
+            self.__give_up(left, TimeoutError(f"the history was not written within {timeout} seconds"))
+            print(f"History writer: {self.__error}", file=sys.stderr)
+
+    def get_queue_depth(self) -> int:
+        """Returns the number of games waiting to be saved."""
+        with self.__condition:
+            return self.__pending
+
+    def get_metrics(self) -> dict:
+        """
+        Returns the writer metrics: queue depth, number of commits and committed games, errors,
+        games given up and the ones of those kept by the recover callable,
+        and the last, mean and max commit latency in seconds.
+        """
+        with self.__condition:
+            metrics = dict(self.__metrics)
+            metrics['queue_depth'] = self.__pending
+        total_latency = metrics.pop('total_commit_latency')
+        metrics['mean_commit_latency'] = total_latency / metrics['commits'] if metrics['commits'] else 0.0
+        return metrics
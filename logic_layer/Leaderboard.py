@@ -0,0 +1,258 @@
+import time
+from datetime import date
+
+from api_layer.leaderboard_api import LeaderboardAPI
+from common.constants import LEADERBOARD_TOP_K, LEADERBOARD_DAILY_RETENTION, LEADERBOARD_WEEKLY_RETENTION
+from models.History import History
+from utils.helpers import format_date, get_time_buckets
+
+WINDOWS = ['all', 'daily', 'weekly', 'level']
+# Stored in the sidecar file, an older format is rebuilt
+LEADERBOARD_FORMAT = 3
+
+
+class Leaderboard:
+    """
+    The Leaderboard class keeps per-user score aggregates (best, total, count) materialized in a sidecar file.
+    Besides the all-time aggregates it keeps daily, weekly and per-level buckets, each with its
+    top-K users by best score. Buckets only keep the aggregates of their top-K users, so the sidecar
+    does not grow with users times buckets. A user entering the top of a bucket has their aggregate
+    read back from their own games in the history, found through the per-user index.
+    Every saved game updates them in O(K) and appends the changed entries to the patch log of the
+    sidecar, and reading any window only returns a stored top-K list.
+    They are only rebuilt from the history when missing or stale.
+    """
+
+    def __init__(self, history_dao):
+        self.history_dao = history_dao
+        self.leaderboard_dao = LeaderboardAPI()
+
+    @staticmethod
+    def __update_top(top: list, user_id: str, best: float):
+        """
+        Updates a top-K list of [user id, best score] pairs with a user's new best score.
+        Best scores only ever go up, so a user outside of the list can only come back by beating its last entry.
+        """
+        for entry in top:
+            if entry[0] == user_id:
+                entry[1] = best
+                break
+        else:
+            if len(top) >= LEADERBOARD_TOP_K and best <= top[-1][1]:
+                return
+            top.append([user_id, best])
+        top.sort(key=lambda entry: entry[1], reverse=True)
+        del top[LEADERBOARD_TOP_K:]
+
+    @staticmethod
+    def __new_aggregate(game: History) -> dict:
+        return {
+            'best': game.score,
+            'total': 0,
+            'count': 0,
+            'best_game': str(game.uuid),
+            'best_timestamp': game.timestamp,
+        }
+
+    @classmethod
+    def __fold(cls, aggregate: dict, game: History):
+        """Folds a single game into a user aggregate."""
+        aggregate['total'] += game.score
+        aggregate['count'] += 1
+        if game.score > aggregate['best']:
+            aggregate['best'] = game.score
+            aggregate['best_game'] = str(game.uuid)
+            aggregate['best_timestamp'] = game.timestamp
+
+    @classmethod
+    def __add_to_bucket(cls, bucket: dict, game: History, path: tuple, touched: set, lookup=None):
+        """
+        Folds a single game into the per-user aggregates of a bucket and its top-K list.
+        :param path: keys of the bucket in the leaderboard
+        :param touched: collects the paths of the changed entries
+        :param lookup: for buckets that only keep their top users, called with the user id to read back
+                       the aggregate of a user entering the top, None to keep every user
+        """
+        user_id = str(game.user_id)
+        users = bucket.setdefault('users', {})
+        top = bucket.setdefault('top', [])
+        aggregate = users.get(user_id)
+        if aggregate is None:
+            if lookup is not None:
+                if len(top) >= LEADERBOARD_TOP_K and game.score <= top[-1][1]:
+                    # Not in the top before and still not, nothing to keep
+                    return
+                aggregate = lookup(user_id)
+            if aggregate is None:
+                aggregate = cls.__new_aggregate(game)
+            users[user_id] = aggregate
+        cls.__fold(aggregate, game)
+        cls.__update_top(top, user_id, aggregate['best'])
+        touched.update([path + ('users', user_id), path + ('top',)])
+        if lookup is not None:
+            for evicted in cls.__trim(bucket):
+                touched.add(path + ('users', evicted))
+
+    @staticmethod
+    def __trim(bucket: dict) -> list:
+        """Drops the aggregates of the users that are not in the top of the bucket, returns their ids."""
+        in_top = {user_id for user_id, _ in bucket.get('top', [])}
+        evicted = [user_id for user_id in bucket.get('users', {}) if user_id not in in_top]
+        for user_id in evicted:
+            del bucket['users'][user_id]
+        return evicted
+
+    @classmethod
+    def __add_game(cls, leaderboard: dict, game: History, touched: set, lookup=None):
+        """
+        Folds a single game into the all-time aggregates and its time and level buckets.
+        :param lookup: called with (window, bucket, user id) to read back the aggregate of a user entering the
+                       top of a bucket, None while rebuilding, which keeps every user until the buckets are trimmed
+        """
+        cls.__add_to_bucket(leaderboard, game, (), touched)
+        day, week = get_time_buckets(game.timestamp)
+        windows = leaderboard.setdefault('windows', {'daily': {}, 'weekly': {}, 'level': {}})
+        for window, bucket_key in [('daily', day), ('weekly', week), ('level', str(len(game.word)))]:
+            bucket = windows[window].setdefault(bucket_key, {})
+            bucket_lookup = None
+            if lookup is not None:
+                bucket_lookup = lambda user_id, window=window, bucket_key=bucket_key: lookup(window, bucket_key, user_id)
+            cls.__add_to_bucket(bucket, game, ('windows', window, bucket_key), touched, bucket_lookup)
+
+    @staticmethod
+    def __get_first_month(window: str, bucket_key: str) -> str | None:
+        """
+        Returns the month ('YYYY-MM') a daily or weekly bucket starts in.
+        A user's history comes newest month first, but within a month in the order the games were saved,
+        so a game saved late can come before newer ones and only the month tells where to stop reading.
+        """
+        if window == 'daily':
+            return bucket_key[:7]
+        if window == 'weekly':
+            year, week = bucket_key.split('-W')
+            return date.fromisocalendar(int(year), int(week), 1).strftime('%Y-%m')
+        return None
+
+    def __read_bucket_aggregate(self, window: str, bucket_key: str, user_id: str, skipped: set) -> dict | None:
+        """
+        Computes the aggregate of a user in a bucket from their own games, newest first through the per-user index.
+        :param skipped: ids of saved games that are not folded into the leaderboard yet
+        :return: the aggregate, None if the user has no other game in the bucket
+        """
+        aggregate = None
+        first_month = self.__get_first_month(window, bucket_key)
+        for game in self.history_dao.iter_user_history(user_id):
+            if str(game.uuid) in skipped:
+                continue
+            if window == 'level':
+                if str(len(game.word)) != bucket_key:
+                    continue
+            else:
+                if format_date(game.timestamp, '%Y-%m') < first_month:
+                    # Games come newest month first, the rest of them are older than the bucket
+                    break
+                if get_time_buckets(game.timestamp)[0 if window == 'daily' else 1] != bucket_key:
+                    continue
+            if aggregate is None:
+                aggregate = self.__new_aggregate(game)
+            self.__fold(aggregate, game)
+            if game.score == aggregate['best']:
+                # Newest first, keep the first game with the best score like a forward pass does
+                aggregate['best_game'] = str(game.uuid)
+                aggregate['best_timestamp'] = game.timestamp
+        return aggregate
+
+    @staticmethod
+    def __prune(leaderboard: dict, touched: set):
+        """Drops the oldest daily and weekly buckets, keeping the sidecar file small."""
+        windows = leaderboard.get('windows', {})
+        for window, retention in [('daily', LEADERBOARD_DAILY_RETENTION), ('weekly', LEADERBOARD_WEEKLY_RETENTION)]:
+            buckets = windows.get(window, {})
+            # Bucket keys sort chronologically
+            for bucket_key in sorted(buckets)[:-retention]:
+                del buckets[bucket_key]
+                touched.add(('windows', window, bucket_key))
+
+    def rebuild(self) -> dict:
+        """Recomputes the aggregates with one pass over the history and stores them."""
+        version = self.history_dao.get_version()
+        leaderboard = {
+            'format': LEADERBOARD_FORMAT,
+            'version': version,
+            'users': {},
+            'top': [],
+            'windows': {'daily': {}, 'weekly': {}, 'level': {}},
+        }
+        touched = set()
+        for game in self.history_dao.iter_history():
+            self.__add_game(leaderboard, game, touched)
+        self.__prune(leaderboard, touched)
+        for buckets in leaderboard['windows'].values():
+            for bucket in buckets.values():
+                self.__trim(bucket)
+        self.leaderboard_dao.save(leaderboard)
+        return leaderboard
+
+    def get_leaderboard(self) -> dict:
+        """Returns the aggregates, rebuilding them only if they are missing or behind the history."""
+        leaderboard = self.leaderboard_dao.get()
+        if leaderboard is None or leaderboard.get('format') != LEADERBOARD_FORMAT or \
+                leaderboard.get('version') != self.history_dao.get_version():
+            leaderboard = self.rebuild()
+        return leaderboard
+
+    def get_user_aggregates(self) -> dict:
+        """
+        Returns the all-time aggregates of every user.
+        :return: dict of user id -> {'best', 'total', 'count', 'best_game', 'best_timestamp'}
+        """
+        return self.get_leaderboard()['users']
+
+    @staticmethod
+    def get_current_bucket(window: str) -> str | None:
+        """Returns the bucket of the current day or week."""
+        day, week = get_time_buckets(int(time.time()))
+        return {'daily': day, 'weekly': week}.get(window)
+
+    def get_top(self, window: str = 'all', bucket: str | int | None = None, k: int = LEADERBOARD_TOP_K) -> list:
+        """
+        Returns the top users of a leaderboard window.
+        :param window: 'all', 'daily', 'weekly' or 'level'
+        :param bucket: the day ('YYYY-MM-DD'), week ('YYYY-Www') or level, defaults to the current day or week
+        :param k: number of users, at most LEADERBOARD_TOP_K
+        :return: list of (user id, aggregate) pairs, best first
+        """
+        if window not in WINDOWS:
+            raise ValueError(f"Unknown leaderboard window {window}, use one of {WINDOWS}.")
+        leaderboard = self.get_leaderboard()
+        if window == 'all':
+            selected = leaderboard
+        else:
+            bucket = self.get_current_bucket(window) if bucket is None else str(bucket)
+            selected = leaderboard['windows'][window].get(bucket, {})
+        users = selected.get('users', {})
+        return [(user_id, users[user_id]) for user_id, _ in selected.get('top', [])[:k]]
+
+    def record_games(self, games: list[History], version_before: int, version_after: int):
+        """
+        Updates the aggregates with games that were just saved to the history.
+        :param version_before: history version before the games were saved
+        :param version_after: history version after the games were saved
+        """
+        leaderboard = self.leaderboard_dao.get()
+        if leaderboard is None or leaderboard.get('format') != LEADERBOARD_FORMAT or \
+                leaderboard.get('version') != version_before:
+            # Games were saved without updating the aggregates, the rebuild includes these ones
+            self.rebuild()
+            return
+        touched = set()
+        # Games of this commit are already in the history, they must not be read back before they are folded in
+        skipped = {str(game.uuid) for game in games}
+        for game in games:
+            self.__add_game(leaderboard, game, touched,
+                            lambda window, bucket_key, user_id: self.__read_bucket_aggregate(
+                                window, bucket_key, user_id, skipped))
+            skipped.discard(str(game.uuid))
+        self.__prune(leaderboard, touched)
+        # Only the changed entries are written, appended to the patch log of the sidecar
+        self.leaderboard_dao.append(leaderboard, touched, version_before, version_after)
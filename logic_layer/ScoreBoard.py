@@ -8,16 +8,19 @@ class ScoreBoard:
         self.history_service = HistoryService()
         self.user_service = UserService()
 
-    def get_score_board(self):
-        history = self.history_service.get_history()
-        user_scores = {}
-        for game in history:
-            user = self.user_service.get_user(game.user_id)
-            score = game.score
-            if user.get_id() not in user_scores:
-                user_scores[user.get_id()] = UserScore(user.username, score)
-            else:
-                user_scores[user.get_id()].add_score(score)
-
-        return sorted(user_scores.values(), key=lambda x: x.highest_score, reverse=True)
+    def get_score_board(self, window: str = 'all', bucket: str | int | None = None):
+        """
+        Returns the top users of a leaderboard window, best first.
+        :param window: 'all', 'daily', 'weekly' or 'level'
+        :param bucket: the day, week or level of the window, defaults to the current day or week
+        """
+        # The top users are kept up-to-date as games are saved, so the history is not read here
+        top_scores = self.history_service.get_top_scores(window, bucket)
+        users = self.user_service.get_users_by_ids(user_id for user_id, _ in top_scores)
+        user_scores = []
+        for user_id, aggregate in top_scores:
+            user = users.get(str(user_id))
+            username = user.username if user is not None else user_id
+            user_scores.append(UserScore(username, aggregate['best'], aggregate['total'], aggregate['count']))
 
+        return user_scores
@@ -0,0 +1,169 @@
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from common.constants import DEFAULT_LEVEL, DEFAULT_MAX_ATTEMPTS
+from logic_layer.Game import Game
+from logic_layer.Solver import Solver
+from logic_layer.WordBankService import WordBankService
+
+# Number of games sent to a worker process at once
+SIMULATION_CHUNK_SIZE = 64
+
+
+class CandidateStrategy:
+    """Guesses a random answer that is still possible, seeded per game so runs are reproducible."""
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+
+    def prepare(self, level: int):
+        """Nothing to precompute for this strategy."""
+
+    def __call__(self, game: Game) -> str:
+        remaining = game.get_candidate_tracker().get_remaining()
+        rng = random.Random(f'{self.seed}:{game.get_current_word()}:{game.get_guesses()}')
+        return remaining[rng.randrange(len(remaining))]
+
+
+class SolverStrategy:
+    """Guesses the best ranked word of the Solver, scored in the worker process without a time limit."""
+
+    def __init__(self, metric: str = 'entropy'):
+        self.metric = metric
+
+    def prepare(self, level: int):
+        """Builds the feedback matrix once, before the worker processes start using it."""
+        Solver(level, workers=0, metric=self.metric).feedback_engine.get_matrix()
+
+    def __call__(self, game: Game) -> str:
+        solver = Solver(game.get_level(), time_budget=float('inf'), workers=0, metric=self.metric)
+        return solver.suggest(game)
+
+
+STRATEGIES = {
+    'candidate': CandidateStrategy,
+    'solver': SolverStrategy,
+}
+
+
+def play_game(level: int, answer: str, max_attempts: int, strategy) -> dict:
+    """
+    Plays one headless game against the answer.
+    :return: dict with the answer, whether the game was won and the number of guesses
+    """
+    game = Game(level, max_attempts, answer=answer)
+    won = False
+    while not won and game.get_guesses() < game.get_max_attempts():
+        won = game.guess_word(strategy(game))
+    return {'answer': game.get_current_word(), 'won': won, 'guesses': game.get_guesses()}
+
+
+def play_games(level: int, answers: list[str], max_attempts: int, strategy) -> list[dict]:
+    """Plays a chunk of games, runs in the simulator's worker processes."""
+    return [play_game(level, answer, max_attempts, strategy) for answer in answers]
+
+
+class Simulator:
+    """
+    The Simulator class replays games headless against a pluggable guessing strategy.
+    A strategy is any picklable callable that takes the Game and returns the next guess.
+    Games are spread across a process pool, and saving them to the history is optional.
+    """
+
+    def __init__(self, level: int = DEFAULT_LEVEL, max_attempts: int = DEFAULT_MAX_ATTEMPTS, strategy=None,
+                 workers: int | None = None):
+        self.level = level
+        self.max_attempts = max_attempts
+        self.strategy = strategy if strategy is not None else CandidateStrategy()
+        self.workers = os.cpu_count() if workers is None else workers
+
+    def get_answers(self, games: int | None = None, seed: int | None = None) -> list[str]:
+        """Returns every answer of the level, or a random sample of the given size."""
+        answers = WordBankService(self.level).get_word_bank() or []
+        if games is None or games >= len(answers):
+            return list(answers)
+        return random.Random(seed).sample(answers, games)
+
+    def run(self, answers: list[str] | None = None, games: int | None = None, seed: int | None = None,
+            save_user_id=None) -> dict:
+        """
+        Simulates the games and reports the throughput and results.
+        :param answers: answers to play, defaults to the whole word bank of the level
+        :param games: number of random answers to play instead of the whole word bank
+        :param seed: seed for choosing the random answers
+        :param save_user_id: saves every game to the history of this user, nothing is saved if None
+        :return: dict with games, wins, win rate, games per second and the guess distribution
+        """
+        if answers is None:
+            answers = self.get_answers(games, seed)
+        if hasattr(self.strategy, 'prepare'):
+            self.strategy.prepare(self.level)
+
+        chunks = [answers[start:start + SIMULATION_CHUNK_SIZE]
+                  for start in range(0, len(answers), SIMULATION_CHUNK_SIZE)]
+        started = time.perf_counter()
+        results = []
+        if self.workers <= 1:
+            for chunk in chunks:
+                results.extend(play_games(self.level, chunk, self.max_attempts, self.strategy))
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = [executor.submit(play_games, self.level, chunk, self.max_attempts, self.strategy)
+                           for chunk in chunks]
+                for future in futures:
+                    results.extend(future.result())
+        elapsed = time.perf_counter() - started
+
+        if save_user_id is not None:
+            self.save_results(results, save_user_id)
+
+        wins = sum(1 for result in results if result['won'])
+        distribution = {}
+        for result in results:
+            key = result['guesses'] if result['won'] else 'X'
+            distribution[key] = distribution.get(key, 0) + 1
+
+        return {
+            'games': len(results),
+            'wins': wins,
+            'win_rate': round(wins / len(results), 4) if results else 0.0,
+            'average_guesses': round(sum(r['guesses'] for r in results if r['won']) / wins, 3) if wins else 0.0,
+            'games_per_second': round(len(results) / elapsed, 2) if elapsed > 0 else 0.0,
+            'elapsed': round(elapsed, 3),
+            'distribution': distribution,
+            'results': results,
+        }
+
+    def save_results(self, results: list[dict], user_id):
+        """Saves the simulated games to the history of the user."""
+        for result in results:
+            game = Game(self.level, self.max_attempts, answer=result['answer'])
+            # Replay the guess count only, the history does not keep the guesses themselves
+            for _ in range(result['guesses']):
+                game.update_guesses()
+            game.save_game('win' if result['won'] else 'lose', user_id)
+
+
+if __name__ == '__main__':
+    # Usage: python -m logic_layer.Simulator --level 5 --games 1000 --strategy solver
+    parser = argparse.ArgumentParser(description='Replay headless games to benchmark guessing strategies.')
+    parser.add_argument('--level', type=int, default=DEFAULT_LEVEL, help='word length')
+    parser.add_argument('--attempts', type=int, default=DEFAULT_MAX_ATTEMPTS, help='max attempts per game')
+    parser.add_argument('--games', type=int, default=None, help='number of random answers, default is every word')
+    parser.add_argument('--strategy', choices=sorted(STRATEGIES), default='candidate', help='guessing strategy')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, default is one per core')
+    parser.add_argument('--seed', type=int, default=None, help='seed for choosing the random answers')
+    parser.add_argument('--save-user', default=None, help='save the games to the history of this user id')
+    arguments = parser.parse_args()
+
+    simulator = Simulator(arguments.level, arguments.attempts, STRATEGIES[arguments.strategy](), arguments.workers)
+    report = simulator.run(games=arguments.games, seed=arguments.seed, save_user_id=arguments.save_user)
+
+    print(f"Games: {report['games']}  Wins: {report['wins']}  Win rate: {report['win_rate']:.2%}")
+    print(f"Average guesses: {report['average_guesses']}  "
+          f"Throughput: {report['games_per_second']} games/s ({report['elapsed']}s)")
+    for guesses, count in sorted(report['distribution'].items(), key=lambda item: (item[0] == 'X', str(item[0]).zfill(3))):
+        print(f"{guesses:>3}: {count}")
@@ -0,0 +1,226 @@
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+import numpy as np
+
+from common.constants import DEFAULT_HINT_TIME_BUDGET, SOLVER_CHUNK_SIZE
+from logic_layer.FeedbackEngine import FeedbackEngine
+
+# Below this many matrix cells the work is done in-process, a pool would only add overhead
+MIN_PARALLEL_CELLS = 2_000_000
+
+
+def score_guesses(level: int, guess_indexes, candidate_indexes, metric: str = 'entropy') -> np.ndarray:
+    """
+    Scores guesses by how well they split the candidates, higher is better.
+    Runs in the solver's worker processes, the feedback matrix is memory-mapped by each worker.
+    :param level: word length
+    :param guess_indexes: matrix rows of the guesses to score
+    :param candidate_indexes: matrix columns of the remaining candidates
+    :param metric: 'entropy' for the expected information in bits,
+                   'remaining' for the negated expected number of candidates left
+    :return: score of each guess
+    """
+    matrix = FeedbackEngine(level).get_matrix()
+    guess_indexes = np.asarray(guess_indexes)
+    candidate_indexes = np.asarray(candidate_indexes)
+    patterns = 3 ** level
+
+    feedback = matrix[guess_indexes][:, candidate_indexes].astype(np.int64)
+    # Count the candidates falling into each feedback pattern, one row of counts per guess
+    feedback += np.arange(len(guess_indexes))[:, None] * patterns
+    counts = np.bincount(feedback.ravel(), minlength=len(guess_indexes) * patterns)
+    counts = counts.reshape(len(guess_indexes), patterns).astype(np.float64)
+
+    if metric == 'remaining':
+        return -(counts ** 2).sum(axis=1) / len(candidate_indexes)
+
+    probabilities = counts / len(candidate_indexes)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        information = np.where(probabilities > 0, -probabilities * np.log2(probabilities), 0.0)
+    return information.sum(axis=1)
+
+
+class Solver:
+    """
+    The Solver class ranks the next guesses of a game by the information they are expected to reveal.
+    Guesses are scored in chunks on a process pool, and ranking stops when the time budget runs out,
+    so a hint always comes back in time with the best guess scored so far.
+    The feedback matrix and the complete ranking of the opening guess are computed in a background
+    thread on first use, until the matrix is there the candidates are suggested unranked.
+    A warm up that fails is not tried again, its error is kept for get_warm_up_error.
+    """
+    _executor = None
+    # (level, word bank fingerprint, metric) -> ranking of the opening guess, which never changes
+    _opening_rankings = {}
+    # (level, metric) -> thread building the matrix and the opening ranking
+    _warm_ups = {}
+    # (level, metric) -> error of a failed warm up
+    _warm_up_errors = {}
+    _warm_up_lock = threading.Lock()
+
+    def __init__(self, level: int, time_budget: float = DEFAULT_HINT_TIME_BUDGET, workers: int | None = None,
+                 metric: str = 'entropy'):
+        """
+        :param level: word length
+        :param time_budget: seconds the ranking may take
+        :param workers: size of the process pool, 0 scores everything in the calling process
+        :param metric: 'entropy' or 'remaining', see score_guesses
+        """
+        self.level = level
+        self.time_budget = time_budget
+        self.workers = os.cpu_count() if workers is None else workers
+        self.metric = metric
+        self.feedback_engine = FeedbackEngine(level)
+        # Tells if the last ranking was scored, False when the matrix was not built yet or time ran out first
+        self.ranked = False
+
+    @classmethod
+    def get_executor(cls, workers: int) -> ProcessPoolExecutor:
+        """Returns the process pool shared by every solver, starting it on first use."""
+        if cls._executor is None:
+            cls._executor = ProcessPoolExecutor(max_workers=workers)
+            atexit.register(cls.shutdown)
+        return cls._executor
+
+    @classmethod
+    def shutdown(cls):
+        """Stops the shared process pool."""
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=False, cancel_futures=True)
+            cls._executor = None
+
+    def warm_up(self):
+        """
+        Builds the feedback matrix and the complete ranking of the opening guess in a background thread,
+        unless they are already there, being built, or failed to build before.
+        """
+        key = (self.level, self.metric)
+        with self._warm_up_lock:
+            thread = self._warm_ups.get(key)
+            if thread is not None and thread.is_alive() or key in self._warm_up_errors:
+                return
+            # A solver of its own, so the thread does not change the ranked flag of this one
+            solver = Solver(self.level, self.time_budget, self.workers, self.metric)
+            thread = threading.Thread(target=solver.__warm_up, name=f'solver-warm-up-{self.level}', daemon=True)
+            self._warm_ups[key] = thread
+            thread.start()
+
+    def __warm_up(self):
+        try:
+            words = self.feedback_engine.get_words()
+            opening_key = (self.level, FeedbackEngine.get_fingerprint(words), self.metric)
+            if len(words) > 2 and opening_key not in self._opening_rankings:
+                self.__rank_indexes(words, list(range(len(words))), set(), None, opening_key)
+        except Exception as error:
+            # Building the matrix again would most likely fail the same way, e.g. on a read-only or full disk
+            self._warm_up_errors[(self.level, self.metric)] = error
+
+    def get_warm_up_error(self) -> Exception | None:
+        """Returns the error the background warm up failed with, None if it did not fail."""
+        return self._warm_up_errors.get((self.level, self.metric))
+
+    def __score_chunks(self, chunks: list, candidate_indexes, deadline: float | None) -> list:
+        """
+        Scores the chunks of guesses until the deadline, returns (chunk, scores) pairs of the finished ones.
+        :param deadline: time.monotonic() value, None to score every chunk
+        """
+        cells = sum(len(chunk) for chunk in chunks) * len(candidate_indexes)
+        if self.workers <= 1 or cells < MIN_PARALLEL_CELLS:
+            results = []
+            for chunk in chunks:
+                if results and deadline is not None and time.monotonic() > deadline:
+                    break
+                results.append((chunk, score_guesses(self.level, chunk, candidate_indexes, self.metric)))
+            return results
+
+        executor = self.get_executor(self.workers)
+        futures = {
+            executor.submit(score_guesses, self.level, chunk, candidate_indexes, self.metric): chunk
+            for chunk in chunks
+        }
+        timeout = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+        done, not_done = wait(futures, timeout=timeout)
+        for future in not_done:
+            future.cancel()
+        return [(futures[future], future.result()) for future in done
+                if not future.cancelled() and future.exception() is None]
+
+    def __rank_indexes(self, words: list[str], candidate_indexes: list[int], excluded: set, deadline: float | None,
+                       opening_key=None, top: int = 20) -> list[tuple[str, float]]:
+        """
+        Scores the guesses against the candidates until the deadline, see rank.
+        :param opening_key: memoizes the ranking under this key once every guess is scored
+        :return: at least 20 (word, score) pairs, best first
+        """
+        # Score the candidates first, they can win right away and are the fallback when time runs out
+        candidate_set = set(candidate_indexes)
+        guess_indexes = [i for i in candidate_indexes if i not in excluded]
+        guess_indexes += [i for i in range(len(words)) if i not in candidate_set and i not in excluded]
+        chunks = [guess_indexes[start:start + SOLVER_CHUNK_SIZE]
+                  for start in range(0, len(guess_indexes), SOLVER_CHUNK_SIZE)]
+
+        results = self.__score_chunks(chunks, np.asarray(candidate_indexes), deadline)
+        if not results:
+            self.ranked = False
+            return [(words[i], 0.0) for i in guess_indexes[:max(top, 20)]]
+
+        guess_chunk = np.concatenate([np.asarray(chunk) for chunk, _ in results])
+        scores = np.concatenate([chunk_scores for _, chunk_scores in results])
+        # Prefer a possible answer when two guesses are expected to be equally good
+        is_candidate = np.isin(guess_chunk, candidate_indexes)
+        order = np.lexsort((~is_candidate, -scores))
+        ranking = [(words[guess_chunk[i]], float(scores[i])) for i in order[:max(top, 20)]]
+
+        self.ranked = True
+        if opening_key is not None and len(results) == len(chunks):
+            self._opening_rankings[opening_key] = ranking
+        return ranking
+
+    def rank(self, candidates: list[str], exclude=(), top: int = 5) -> list[tuple[str, float]]:
+        """
+        Ranks the guesses against the remaining candidates.
+        :param candidates: answers that are still possible
+        :param exclude: words that should not be suggested, like the guesses already made
+        :param top: number of guesses to return
+        :return: list of (word, score) pairs, best first. Check ranked to tell if they were scored
+        """
+        deadline = time.monotonic() + self.time_budget
+        if not self.feedback_engine.is_matrix_ready():
+            # Building the matrix takes far longer than any time budget, it is built in the background
+            # and the candidates are suggested unranked until then
+            self.warm_up()
+            self.ranked = False
+            return [(word, 0.0) for word in candidates if word not in exclude][:top]
+
+        words = self.feedback_engine.get_words()
+        index = self.feedback_engine.get_word_index()
+        candidate_indexes = [index[word] for word in candidates if word in index]
+        self.ranked = True
+        if len(candidate_indexes) <= 2:
+            # Nothing left to split, guessing a candidate is the best move
+            return [(words[i], 0.0) for i in candidate_indexes][:top]
+
+        is_opening = len(candidate_indexes) == len(words) and not exclude
+        opening_key = (self.level, FeedbackEngine.get_fingerprint(words), self.metric) if is_opening else None
+        if opening_key in self._opening_rankings:
+            return self._opening_rankings[opening_key][:top]
+
+        excluded = {index[word] for word in exclude if word in index}
+        ranking = self.__rank_indexes(words, candidate_indexes, excluded, deadline, opening_key, top)
+        if is_opening and opening_key not in self._opening_rankings:
+            # Time ran out first, finish the opening ranking in the background so the next one is instant
+            self.warm_up()
+        return ranking[:top]
+
+    def rank_game(self, game, top: int = 5) -> list[tuple[str, float]]:
+        """Ranks the next guesses for the current state of the game."""
+        return self.rank(game.get_candidate_tracker().get_remaining(), exclude=game.get_used_words(), top=top)
+
+    def suggest(self, game) -> str | None:
+        """Returns the best next guess for the game."""
+        ranking = self.rank_game(game, top=1)
+        return ranking[0][0] if ranking else None
@@ -1,16 +1,18 @@
 class UserScore:
-    def __init__(self, user: str, score: float):
+    def __init__(self, user: str, score: float, total: float | None = None, count: int = 1):
         self.user = user
         self.highest_score = score
-        self.scores = [score]
+        self.total_score = score if total is None else total
+        self.count = count
 
     def add_score(self, score: float):
         if score > self.highest_score:
             self.highest_score = score
-        self.scores.append(score)
+        self.total_score += score
+        self.count += 1
 
     def get_average_score(self):
-        return round(sum(self.scores) / len(self.scores), 2)
+        return round(self.total_score / self.count, 2)
 
     def get_list_of_values(self):
         return [self.user, self.highest_score, self.get_average_score()]
@@ -1,10 +1,12 @@
+from api_layer.sqlite_user_api import SQLiteUserAPI
 from api_layer.user_api import UserAPI
+from common.constants import REPOSITORY_BACKEND
 from models.User import User
 
 
 class UserService:
     def __init__(self):
-        self.user_dao = UserAPI()
+        self.user_dao = SQLiteUserAPI() if REPOSITORY_BACKEND == 'sqlite' else UserAPI()
 
     def get_users(self):
         return self.user_dao.get_users()
@@ -12,6 +14,10 @@ class UserService:
     def get_user(self, selected_user):
         return self.user_dao.get_user(selected_user)
 
+    def get_users_by_ids(self, user_ids) -> dict:
+        """Retrieves many users at once, returns a dict of user id -> User."""
+        return self.user_dao.get_users_by_ids(user_ids)
+
     def add_user(self, user: User):
         self.user_dao.add_user(user)
 
@@ -0,0 +1,89 @@
+from api_layer.user_stats_api import UserStatsAPI
+from models.History import History
+
+
+class UserStats:
+    """
+    The UserStats class keeps persistent statistics of every user: win streaks and, per level,
+    the number of games and wins and the guess distribution. They are updated with every saved
+    game, which only appends the changed users to the patch log of the statistics, so reading a user's
+    statistics is a dictionary lookup instead of a history scan.
+    The history is only replayed when the statistics are missing or stale.
+    """
+
+    def __init__(self, history_dao):
+        self.history_dao = history_dao
+        self.user_stats_dao = UserStatsAPI()
+
+    @staticmethod
+    def __add_game(users: dict, game: History):
+        """Folds a single game into the statistics of its user, games must come in the order they were played."""
+        stats = users.setdefault(str(game.user_id), {
+            'games': 0,
+            'wins': 0,
+            'current_streak': 0,
+            'max_streak': 0,
+            'levels': {},
+        })
+        level = stats['levels'].setdefault(str(len(game.word)), {'games': 0, 'wins': 0, 'distribution': {}})
+        won = game.result == 'win'
+        stats['games'] += 1
+        level['games'] += 1
+        if won:
+            stats['wins'] += 1
+            level['wins'] += 1
+            stats['current_streak'] += 1
+            stats['max_streak'] = max(stats['max_streak'], stats['current_streak'])
+        else:
+            stats['current_streak'] = 0
+        # Lost games are counted under X, like in the simulator's distribution
+        key = str(game.guesses) if won else 'X'
+        level['distribution'][key] = level['distribution'].get(key, 0) + 1
+
+    def rebuild(self) -> dict:
+        """Recomputes the statistics with one pass over the history and stores them."""
+        version = self.history_dao.get_version()
+        user_stats = {'version': version, 'users': {}}
+        for game in self.history_dao.iter_history():
+            self.__add_game(user_stats['users'], game)
+        self.user_stats_dao.save(user_stats)
+        return user_stats
+
+    def get_all_user_stats(self) -> dict:
+        """Returns the statistics of every user, rebuilding them only if they are missing or behind the history."""
+        user_stats = self.user_stats_dao.get()
+        if user_stats is None or user_stats.get('version') != self.history_dao.get_version():
+            user_stats = self.rebuild()
+        return user_stats
+
+    def get_user_stats(self, user_id) -> dict | None:
+        """
+        Returns the statistics of a user, None if they have not played yet.
+        :return: dict with 'games', 'wins', 'current_streak', 'max_streak' and
+                 'levels': level -> {'games', 'wins', 'distribution': guesses or 'X' -> count}
+        """
+        return self.get_all_user_stats()['users'].get(str(user_id))
+
+    @staticmethod
+    def get_win_rates(stats: dict) -> dict:
+        """Returns the win rate of each level in the statistics of a user."""
+        return {
+            int(level): level_stats['wins'] / level_stats['games']
+            for level, level_stats in stats['levels'].items() if level_stats['games']
+        }
+
+    def record_games(self, games: list[History], version_before: int, version_after: int):
+        """
+        Updates the statistics with games that were just saved to the history.
+        :param version_before: history version before the games were saved
+        :param version_after: history version after the games were saved
+        """
+        user_stats = self.user_stats_dao.get()
+        if user_stats is None or user_stats.get('version') != version_before:
+            # Games were saved without updating the statistics, the rebuild includes these ones
+            self.rebuild()
+            return
+        for game in games:
+            self.__add_game(user_stats['users'], game)
+        touched = {('users', str(game.user_id)) for game in games}
+        self.user_stats_dao.append(user_stats, touched, version_before, version_after)
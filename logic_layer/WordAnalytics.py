@@ -0,0 +1,164 @@
+import argparse
+
+from api_layer.word_analytics_api import WordAnalyticsAPI
+from common.constants import DEFAULT_LEVEL, DEFAULT_MAX_ATTEMPTS
+from models.History import History
+from utils.helpers import calculate_score
+
+# Fields the word report can be sorted by
+SORT_FIELDS = ['word', 'games', 'wins', 'win_rate', 'mean_guesses', 'mean_score']
+
+
+class WordAnalytics:
+    """
+    The WordAnalytics class keeps play statistics per answer and per level: number of games and wins,
+    total guesses and the score distribution, from which the win rate and mean guesses follow.
+    The report is built with one streaming pass over the raw history records and then updated with
+    every saved game, which only appends the changed words and levels to the patch log of the report.
+    Simulated games can be folded into a separate report.
+    """
+
+    def __init__(self, history_dao):
+        self.history_dao = history_dao
+        self.word_analytics_dao = WordAnalyticsAPI()
+
+    @staticmethod
+    def new_report(version=None) -> dict:
+        return {'version': version, 'words': {}, 'levels': {}}
+
+    @staticmethod
+    def add_game(report: dict, word: str, won: bool, guesses: int, score, touched: set | None = None):
+        """
+        Folds a single game into the statistics of its answer and of its level.
+        :param touched: collects the paths of the changed entries
+        """
+        for group, key in [('words', word), ('levels', str(len(word)))]:
+            if touched is not None:
+                touched.add((group, key))
+            stats = report[group].setdefault(key, {'games': 0, 'wins': 0, 'guesses': 0, 'scores': {}})
+            stats['games'] += 1
+            stats['wins'] += won
+            stats['guesses'] += guesses
+            # Scores take a handful of values per level, so the distribution counts each one
+            score_key = str(score)
+            stats['scores'][score_key] = stats['scores'].get(score_key, 0) + 1
+
+    def rebuild(self) -> dict:
+        """Recomputes the report with one pass over the raw history records and stores it."""
+        report = self.new_report(self.history_dao.get_version())
+        for game in self.history_dao.iter_records():
+            self.add_game(report, game['word'], game['result'] == 'win', game['guesses'], game['score'])
+        self.word_analytics_dao.save(report)
+        return report
+
+    def get_report(self) -> dict:
+        """
+        Returns the report, rebuilding it only if it is missing or behind the history.
+        :return: dict with 'words': word -> stats and 'levels': level -> stats,
+                 stats being {'games', 'wins', 'guesses', 'scores': score -> count}
+        """
+        report = self.word_analytics_dao.get()
+        if report is None or report.get('version') != self.history_dao.get_version():
+            report = self.rebuild()
+        return report
+
+    def record_games(self, games: list[History], version_before: int, version_after: int):
+        """
+        Updates the report with games that were just saved to the history.
+        :param version_before: history version before the games were saved
+        :param version_after: history version after the games were saved
+        """
+        report = self.word_analytics_dao.get()
+        if report is None or report.get('version') != version_before:
+            # Games were saved without updating the report, the rebuild includes these ones
+            self.rebuild()
+            return
+        touched = set()
+        for game in games:
+            self.add_game(report, game.word, game.result == 'win', game.guesses, game.score, touched)
+        self.word_analytics_dao.append(report, touched, version_before, version_after)
+
+    @classmethod
+    def from_simulation(cls, results: list[dict], level: int = DEFAULT_LEVEL,
+                        max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> dict:
+        """
+        Builds a report from simulated games, the results of Simulator.run. Nothing is stored.
+        Scores are computed the way Game.save_game does.
+        """
+        report = cls.new_report()
+        for result in results:
+            status = 'win' if result['won'] else 'lose'
+            score = calculate_score(level, status, max_attempts, result['guesses'])
+            cls.add_game(report, result['answer'], result['won'], result['guesses'], score)
+        return report
+
+    @staticmethod
+    def summarize(stats: dict) -> dict:
+        """Adds the win rate, mean guesses and mean score to the statistics of a word or level."""
+        games = stats['games']
+        total_score = sum(float(score) * count for score, count in stats['scores'].items())
+        return {
+            'games': games,
+            'wins': stats['wins'],
+            'win_rate': stats['wins'] / games if games else 0.0,
+            'mean_guesses': stats['guesses'] / games if games else 0.0,
+            'mean_score': total_score / games if games else 0.0,
+            'scores': stats['scores'],
+        }
+
+    @classmethod
+    def get_word_rows(cls, report: dict, level: int | None = None, min_games: int = 1, sort_by: str = 'win_rate',
+                      descending: bool = False, limit: int | None = None) -> list[dict]:
+        """
+        Returns the statistics of the answers in the report, hardest first by default.
+        :param level: only answers of this length, every level if None
+        :param min_games: leave out answers played fewer times
+        :param sort_by: one of SORT_FIELDS, ties are broken by the word
+        :param limit: maximum number of rows, None for all of them
+        """
+        if sort_by not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort field {sort_by}, use one of {SORT_FIELDS}.")
+        rows = [
+            {'word': word, **cls.summarize(stats)} for word, stats in report['words'].items()
+            if stats['games'] >= min_games and (level is None or len(word) == level)
+        ]
+        rows.sort(key=lambda row: row['word'])
+        rows.sort(key=lambda row: row[sort_by], reverse=descending)
+        return rows if limit is None else rows[:limit]
+
+    @classmethod
+    def get_level_rows(cls, report: dict) -> list[dict]:
+        """Returns the statistics of every level in the report, by level."""
+        return [{'level': int(level), **cls.summarize(stats)}
+                for level, stats in sorted(report['levels'].items(), key=lambda item: int(item[0]))]
+
+
+if __name__ == '__main__':
+    # Usage: python -m logic_layer.WordAnalytics --level 5 --sort win_rate --min-games 2 [--simulate 500]
+    parser = argparse.ArgumentParser(description='Report the hardest and easiest answers of the word banks.')
+    parser.add_argument('--level', type=int, default=None, help='only answers of this length')
+    parser.add_argument('--sort', choices=SORT_FIELDS, default='win_rate', help='field to sort the answers by')
+    parser.add_argument('--descending', action='store_true', help='largest values first')
+    parser.add_argument('--min-games', type=int, default=1, help='leave out answers played fewer times')
+    parser.add_argument('--limit', type=int, default=20, help='number of answers to show')
+    parser.add_argument('--simulate', type=int, default=None, metavar='GAMES',
+                        help='report on this many simulated games of the level instead of the history')
+    arguments = parser.parse_args()
+
+    if arguments.simulate is not None:
+        from logic_layer.Simulator import Simulator
+        simulated_level = arguments.level or DEFAULT_LEVEL
+        simulation = Simulator(simulated_level).run(games=arguments.simulate)
+        word_report = WordAnalytics.from_simulation(simulation['results'], simulated_level)
+    else:
+        from logic_layer.HistoryService import HistoryService
+        word_report = HistoryService().get_word_analytics()
+
+    for row in WordAnalytics.get_level_rows(word_report):
+        print(f"Level {row['level']}: {row['games']} games, win rate {row['win_rate']:.2%}, "
+              f"mean guesses {row['mean_guesses']:.2f}, mean score {row['mean_score']:.1f}")
+    print(f"{'Word':<8}{'Games':>7}{'Win rate':>10}{'Guesses':>9}{'Score':>8}")
+    for row in WordAnalytics.get_word_rows(word_report, arguments.level, arguments.min_games, arguments.sort,
+                                           arguments.descending, arguments.limit):
+        print(f"{row['word']:<8}{row['games']:>7}{row['win_rate']:>10.2%}{row['mean_guesses']:>9.2f}"
+              f"{row['mean_score']:>8.1f}")
@@ -0,0 +1,83 @@
+import argparse
+import re
+import sys
+
+from common.constants import MIN_WORD_LENGTH, MAX_WORD_LENGTH
+from logic_layer.WordBankService import WordBankService
+
+# Separators for both plain text (one or more words per line) and JSON arrays of strings
+TOKEN_SEPARATORS = re.compile(r'[\s,\[\]]+')
+
+
+class WordBankImporter:
+    """
+    The WordBankImporter class is responsible for bulk importing words into the word banks.
+    Input is streamed line by line, so the source file is never loaded as a whole,
+    and every word bank is committed with a single write at the end.
+    """
+
+    def __init__(self):
+        # word length -> list of normalized words waiting to be committed
+        self.pending_words = {length: [] for length in range(MIN_WORD_LENGTH, MAX_WORD_LENGTH + 1)}
+        self.invalid = 0
+
+    @staticmethod
+    def iter_tokens(lines):
+        """Yields the raw words found in plain text or JSON lines."""
+        for line in lines:
+            for token in TOKEN_SEPARATORS.split(line):
+                token = token.strip('"\'')
+                if token:
+                    yield token
+
+    def feed(self, lines):
+        """Normalizes the words in the lines and routes them to the word bank of their length."""
+        for token in self.iter_tokens(lines):
+            word = token.upper()
+            if not (word.isascii() and word.isalpha()) or len(word) not in self.pending_words:
+                self.invalid += 1
+                continue
+            self.pending_words[len(word)].append(word)
+
+    def commit(self):
+        """
+        Writes the pending words to their word banks, skipping words already in the bank.
+        :return: dict with the number of added and skipped words, in total and per word length
+        """
+        report = {'added': 0, 'skipped': self.invalid, 'invalid': self.invalid, 'banks': {}}
+        for length, words in self.pending_words.items():
+            if not words:
+                continue
+            added, skipped = WordBankService(length).add_words(words)
+            report['banks'][length] = {'added': added, 'skipped': skipped}
+            report['added'] += added
+            report['skipped'] += skipped
+            words.clear()
+        self.invalid = 0
+        return report
+
+    def import_files(self, file_paths):
+        """
+        Imports words from the given files, '-' reads from the standard input.
+        :return: the commit report
+        """
+        for file_path in file_paths:
+            if file_path == '-':
+                self.feed(sys.stdin)
+                continue
+            with open(file_path, 'r', encoding='utf-8') as file:
+                self.feed(file)
+        return self.commit()
+
+
+if __name__ == '__main__':
+    # Usage: python -m logic_layer.WordBankImporter [file ...]
+    parser = argparse.ArgumentParser(description='Bulk import words from text or JSON files into the word banks.')
+    parser.add_argument('files', nargs='*', default=['-'], help='text or JSON files to import, - for stdin')
+    arguments = parser.parse_args()
+
+    import_report = WordBankImporter().import_files(arguments.files)
+    for word_len, bank_report in sorted(import_report['banks'].items()):
+        print(f"{word_len} letter words: added {bank_report['added']}, skipped {bank_report['skipped']}")
+    print(f"Added {import_report['added']} words, skipped {import_report['skipped']} "
+          f"({import_report['invalid']} invalid).")
@@ -1,20 +1,32 @@
-
+from api_layer.sqlite_word_bank_api import SQLiteWordBankAPI
 from api_layer.word_bank_api import WordBankAPI
+from common.constants import REPOSITORY_BACKEND
 
 
 class WordBankService:
     def __init__(self, word_len: int):
         self.word_len = word_len
-        self.word_bank_dao = WordBankAPI(word_len)
+        self.word_bank_dao = SQLiteWordBankAPI(word_len) if REPOSITORY_BACKEND == 'sqlite' else WordBankAPI(word_len)
 
     def get_word_bank(self):
         """Retrieves the word bank."""
         return self.word_bank_dao.get_word_bank()
 
+    def has_word(self, word: str) -> bool:
+        """Checks if the word exists in the word bank."""
+        return self.word_bank_dao.has_word(word)
+
     def add_word(self, word: str):
         """Adds a new word to the word bank."""
         self.word_bank_dao.add_word(word)
 
+    def add_words(self, words) -> tuple[int, int]:
+        """
+        Adds many words to the word bank at once.
+        :return: (number of words added, number of duplicates skipped)
+        """
+        return self.word_bank_dao.add_words(words)
+
     def get_random_word(self):
         """Retrieves a random word from the word bank."""
         return self.word_bank_dao.get_random_word()
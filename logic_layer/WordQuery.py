@@ -0,0 +1,122 @@
+import numpy as np
+
+from logic_layer.FeedbackEngine import FeedbackEngine
+from logic_layer.WordBankService import WordBankService
+
+# Characters of a pattern that match any letter
+WILDCARDS = '._?*'
+
+
+def letter_index(letter: str) -> int:
+    """Returns the position of an upper-case letter in the alphabet, A is 0."""
+    return ord(letter) - ord('A')
+
+
+class WordQuery:
+    """
+    The WordQuery class answers pattern and letter constraint queries over the word bank of a level,
+    e.g. "A at position 2, contains R but not at position 4, no S or T".
+    For every position and letter it keeps a bitset of the words with that letter there, and for every
+    letter and count a bitset of the words with at least that many copies, as Python big ints where bit i
+    stands for word i. A query is then a handful of AND operations over those bitsets.
+    """
+    # level -> (word bank, (position bitsets, count bitsets)), shared by every query in the process
+    _indexes = {}
+
+    def __init__(self, level: int):
+        self.level = level
+        self.word_bank_service = WordBankService(level)
+
+    @staticmethod
+    def to_bitset(matches: np.ndarray) -> int:
+        """Packs a boolean array into a big int, element i becomes bit i."""
+        return int.from_bytes(np.packbits(matches, bitorder='little').tobytes(), 'little')
+
+    @classmethod
+    def build_index(cls, words: list[str]) -> tuple[list, list]:
+        """
+        Computes the bitsets of the words.
+        :return: (positions, counts), positions[i][letter] holds the words with the letter at position i,
+                 counts[letter][k] the words with more than k copies of the letter
+        """
+        letters = FeedbackEngine.words_to_array(words)
+        length = letters.shape[1] if len(words) else 0
+        # (words, letters) alphabet positions, anything outside A-Z matches no letter
+        codes = letters.astype(np.int16) - ord('A')
+        positions = [[cls.to_bitset(codes[:, i] == letter) for letter in range(26)] for i in range(length)]
+        counts = []
+        for letter in range(26):
+            copies = (codes == letter).sum(axis=1)
+            counts.append([cls.to_bitset(copies > k) for k in range(length)])
+        return positions, counts
+
+    def __load(self):
+        """Returns the (word bank, index) entry for the level, building it if the bank changed."""
+        word_bank = self.word_bank_service.get_word_bank() or []
+        entry = self._indexes.get(self.level)
+        # The word bank cache hands out the same list until the bank changes,
+        # the packed bank a new one on every read
+        if entry is None or entry[0] is not word_bank and entry[0] != word_bank:
+            entry = (word_bank, self.build_index(word_bank))
+            self._indexes[self.level] = entry
+        return entry
+
+    def get_mask(self, pattern: str | None = None, contains: str = '', excludes: str = '',
+                 not_at: dict | None = None) -> int:
+        """
+        Returns the bitset of the words matching every constraint, bit i stands for word i of the bank.
+        :param pattern: a letter or a wildcard (. _ ? *) for each position, e.g. '.A...'
+        :param contains: letters the word must contain, a repeated letter must occur at least that many times
+        :param excludes: letters the word must not contain. A letter that is also in the pattern or
+                         in contains may occur only as many times as required there, like a grey letter
+        :param not_at: position (0-based) -> letters that must not be at that position
+        """
+        words, (positions, counts) = self.__load()
+        pattern = (pattern or '').upper()
+        contains = contains.upper()
+        excludes = excludes.upper()
+        if pattern and len(pattern) != self.level:
+            raise ValueError(f"The pattern must be {self.level} characters long.")
+        for letter in pattern.translate(str.maketrans('', '', WILDCARDS)) + contains + excludes + \
+                ''.join((not_at or {}).values()).upper():
+            if not 'A' <= letter <= 'Z':
+                raise ValueError(f"Invalid letter {letter}, only A-Z and wildcards {WILDCARDS} are allowed.")
+
+        mask = (1 << len(words)) - 1
+        for i, letter in enumerate(pattern):
+            if letter not in WILDCARDS:
+                mask &= positions[i][letter_index(letter)]
+        for i, letters in (not_at or {}).items():
+            if not 0 <= i < self.level:
+                raise ValueError(f"Position {i} is outside of a {self.level} letter word.")
+            for letter in letters.upper():
+                mask &= ~positions[i][letter_index(letter)]
+
+        min_counts = {}
+        for letter in set(contains) | {letter for letter in pattern if letter not in WILDCARDS}:
+            min_counts[letter] = max(contains.count(letter), pattern.count(letter))
+        for letter, count in min_counts.items():
+            mask &= counts[letter_index(letter)][count - 1] if count <= self.level else 0
+        for letter in set(excludes):
+            count = min_counts.get(letter, 0)
+            if count < self.level:
+                mask &= ~counts[letter_index(letter)][count]
+        return mask
+
+    def count(self, **constraints) -> int:
+        """Returns the number of words matching the constraints, see get_mask."""
+        return self.get_mask(**constraints).bit_count()
+
+    def search(self, limit: int | None = None, **constraints) -> list[str]:
+        """
+        Returns the words matching the constraints, in word bank order, see get_mask.
+        :param limit: maximum number of words, None for all of them
+        """
+        mask = self.get_mask(**constraints)
+        words = self.__load()[0]
+        if not mask:
+            return []
+        # Unpack the bitset in one vectorized step instead of one bit at a time
+        bits = np.unpackbits(np.frombuffer(mask.to_bytes((len(words) + 7) // 8, 'little'), dtype=np.uint8),
+                             bitorder='little')
+        return [words[i] for i in np.flatnonzero(bits)[:limit]]
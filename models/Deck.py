@@ -0,0 +1,36 @@
+class Deck:
+    """
+    The Deck model class.
+    A deck is a shuffled permutation of a word bank, the cursor points at the next answer to deal.
+    """
+    database = 'decks.json'
+    file_path = f'data_layer/repository/{database}'
+
+    def __init__(self, user_id: str, level: int, seed: int, size: int, cursor: int = 0):
+        self.user_id = user_id
+        self.level = level
+        self.seed = seed
+        self.size = size
+        self.cursor = cursor
+
+    def __str__(self):
+        return f"{self.user_id} - {self.level} - {self.cursor}/{self.size}"
+
+    def is_exhausted(self) -> bool:
+        """
+        Check if every word in the deck has been dealt
+        """
+        return self.cursor >= self.size
+
+    def get_json_format(self):
+        """
+        Get the deck in JSON format
+        :return: dict
+        """
+        return {
+            'user_id': str(self.user_id),
+            'level': self.level,
+            'seed': self.seed,
+            'size': self.size,
+            'cursor': self.cursor
+        }
@@ -1,7 +1,6 @@
-from datetime import datetime
+import time
 from uuid import uuid4
 
-from logic_layer.UserService import UserService
 from utils.helpers import format_date
 
 
@@ -9,45 +8,57 @@ class History:
     """
     The History model class
     """
-    database = 'history.json'
-    file_path = f'data_layer/repository/{database}'
+    database = 'history'
+    # Directory of the monthly history segments
+    segment_directory = f'data_layer/repository/{database}'
+    # The history used to be a single JSON Lines file, and before that a JSON array, they are migrated on first use
+    file_path = 'data_layer/repository/history.jsonl'
+    legacy_file_path = 'data_layer/repository/history.json'
+    index_directory = 'data_layer/repository/history_index'
+    # Games the background writer failed to save, they are saved again when the next writer starts
+    recovery_file_path = 'data_layer/repository/history_recovery.jsonl'
+    # No per-instance __dict__, there can be a lot of these in memory
+    __slots__ = ('uuid', 'user_id', 'word', 'guesses', 'result', 'score', 'timestamp')
 
-    def __init__(self, uuid: str | None, user_id: int, word: str, result: str, guesses: int, score: float, timestamp: str | None = None):
+    def __init__(self, uuid: str | None, user_id: int, word: str, result: str, guesses: int, score: float, timestamp: int | None = None):
         self.uuid = uuid if uuid is not None else uuid4()
         self.user_id = user_id
         self.word = word
         self.guesses = guesses
         self.result = result  # win or lose
         self.score = score
-        self.timestamp = timestamp if timestamp is not None else format_date(datetime.now().isoformat())
+        # Epoch seconds, only formatted when displayed
+        self.timestamp = timestamp if timestamp is not None else int(time.time())
 
     def __str__(self):
-        return f"{self.word} - {self.score} - {self.timestamp}"
+        return f"{self.word} - {self.score} - {format_date(self.timestamp)}"
 
     def __getitem__(self, item):
         """
         Get the item from the history
         """
-        return self.__dict__[item]
+        if item not in self.__slots__:
+            raise KeyError(item)
+        return getattr(self, item)
 
     def get_list_of_values(self):
         """
         Get the list of values from the history
         """
-        return self.__dict__.values()
+        return [getattr(self, field) for field in self.__slots__]
 
-    def get_table_list_of_values(self):
+    def get_table_list_of_values(self, username: str):
         """
         Get the list of values from the history for the table
+        :param username: username of the player, resolved by the caller for every row at once
         """
-        username = UserService().get_user(self.user_id).username
         return [
             username,
             self.word,
             self.guesses,
             self.result,
             self.score,
-            self.timestamp
+            format_date(self.timestamp)
         ]
 
     def get_json_format(self):
@@ -0,0 +1,113 @@
+import multiprocessing
+import os
+
+import pytest
+
+# Writer processes and the users, games and words each of them adds
+PROCESSES = 4
+RECORDS = 25
+
+
+def get_word(number: int, length: int = 5) -> str:
+    """Returns a distinct word for every number, the number written in base 26 with the letters A-Z."""
+    letters = []
+    for _ in range(length):
+        number, remainder = divmod(number, 26)
+        letters.append(chr(ord('A') + remainder))
+    return ''.join(reversed(letters))
+
+
+def write_records(directory: str, worker: int, records: int, barrier):
+    """Adds users, games and words from one process, all processes start writing at the same time."""
+    os.chdir(directory)
+    from api_layer.user_api import UserAPI
+    from api_layer.word_bank_api import WordBankAPI
+    from logic_layer.HistoryService import HistoryService
+    from models.History import History
+    from models.User import User
+
+    user_api = UserAPI()
+    word_bank_api = WordBankAPI(5)
+    history_service = HistoryService()
+    barrier.wait()
+    for record in range(records):
+        number = worker * records + record
+        user = User(None, f'Stress {number}', f'stress_{number}')
+        user_api.add_user(user)
+        history_service.add_history(History(None, user.uuid, get_word(number), 'win', 3, number))
+        word_bank_api.add_word(get_word(number))
+    # Forked processes exit without running atexit, write the games queued on a write-behind writer
+    history_service.flush()
+
+
+def check_records(processes: int, records: int) -> list[str]:
+    """Reads everything back and returns the problems found, an empty list if no record was lost."""
+    from api_layer.leaderboard_api import LeaderboardAPI
+    from api_layer.user_api import UserAPI
+    from api_layer.user_stats_api import UserStatsAPI
+    from api_layer.word_analytics_api import WordAnalyticsAPI
+    from api_layer.word_bank_api import WordBankAPI
+    from logic_layer.HistoryService import HistoryService
+
+    expected = processes * records
+    problems = []
+
+    users = UserAPI().get_users() or []
+    if len(users) != expected or len({user.name for user in users}) != expected:
+        problems.append(f'users: expected {expected}, found {len(users)}')
+
+    history_service = HistoryService()
+    history = history_service.get_history()
+    if len(history) != expected or len({str(game.uuid) for game in history}) != expected:
+        problems.append(f'history: expected {expected} games, found {len(history)}')
+    missing_index = [game for game in history if next(history_service.get_user_history(game.user_id), None) is None]
+    if missing_index:
+        problems.append(f'history index: {len(missing_index)} games cannot be found by user')
+
+    version = history_service.history_dao.get_version()
+    leaderboard = LeaderboardAPI().get() or {}
+    counted = sum(aggregate['count'] for aggregate in leaderboard.get('users', {}).values())
+    if leaderboard.get('version') != version or counted != expected:
+        problems.append(f'leaderboard: expected {expected} games at version {version}, '
+                        f'found {counted} at version {leaderboard.get("version")}')
+    user_stats = UserStatsAPI().get() or {}
+    counted = sum(stats['games'] for stats in user_stats.get('users', {}).values())
+    if user_stats.get('version') != version or counted != expected:
+        problems.append(f'user statistics: expected {expected} games at version {version}, '
+                        f'found {counted} at version {user_stats.get("version")}')
+    word_report = WordAnalyticsAPI().get() or {}
+    counted = sum(stats['games'] for stats in word_report.get('words', {}).values())
+    if word_report.get('version') != version or counted != expected:
+        problems.append(f'word analytics: expected {expected} games at version {version}, '
+                        f'found {counted} at version {word_report.get("version")}')
+
+    words = WordBankAPI(5).get_word_bank() or []
+    if len(words) != expected or len(set(words)) != expected:
+        problems.append(f'word bank: expected {expected} words, found {len(words)}')
+    return problems
+
+
+@pytest.mark.parametrize('write_behind', [False, True])
+def test_concurrent_writes_lose_nothing(tmp_path, monkeypatch, write_behind):
+    """Adds users, games and words from many processes at once and checks that none are lost."""
+    import logic_layer.HistoryService
+    monkeypatch.setattr(logic_layer.HistoryService, 'HISTORY_WRITE_BEHIND', write_behind)
+    (tmp_path / 'data_layer/repository/word_bank').mkdir(parents=True)
+    # Forked processes keep the import path and the settings of this one
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(PROCESSES)
+    workers = [context.Process(target=write_records, args=(str(tmp_path), worker, RECORDS, barrier))
+               for worker in range(PROCESSES)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert [worker.exitcode for worker in workers] == [0] * PROCESSES
+
+    monkeypatch.chdir(tmp_path)
+    assert check_records(PROCESSES, RECORDS) == []
+    # Atomically replaced files keep the permissions of a new file, not the owner-only ones of a temporary file
+    umask = os.umask(0)
+    os.umask(umask)
+    for name in ['users.json', 'leaderboard.json', 'user_stats.json', 'word_analytics.json']:
+        assert (tmp_path / 'data_layer/repository' / name).stat().st_mode & 0o777 == 0o666 & ~umask, name
@@ -0,0 +1,90 @@
+import itertools
+import random
+
+import pytest
+
+from common.constants import FEEDBACK_ABSENT, FEEDBACK_PRESENT, FEEDBACK_CORRECT
+from logic_layer.CandidateTracker import CandidateTracker
+from logic_layer.FeedbackEngine import FeedbackEngine
+
+
+def brute_force_feedback(guess: str, answer: str) -> int:
+    """
+    The feedback code from the rules as stated: a letter in the right spot is correct, any other letter is
+    present while the answer has more copies of it outside the correct spots than the guess used before it.
+    """
+    correct = [guessed_letter == answer_letter for guessed_letter, answer_letter in zip(guess, answer)]
+    code = 0
+    for i in reversed(range(len(guess))):
+        if correct[i]:
+            feedback = FEEDBACK_CORRECT
+        else:
+            in_answer = sum(1 for j, letter in enumerate(answer) if letter == guess[i] and not correct[j])
+            used_before = sum(1 for j in range(i) if guess[j] == guess[i] and not correct[j])
+            feedback = FEEDBACK_PRESENT if in_answer > used_before else FEEDBACK_ABSENT
+        code = code * 3 + feedback
+    return code
+
+
+def make_words(count: int, length: int, seed: int) -> list[str]:
+    """Returns distinct words from a few letters, so most of them share and repeat letters."""
+    generator = random.Random(seed)
+    words = set()
+    while len(words) < count:
+        words.add(''.join(generator.choice('ABCDEL') for _ in range(length)))
+    return sorted(words)
+
+
+@pytest.mark.parametrize('guess, answer, feedback', [
+    ('CRANE', 'CRANE', [2, 2, 2, 2, 2]),
+    ('SPEED', 'ABIDE', [0, 0, 1, 0, 1]),
+    ('EERIE', 'THREE', [1, 0, 2, 0, 2]),
+    ('LLAMA', 'HELLO', [1, 1, 0, 0, 0]),
+    ('ALLOT', 'LLAMA', [1, 2, 1, 0, 0]),
+])
+def test_encode_examples(guess, answer, feedback):
+    """Hand-checked feedback, a repeated letter is only present as many times as the answer has it left over."""
+    assert FeedbackEngine.decode(FeedbackEngine.encode(guess, answer), len(guess)) == feedback
+
+
+@pytest.mark.parametrize('length', [3, 5, 6])
+def test_encode_matches_the_rules(length):
+    """Every pair of words is encoded like the rules say, repeated letters included."""
+    words = make_words(60, length, seed=length)
+    for guess, answer in itertools.product(words, repeat=2):
+        assert FeedbackEngine.encode(guess, answer) == brute_force_feedback(guess, answer), (guess, answer)
+
+
+@pytest.mark.parametrize('length', [3, 5, 6])
+def test_matrix_matches_encode(length, monkeypatch):
+    """The vectorized matrix has the code of every guess against every answer, also when built in chunks."""
+    import logic_layer.FeedbackEngine
+    monkeypatch.setattr(logic_layer.FeedbackEngine, 'BUILD_CHUNK_CELLS', 500)
+    guesses = make_words(80, length, seed=length)
+    answers = make_words(50, length, seed=length + 10)
+    matrix = FeedbackEngine.build_matrix(guesses, answers)
+
+    assert matrix.shape == (len(guesses), len(answers))
+    assert matrix.dtype == FeedbackEngine.get_dtype(length)
+    for (i, guess), (j, answer) in itertools.product(enumerate(guesses), enumerate(answers)):
+        assert matrix[i, j] == FeedbackEngine.encode(guess, answer), (guess, answer)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_candidates_match_a_full_scan(seed):
+    """After every guess the remaining candidates are the words that give the same feedback to every guess so far."""
+    generator = random.Random(seed)
+    words = make_words(300, 5, seed=100)
+    answer = generator.choice(words)
+    tracker = CandidateTracker(list(words), 5)
+    guessed = []
+    for _ in range(6):
+        guess = generator.choice(words)
+        tracker.update(guess, FeedbackEngine.encode(guess, answer))
+        guessed.append(guess)
+        expected = [word for word in words
+                    if all(FeedbackEngine.encode(earlier, word) == FeedbackEngine.encode(earlier, answer)
+                           for earlier in guessed)]
+        assert sorted(tracker.get_remaining()) == expected, guessed
+        assert tracker.get_remaining_count() == len(expected)
+        assert answer in tracker.get_remaining()
@@ -0,0 +1,215 @@
+import random
+
+import pytest
+
+import api_layer.history_segments
+from api_layer.history_segments import HistorySegments, HEADER_SIZE, get_segment_key
+
+# Start of the games, a few months of them, in seconds
+START = 1700000000
+DAY = 24 * 60 * 60
+USERS = ['alice', 'bob', 'carol', 'dave']
+
+
+def make_games(count: int, seed: int) -> list[dict]:
+    """Returns games over about five months, mostly in time order, with some saved late into earlier months."""
+    generator = random.Random(seed)
+    games = []
+    timestamp = START
+    for number in range(count):
+        timestamp += generator.randint(0, DAY)
+        game_timestamp = timestamp
+        if generator.random() < 0.1:
+            # Saved late, up to two months back
+            game_timestamp -= generator.randint(0, 60 * DAY)
+        games.append({
+            'uuid': f'game-{number}',
+            'user_id': generator.choice(USERS),
+            'word': 'APPLE',
+            'guesses': 3,
+            'result': 'win',
+            'score': number,
+            'timestamp': game_timestamp,
+        })
+    return games
+
+
+def append_in_batches(segments: HistorySegments, games: list[dict], seed: int):
+    generator = random.Random(seed)
+    position = 0
+    while position < len(games):
+        batch_size = generator.randint(1, 8)
+        segments.append(games[position:position + batch_size])
+        position += batch_size
+
+
+def check_ranges(segments: HistorySegments, games: list[dict], seed: int):
+    """Compares range queries with a scan of every game."""
+    generator = random.Random(seed)
+    timestamps = [game['timestamp'] for game in games]
+    ranges = [(None, None), (None, START + 30 * DAY), (START + 60 * DAY, None)]
+    for _ in range(50):
+        start, end = sorted(generator.randint(min(timestamps) - DAY, max(timestamps) + DAY) for _ in range(2))
+        ranges.append((start, end))
+    # Ranges starting and ending on the timestamp of a game
+    ranges += [(timestamp, timestamp) for timestamp in generator.sample(timestamps, 10)]
+    for start, end in ranges:
+        expected = sorted(game['uuid'] for game in games
+                          if (start is None or game['timestamp'] >= start) and (end is None or game['timestamp'] <= end))
+        assert sorted(game['uuid'] for game in segments.iter_records(start, end)) == expected, (start, end)
+
+
+def test_segments_split_games_by_month(tmp_path):
+    """Every game lands in the segment of its month, and the headers record the range and order of the rows."""
+    games = make_games(500, seed=1)
+    segments = HistorySegments(tmp_path)
+    append_in_batches(segments, games, seed=2)
+
+    for segment in segments.get_segments():
+        rows = list(segment.iter_records())
+        assert rows == [game for game in games if get_segment_key(game['timestamp']) == segment.key]
+        header = segment.read_header()
+        timestamps = [game['timestamp'] for game in rows]
+        assert header['rows'] == len(rows)
+        assert (header['start'], header['end']) == (min(timestamps), max(timestamps))
+        if segment.is_sorted(header):
+            assert timestamps == sorted(timestamps), segment.key
+    check_ranges(segments, games, seed=3)
+
+
+@pytest.mark.parametrize('min_rows', [1, 150, 10_000])
+def test_compaction_keeps_every_game(tmp_path, monkeypatch, min_rows):
+    """Compaction merges small segments and indexes them, range queries still find exactly the same games."""
+    monkeypatch.setattr(api_layer.history_segments, 'SPARSE_INDEX_INTERVAL', 4)
+    games = make_games(500, seed=4)
+    segments = HistorySegments(tmp_path)
+    append_in_batches(segments, games, seed=5)
+    data_size = segments.get_data_size()
+    segment_count = len(segments.get_segments())
+
+    report = segments.compact(get_segment_key(max(game['timestamp'] for game in games)), min_rows)
+    assert report['segments_before'] == segment_count
+    assert report['segments_after'] == len(segments.get_segments())
+    if min_rows == 1:
+        assert report['merged'] == 0
+    elif min_rows == 10_000:
+        # Every past month is merged into one segment, the current month is left alone
+        assert report['segments_after'] == 2
+    # Rows are copied byte for byte
+    assert segments.get_data_size() == data_size
+    assert sorted(game['uuid'] for game in segments.iter_records()) == sorted(game['uuid'] for game in games)
+    for segment in segments.get_segments():
+        timestamps = [game['timestamp'] for game in segment.iter_records()]
+        assert segment.is_sorted(segment.read_header()) == (timestamps == sorted(timestamps)), segment.key
+        assert bool(segment.get_sparse_index()) == (timestamps == sorted(timestamps)), segment.key
+    check_ranges(segments, games, seed=6)
+
+
+def test_sparse_index_points_before_the_first_row_in_range(tmp_path, monkeypatch):
+    """The sparse index of a sorted segment never skips a row at or after the start timestamp."""
+    monkeypatch.setattr(api_layer.history_segments, 'SPARSE_INDEX_INTERVAL', 4)
+    # In time order, with runs of equal timestamps across the index entries
+    games = sorted(make_games(300, seed=7), key=lambda game: game['timestamp'])
+    for number, game in enumerate(games):
+        game['timestamp'] = START + number // 6 * 60
+    segments = HistorySegments(tmp_path)
+    append_in_batches(segments, games, seed=8)
+    (segment,) = segments.get_segments()
+
+    assert segment.build_sparse_index() == (len(games) + 3) // 4
+    assert segment.is_sorted(segment.read_header())
+    offsets = [offset for offset, _, _ in segment.iter_lines()]
+    for start in range(START - 60, games[-1]['timestamp'] + 120, 30):
+        offset = segment.find_offset(start)
+        first = next((row_offset for row_offset, game in zip(offsets, games) if game['timestamp'] >= start), None)
+        assert offset >= HEADER_SIZE
+        if first is not None:
+            assert offset <= first, start
+    check_ranges(segments, games, seed=9)
+
+
+def test_unsorted_segment_gets_no_sparse_index(tmp_path):
+    """A segment whose timestamps are not ascending is scanned in full instead of stopping early."""
+    segments = HistorySegments(tmp_path)
+    games = make_games(20, seed=10)
+    for game in games:
+        game['timestamp'] = START + 100
+    games[5]['timestamp'] = START + 200
+    games[15]['timestamp'] = START
+    segments.append(games)
+    (segment,) = segments.get_segments()
+
+    assert not segment.is_sorted(segment.read_header())
+    assert segment.build_sparse_index() == 0
+    assert segment.get_sparse_index() == []
+    assert not segment.is_sorted(segment.read_header())
+    assert [game['uuid'] for game in segments.iter_records(START, START + 100)] == \
+        [game['uuid'] for game in games if game['timestamp'] <= START + 100]
+
+
+def expected_user_history(games: list[dict], user_id: str) -> list[str]:
+    """The games of a user newest first, by month and then by save order, from a scan of every game."""
+    saved = [(get_segment_key(game['timestamp']), number, game['uuid'])
+             for number, game in enumerate(games) if game['user_id'] == user_id]
+    return [uuid for _, _, uuid in sorted(saved, reverse=True)]
+
+
+def check_user_histories(history_api, games: list[dict]):
+    for user_id in USERS:
+        expected = expected_user_history(games, user_id)
+        assert [str(game.uuid) for game in history_api.iter_user_history(user_id)] == expected, user_id
+        # Paged like the history screen
+        for offset in range(0, len(expected) + 7, 7):
+            page = [str(game.uuid) for game in history_api.iter_user_history(user_id, limit=7, offset=offset)]
+            assert page == expected[offset:offset + 7], (user_id, offset)
+
+
+def test_user_index_matches_a_full_scan(tmp_path, monkeypatch):
+    """The per-user index finds every game of a user, including games saved late into an earlier month."""
+    monkeypatch.chdir(tmp_path)
+    from api_layer.history_api import HistoryAPI
+    from models.History import History
+
+    games = make_games(300, seed=11)
+    history_api = HistoryAPI()
+    generator = random.Random(12)
+    position = 0
+    while position < len(games):
+        batch_size = generator.randint(1, 8)
+        history_api.add_histories([History(game['uuid'], game['user_id'], game['word'], game['result'],
+                                           game['guesses'], game['score'], game['timestamp'])
+                                   for game in games[position:position + batch_size]])
+        position += batch_size
+        if generator.random() < 0.1:
+            # Read in between, so later games are added to an index that already exists
+            check_user_histories(history_api, games[:position])
+    check_user_histories(history_api, games)
+
+    # Built again from the segments, the index is the same as the one built game by game
+    history_api.index.rebuild()
+    check_user_histories(history_api, games)
+    # Games appended by another process without updating the index are caught up on the next read
+    history_api.segments.append([dict(games[0], uuid='late-game', timestamp=START - 40 * DAY)])
+    games.append(dict(games[0], uuid='late-game', timestamp=START - 40 * DAY))
+    check_user_histories(HistoryAPI(), games)
+
+
+def test_user_index_after_compaction(tmp_path, monkeypatch):
+    """Compaction moves rows into merged segments, the rebuilt index still finds every game."""
+    monkeypatch.chdir(tmp_path)
+    import api_layer.history_api
+    from api_layer.history_api import HistoryAPI
+    from models.History import History
+
+    games = make_games(300, seed=13)
+    history_api = HistoryAPI()
+    for game in games:
+        history_api.add_history(History(game['uuid'], game['user_id'], game['word'], game['result'],
+                                        game['guesses'], game['score'], game['timestamp']))
+    last_key = get_segment_key(max(game['timestamp'] for game in games))
+    monkeypatch.setattr(api_layer.history_api, 'get_segment_key', lambda timestamp: last_key)
+    report = history_api.compact()
+    assert report['merged'] > 0
+
+    # Merged segments keep the months in order, so only the segment ids change
+    check_user_histories(history_api, games)
@@ -0,0 +1,119 @@
+import random
+
+import pytest
+
+from common.constants import LEADERBOARD_TOP_K, LEADERBOARD_DAILY_RETENTION, LEADERBOARD_WEEKLY_RETENTION
+from utils.helpers import get_time_buckets
+
+# Start of the games, in seconds
+START = 1700000000
+DAY = 24 * 60 * 60
+# More users than fit in a top list, so users drop out of buckets and come back
+USERS = [f'user-{number}' for number in range(LEADERBOARD_TOP_K + 6)]
+WORDS = ['CAT', 'APPLE', 'BANANA', 'ORANGE', 'PEAR', 'PLUM']
+
+
+def make_games(count: int, seed: int) -> list:
+    """Returns games over about seven weeks, a few of them saved late into earlier days."""
+    from models.History import History
+
+    generator = random.Random(seed)
+    games = []
+    timestamp = START
+    for number in range(count):
+        timestamp += generator.randint(0, DAY // 4)
+        game_timestamp = timestamp
+        if generator.random() < 0.1:
+            game_timestamp -= generator.randint(0, 10 * DAY)
+        games.append(History(f'game-{number}', generator.choice(USERS), generator.choice(WORDS), 'win',
+                             3, generator.randint(0, 60), game_timestamp))
+    return games
+
+
+def get_bucket_keys(game) -> dict:
+    day, week = get_time_buckets(game.timestamp)
+    return {'daily': day, 'weekly': week, 'level': str(len(game.word))}
+
+
+def brute_force_buckets(games: list) -> dict:
+    """Groups the games by window, bucket and user with a scan of every game."""
+    buckets = {'all': {None: {}}, 'daily': {}, 'weekly': {}, 'level': {}}
+    for game in games:
+        buckets['all'][None].setdefault(str(game.user_id), []).append(game)
+        for window, bucket_key in get_bucket_keys(game).items():
+            buckets[window].setdefault(bucket_key, {}).setdefault(str(game.user_id), []).append(game)
+    # Only the newest days and weeks are kept
+    for window, retention in [('daily', LEADERBOARD_DAILY_RETENTION), ('weekly', LEADERBOARD_WEEKLY_RETENTION)]:
+        for bucket_key in sorted(buckets[window])[:-retention]:
+            del buckets[window][bucket_key]
+    return buckets
+
+
+def check_leaderboard(leaderboard, games: list):
+    """Compares the top list of every window and bucket with the aggregates computed from the games."""
+    buckets = brute_force_buckets(games)
+    for window, window_buckets in buckets.items():
+        for bucket_key, users in window_buckets.items():
+            top = leaderboard.get_top(window, bucket_key)
+            bests = sorted((max(game.score for game in user_games) for user_games in users.values()), reverse=True)
+            assert [aggregate['best'] for _, aggregate in top] == bests[:LEADERBOARD_TOP_K], (window, bucket_key)
+            for user_id, aggregate in top:
+                user_games = users[user_id]
+                assert aggregate['best'] == max(game.score for game in user_games), (window, bucket_key, user_id)
+                assert aggregate['total'] == sum(game.score for game in user_games), (window, bucket_key, user_id)
+                assert aggregate['count'] == len(user_games), (window, bucket_key, user_id)
+                best_games = {str(game.uuid): game.timestamp for game in user_games if game.score == aggregate['best']}
+                assert best_games.get(aggregate['best_game']) == aggregate['best_timestamp'], (window, bucket_key, user_id)
+    # Pruned days are gone
+    all_days = {get_bucket_keys(game)['daily'] for game in games}
+    for bucket_key in all_days - set(buckets['daily']):
+        assert leaderboard.get_top('daily', bucket_key) == []
+
+
+@pytest.fixture
+def history_service(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from api_layer.sqlite_database import SQLiteDatabase
+    import logic_layer.HistoryService
+    # The database is a singleton holding on to the file of the previous test
+    monkeypatch.setattr(SQLiteDatabase, '_instance', None)
+    monkeypatch.setattr(logic_layer.HistoryService, 'HISTORY_WRITE_BEHIND', False)
+    (tmp_path / 'data_layer/repository/word_bank').mkdir(parents=True)
+    return logic_layer.HistoryService.HistoryService()
+
+
+def test_incremental_updates_match_a_full_scan(history_service):
+    """Games saved in small commits keep every window's top list equal to the one computed from the history."""
+    games = make_games(600, seed=1)
+    generator = random.Random(2)
+    position = 0
+    # Built once, every later commit only appends its changes
+    check_leaderboard(history_service.leaderboard, [])
+    while position < len(games):
+        batch_size = generator.randint(1, 6)
+        history_service.commit_histories(games[position:position + batch_size])
+        position += batch_size
+        if generator.random() < 0.05:
+            check_leaderboard(history_service.leaderboard, games[:position])
+    check_leaderboard(history_service.leaderboard, games)
+
+
+def test_rebuild_matches_incremental_updates(history_service):
+    """A leaderboard rebuilt from the history gives the same top lists as one updated game by game."""
+    games = make_games(400, seed=3)
+    for game in games:
+        history_service.commit_histories([game])
+    incremental = {window: {bucket_key: history_service.leaderboard.get_top(window, bucket_key)
+                            for bucket_key in buckets}
+                   for window, buckets in brute_force_buckets(games).items()}
+
+    history_service.leaderboard.rebuild()
+    check_leaderboard(history_service.leaderboard, games)
+    for window, buckets in incremental.items():
+        for bucket_key, top in buckets.items():
+            rebuilt = history_service.leaderboard.get_top(window, bucket_key)
+            # Users tied on their best score may come in either order
+            assert sorted((user_id, aggregate['best'], aggregate['total'], aggregate['count'])
+                          for user_id, aggregate in rebuilt) == \
+                sorted((user_id, aggregate['best'], aggregate['total'], aggregate['count'])
+                       for user_id, aggregate in top), (window, bucket_key)
@@ -1,11 +1,13 @@
 from common.constants import bcolors
+from logic_layer.HistoryService import HistoryService
 from ui_layer.navigation import Navigation
 from ui_layer.views.game_ui import GameUI
 from ui_layer.views.history_ui import HistoryUI
 from ui_layer.views.score_board_ui import ScoreBoardUI
 from ui_layer.views.user_ui import UserUI
 from ui_layer.views.word_bank_ui import WordBankUI
-from utils.printing import clear_screen, print_header, print_with_borders, print_menu_options, print_footer
+from utils.printing import clear_screen, print_header, print_with_borders, print_menu_options, print_footer, \
+    frame
 from common.state import State
 
 
@@ -39,6 +41,7 @@ class MenuManager:
             self.error_message = ''
             self.menu_stack = []
             self.game_state = State()
+            self.history_service = HistoryService()
             self.is_initialized = True
 
     def get_state(self) -> str:
@@ -83,12 +86,13 @@ class MenuManager:
         if len(menu_options) > 0:
             page_title = self.state.replace('_', ' ').title()
 
-            clear_screen()
-            print_header()
-            print_with_borders(page_title, 'center', color=bcolors.OKCYAN)
-            print_menu_options(menu_options)
-            self.game_state.print_state()
-            print_footer(self.error_message)
+            with frame():
+                clear_screen()
+                print_header()
+                print_with_borders(page_title, 'center', color=bcolors.OKCYAN)
+                print_menu_options(menu_options)
+                self.game_state.print_state(self.history_service.get_user_stats_snapshot)
+                print_footer(self.error_message)
             self.error_message = ''
 
             try:
@@ -125,8 +129,6 @@ class MenuManager:
                     case '1':
                         game = GameUI()
                         game.start_game()
-                    case '2':
-                        WordBankUI().view_add_word()
                     case '3':
                         ScoreBoardUI().view_score_board()
                     case '4':
@@ -136,6 +138,14 @@ class MenuManager:
                     case _:
                         self.set_error_message('Invalid input. Please try again.')
                 pass
+            case 'word_bank_menu':
+                match user_input:
+                    case '1':
+                        WordBankUI().view_add_word()
+                    case '2':
+                        WordBankUI().view_search_words()
+                    case _:
+                        self.set_error_message('Invalid input. Please try again.')
             case 'user_management_menu':
                 match user_input:
                     case '1':
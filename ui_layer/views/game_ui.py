@@ -1,36 +1,61 @@
-from common.constants import bcolors, DEFAULT_LEVEL, DEFAULT_MAX_ATTEMPTS
+from common.constants import bcolors, DEFAULT_LEVEL, DEFAULT_MAX_ATTEMPTS, DEFAULT_VALID_GUESSES_ONLY, \
+    FEEDBACK_ABSENT, FEEDBACK_PRESENT, FEEDBACK_CORRECT, KEY_UNUSED, KEY_ABSENT, KEY_PRESENT, KEY_CORRECT
 from common.exceptions import ShouldRestartException, WordUsedException, InvalidWordLengthException, \
-    InvalidLetterException, WordGuessedException, ShouldGoBackException
+    InvalidLetterException, WordGuessedException, ShouldGoBackException, InvalidWordException
 from common.state import State
+from logic_layer.FeedbackEngine import FeedbackEngine
 from logic_layer.Game import Game
+from logic_layer.HistoryService import HistoryService
+from logic_layer.Solver import Solver
 from utils.printing import (clear_screen,
                             print_with_centered_border, print_with_borders,
                             print_vertical_space_with_borders,
-                            print_separator_line, print_footer, print_boxes)
+                            print_separator_line, print_footer, print_boxes, frame)
+
+# Colors are only attached to the feedback when the board is rendered
+FEEDBACK_COLORS = {
+    FEEDBACK_ABSENT: bcolors.FAIL,
+    FEEDBACK_PRESENT: bcolors.WARNING,
+    FEEDBACK_CORRECT: bcolors.OKGREEN,
+}
+KEY_COLORS = {
+    KEY_ABSENT: bcolors.FAIL,
+    KEY_PRESENT: bcolors.WARNING,
+    KEY_CORRECT: bcolors.OKGREEN,
+}
 
 
 class GameUI:
     def __init__(self):
         self.level = None
         self.max_attempts = None
+        self.valid_guesses_only = None
         self.keyboard = [
             ['Q', 'W', 'E', 'R', 'T', 'Y', 'U', 'I', 'O', 'P'],
             ['A', 'S', 'D', 'F', 'G', 'H', 'J', 'K', 'L'],
             ['Z', 'X', 'C', 'V', 'B', 'N', 'M']
         ]
         self.error_message = ''
+        self.hint = ''
         self._game_state = State()
+        self.__history_service = HistoryService()
 
     def __restart_game(self):
         """Resets or initializes the game settings."""
         self.level = None
         self.max_attempts = None
+        self.valid_guesses_only = None
         self.start_game()
 
+    @frame()
     def __print_level_and_attempts(self):
         """Prints the current level and max attempts, handling defaults."""
         level = f'{DEFAULT_LEVEL} (Default)' if self.level is None else self.level
         attempts = f'{DEFAULT_MAX_ATTEMPTS} (Default)' if self.max_attempts is None else self.max_attempts
+        if self.valid_guesses_only is None:
+            valid_guesses_only = f"{'Yes' if DEFAULT_VALID_GUESSES_ONLY else 'No'} (Default)"
+        else:
+            valid_guesses_only = 'Yes' if self.valid_guesses_only else 'No'
 
         clear_screen()
         print_separator_line()
@@ -39,42 +64,48 @@ class GameUI:
         print_vertical_space_with_borders(4)
         print_with_centered_border(f'Chosen level: {level}', separator_char='')
         print_with_centered_border(f'Max attempts: {attempts}', separator_char='')
+        print_with_centered_border(f'Valid guesses only: {valid_guesses_only}', separator_char='')
         print_vertical_space_with_borders(4)
         print_footer(self.error_message)
         self.error_message = ''
 
-    def __print_wordle(self, wordle: Game, positions: list, game_over: bool = False):
+    @staticmethod
+    def __get_feedback_colors(code: int, level: int) -> list[str]:
+        """Converts a feedback code to the color of each letter box."""
+        return [FEEDBACK_COLORS[letter_feedback] for letter_feedback in FeedbackEngine.decode(code, level)]
+
+    @frame()
+    def __print_wordle(self, wordle: Game, game_over: bool = False):
         """Prints the wordle game state."""
         used_words = wordle.get_used_words()
+        feedback_codes = wordle.get_feedback_codes()
         clear_screen()
         print_separator_line()
         print_with_borders('Wordle', 'center', color=bcolors.OKCYAN)
         print_separator_line()
         print_vertical_space_with_borders(4)
         for attempt in range(wordle.get_max_attempts()):
-            attempt_positions = positions[attempt] if attempt < len(positions) else []
             # if there is a used word for this attempt, print it
             if attempt < len(used_words):
-                print_boxes(used_words[attempt], attempt_positions)
+                print_boxes(used_words[attempt], self.__get_feedback_colors(feedback_codes[attempt], wordle.get_level()))
             else:
                 print_boxes(" " * wordle.get_level())
         print_vertical_space_with_borders(2)
 
+        keyboard_state = wordle.get_keyboard_state()
         for row in self.keyboard:
             marked_letters = []
             for letter in row:
-                if wordle.is_letter_used(letter) != (None, None):
-                    if wordle.is_letter_used(letter)[0]:
-                        marked_letters.append(bcolors.OKGREEN + letter + bcolors.ENDC)
-                    elif wordle.is_letter_used(letter)[1]:
-                        marked_letters.append(bcolors.WARNING + letter + bcolors.ENDC)
-                    else:
-                        marked_letters.append(bcolors.FAIL + letter + bcolors.ENDC)
-                else:
+                key_state = keyboard_state[ord(letter) - ord('A')]
+                if key_state == KEY_UNUSED:
                     marked_letters.append(letter)
+                else:
+                    marked_letters.append(KEY_COLORS[key_state] + letter + bcolors.ENDC)
             print_with_borders(' '.join(marked_letters), 'center')
 
         print_vertical_space_with_borders(1)
+        if self.hint:
+            print_with_borders(self.hint, 'center', color=bcolors.OKBLUE)
 
         if game_over:
             self._game_state.set_state('games_played', self._game_state.get_state('games_played') + 1)
@@ -83,7 +114,7 @@ class GameUI:
             print_boxes(wordle.get_current_word(), [bcolors.LIGHT_PURPLE] * wordle.get_level())
 
         print_vertical_space_with_borders(2)
-        self._game_state.print_state()
+        self._game_state.print_state(self.__history_service.get_user_stats_snapshot)
         print_footer(self.error_message)
 
     def __handle_shortcuts_and_validate(self, option: str, min_val: int, max_val: int) -> bool:
@@ -113,6 +144,38 @@ class GameUI:
 
         return int(value) if value else default
 
+    def __choose_toggle(self, prompt: str, default: bool) -> bool:
+        """Generic method for choosing a yes/no setting like valid guesses only."""
+        self.__print_level_and_attempts()
+        value = input(prompt).lower()
+
+        if value == 'q':
+            exit()
+        if value == 'r':
+            raise ShouldRestartException
+        if value == 'b':
+            raise ShouldGoBackException
+        if value == '':
+            return default
+        if value not in ['y', 'n']:
+            self.error_message = 'Invalid input. Please enter y or n!'
+            return self.__choose_toggle(prompt, default)
+
+        return value == 'y'
+
+    def __get_hint(self, wordle: Game) -> str:
+        """Asks the solver for the best next guess."""
+        remaining = wordle.get_remaining_candidates_count()
+        solver = Solver(wordle.get_level())
+        suggestion = solver.suggest(wordle)
+        if suggestion is None:
+            return 'No hint available.'
+        if not solver.ranked and solver.get_warm_up_error() is not None:
+            return f'Hint: try {suggestion} (unranked, the solver could not be prepared, {remaining} possible words left)'
+        if not solver.ranked:
+            return f'Hint: try {suggestion} (unranked, the solver is still warming up, {remaining} possible words left)'
+        return f'Hint: try {suggestion} ({remaining} possible words left)'
+
     @staticmethod
     def __end_of_the_game():
         """Handles the end of the game logic."""
@@ -131,21 +194,29 @@ class GameUI:
                 'Choose max attempts between 1 and 20 (default is 6) or press Enter to skip: ',
                 DEFAULT_MAX_ATTEMPTS, 1, 20
             )
+            self.valid_guesses_only = self.__choose_toggle(
+                'Only accept guesses from the word bank? y/n (default is n) or press Enter to skip: ',
+                DEFAULT_VALID_GUESSES_ONLY
+            )
             self.__print_level_and_attempts()
             input('Press Enter to start the game...')
 
             # Start the game
-            wordle = Game(self.level, self.max_attempts)
+            wordle = Game(self.level, self.max_attempts, self.valid_guesses_only)
             while wordle.get_guesses() < wordle.get_max_attempts():
                 try:
-                    self.__print_wordle(wordle, wordle.get_word_guesses_positions())
-                    user_input = input('Enter a word: ').upper()
+                    self.__print_wordle(wordle)
+                    user_input = input('Enter a word (or H for a hint): ').upper()
+                    self.hint = ''
                     if user_input == 'Q':
                         exit()
                     if user_input == 'R':
                         raise ShouldRestartException
+                    if user_input == 'H':
+                        self.hint = self.__get_hint(wordle)
+                        continue
                     if wordle.guess_word(user_input):
-                        self.__print_wordle(wordle, wordle.get_word_guesses_positions())
+                        self.__print_wordle(wordle)
                         wordle.save_game()
                         self._game_state.set_state('games_played', self._game_state.get_state('games_played') + 1)
                         self._game_state.set_state('wins', self._game_state.get_state('wins') + 1)
@@ -156,10 +227,12 @@ class GameUI:
                     self.error_message = 'Invalid letter. Please enter a word with only letters (a-z).'
                 except WordUsedException:
                     self.error_message = 'Word already used. Try another word!'
+                except InvalidWordException:
+                    self.error_message = 'Not in the word list. Try another word!'
 
             # Game over
             wordle.save_game('lose')
-            self.__print_wordle(wordle, wordle.get_word_guesses_positions(), True)
+            self.__print_wordle(wordle, True)
             self.__end_of_the_game()
 
         except WordGuessedException:
@@ -1,27 +1,59 @@
 from common.state import State
 from logic_layer.HistoryService import HistoryService
+from logic_layer.UserService import UserService
 from utils.printing import clear_screen, print_header, print_footer, print_with_centered_border, \
     print_separator_line_for_centered_border, print_table
 
+# Number of games shown on one page of the history
+HISTORY_PAGE_SIZE = 20
+
 
 class HistoryUI:
     def __init__(self):
         self.history_service = HistoryService()
+        self.user_service = UserService()
         self.__game_state = State()
 
+    def __get_page(self, offset: int) -> tuple[list, bool]:
+        """
+        Returns the History objects of one page and whether more games follow.
+        Only the games of the page are read and turned into History objects.
+        """
+        if self.__game_state.get_state('user') is not None:
+            user_id = self.__game_state.get_state('user').get_id()
+            # One game more than the page tells if there is a next page
+            history = list(self.history_service.get_user_history(user_id, HISTORY_PAGE_SIZE + 1, offset))
+            return history[:HISTORY_PAGE_SIZE], len(history) > HISTORY_PAGE_SIZE
+        # Served from the in-memory columns, History objects are only created for the rows of the page
+        columns = self.history_service.get_history_columns()
+        end = min(offset + HISTORY_PAGE_SIZE, len(columns))
+        return list(columns.iter_history(range(offset, end))), end < len(columns)
+
     def view_history(self):
         if self.__game_state.get_state('user') is not None:
             print(f"Game history for user: {self.__game_state.get_state('user').get_id()}")
-            history = self.history_service.get_user_history(self.__game_state.get_state('user').get_id())
-        else:
-            history = self.history_service.get_history()
 
-        history = list(map(lambda h: h.get_table_list_of_values(), history))
-        columns = ['User', 'Word', 'Guesses', 'Result', 'Score', 'Date']
-        print_table(columns, history, 'Game History')
+        offset = 0
+        while True:
+            history, has_next = self.__get_page(offset)
+            # Resolve the usernames of the page with a single lookup
+            users = self.user_service.get_users_by_ids({h.user_id for h in history})
+            rows = []
+            for h in history:
+                user = users.get(str(h.user_id))
+                rows.append(h.get_table_list_of_values(user.username if user is not None else h.user_id))
+            columns = ['User', 'Word', 'Guesses', 'Result', 'Score', 'Date']
+            page = offset // HISTORY_PAGE_SIZE + 1
+            print_table(columns, rows, f'Game History - Page {page}')
 
-        try:
-            input("Press enter to go back...")
-        except KeyboardInterrupt:
-            print('\nGoodbye!')
-            exit(0)
+            try:
+                user_input = input("N for the next page, P for the previous one, press enter to go back...")
+            except KeyboardInterrupt:
+                print('\nGoodbye!')
+                exit(0)
+            if user_input.lower() == 'n' and has_next:
+                offset += HISTORY_PAGE_SIZE
+            elif user_input.lower() == 'p' and offset > 0:
+                offset -= HISTORY_PAGE_SIZE
+            elif user_input.lower() not in ('n', 'p'):
+                break
@@ -1,23 +1,38 @@
+from common.constants import MIN_WORD_LENGTH, MAX_WORD_LENGTH
 from logic_layer.ScoreBoard import ScoreBoard
 from utils.printing import print_table
 
 
 class ScoreBoardUI:
+    # Input -> (window, bucket, title) of the leaderboard windows the user can switch between
+    WINDOWS = {
+        'a': ('all', None, 'Score Board - All Time'),
+        'd': ('daily', None, 'Score Board - Today'),
+        'w': ('weekly', None, 'Score Board - This Week'),
+        **{str(level): ('level', level, f'Score Board - {level} Letters')
+           for level in range(MIN_WORD_LENGTH, MAX_WORD_LENGTH + 1)},
+    }
+
     def __init__(self):
         self.score_board = ScoreBoard()
 
-    def get_score_board(self):
-        return self.score_board.get_score_board()
+    def get_score_board(self, window: str = 'all', bucket=None):
+        return self.score_board.get_score_board(window, bucket)
 
     def view_score_board(self):
-        score_board = self.get_score_board()
-        score_board = list(map(lambda s: s.get_list_of_values(), score_board))
-        columns = ['User', 'Highest Score', 'Average Score']
-        print_table(columns, score_board, 'Score Board')
-
-        try:
-            input("Press enter to go back...")
-        except KeyboardInterrupt:
-            print('\nGoodbye!')
-            exit(0)
+        window, bucket, title = self.WINDOWS['a']
+        while True:
+            score_board = self.get_score_board(window, bucket)
+            score_board = list(map(lambda s: s.get_list_of_values(), score_board))
+            columns = ['User', 'Highest Score', 'Average Score']
+            print_table(columns, score_board, title)
 
+            try:
+                user_input = input(f"[A]ll time, [D]aily, [W]eekly, level [{MIN_WORD_LENGTH}-{MAX_WORD_LENGTH}] "
+                                   f"or press enter to go back...").strip().lower()
+            except KeyboardInterrupt:
+                print('\nGoodbye!')
+                exit(0)
+            if user_input not in self.WINDOWS:
+                break
+            window, bucket, title = self.WINDOWS[user_input]
@@ -3,7 +3,7 @@ from common.state import State
 from logic_layer.UserService import UserService
 from models.User import User
 from utils.printing import print_table, clear_screen, print_separator_line, print_with_borders, \
-    print_vertical_space_with_borders, print_with_centered_border, print_footer
+    print_vertical_space_with_borders, print_with_centered_border, print_footer, frame
 
 
 class UserUI:
@@ -30,6 +30,7 @@ class UserUI:
             print('\nGoodbye!')
             exit(0)
 
+    @frame()
     def print_create_user(self, username='', name=''):
         clear_screen()
         print_separator_line()
@@ -1,7 +1,13 @@
-from common.constants import bcolors
+from common.constants import bcolors, DEFAULT_LEVEL, MIN_WORD_LENGTH, MAX_WORD_LENGTH
 from logic_layer.WordBankService import WordBankService
+from logic_layer.WordQuery import WordQuery
 from utils.printing import clear_screen, print_separator_line, print_with_borders, print_vertical_space_with_borders, \
-    print_with_centered_border, print_footer
+    print_with_centered_border, print_footer, frame
+
+
+# Number of matching words shown on the search screen, and per line
+SEARCH_RESULT_LIMIT = 60
+SEARCH_WORDS_PER_LINE = 10
 
 
 class WordBankUI:
@@ -9,6 +15,7 @@ class WordBankUI:
         self.error_message = ''
         self.word = ''
 
+    @frame()
     def print_add_word_screen(self, word=''):
         clear_screen()
         print_separator_line()
@@ -31,7 +38,7 @@ class WordBankUI:
                 exit(0)
             if word.lower() == 'b' or word.lower() == 'back':
                 break
-            if not word.isalpha() or not 3 <= len(word) <= 6:
+            if not (word.isascii() and word.isalpha()) or not 3 <= len(word) <= 6:
                 self.error_message = 'Word must be between 3-6 characters long and only contain letters A-Z and a-z. Please try again.'
                 continue
             self.print_add_word_screen(word)
@@ -44,3 +51,80 @@ class WordBankUI:
             if user_input.lower() == 'q':
                 break
 
+
+    @staticmethod
+    def parse_contains(text: str) -> tuple[str, dict]:
+        """
+        Parses the letters a word must contain, each optionally followed by the positions it is not at.
+        'R4 E' means an R that is not at position 4, and an E anywhere. Positions start at 1.
+        :return: (letters, not_at) as taken by WordQuery.get_mask
+        """
+        letters = ''
+        not_at = {}
+        for token in text.upper().split():
+            letter, positions = token[0], token[1:]
+            if not positions.isdigit() and positions:
+                raise ValueError(f'Invalid constraint {token}, use a letter followed by positions, e.g. R4.')
+            letters += letter
+            for position in positions:
+                not_at[int(position) - 1] = not_at.get(int(position) - 1, '') + letter
+        return letters, not_at
+
+    @frame()
+    def print_search_screen(self, level: int, constraints: dict, words: list[str], total: int):
+        clear_screen()
+        print_separator_line()
+        print_with_borders('Search Word Bank', 'center', color=bcolors.OKCYAN)
+        print_separator_line()
+        print_with_borders(f'Level: {level}   Pattern: {constraints.get("pattern") or "-"}   '
+                           f'Contains: {constraints.get("contains") or "-"}   '
+                           f'Excludes: {constraints.get("excludes") or "-"}')
+        print_with_borders(f'{total} matching words', color=bcolors.OKGREEN)
+        print_vertical_space_with_borders(1)
+        for start in range(0, len(words), SEARCH_WORDS_PER_LINE):
+            print_with_borders(' '.join(words[start:start + SEARCH_WORDS_PER_LINE]))
+        if total > len(words):
+            print_with_borders(f'... and {total - len(words)} more')
+        print_vertical_space_with_borders(1)
+        print_with_borders('Pattern: a letter or . per position, e.g. .A...', color=bcolors.WARNING)
+        print_with_borders('Contains: letters, R4 is an R that is not at position 4, e.g. R4 E', color=bcolors.WARNING)
+        print_with_borders('Excludes: letters the word must not contain, e.g. ST', color=bcolors.WARNING)
+        print_footer(self.error_message, restart_option=False)
+        self.error_message = ''
+
+    def view_search_words(self):
+        level = DEFAULT_LEVEL
+        constraints = {}
+        while True:
+            try:
+                query = WordQuery(level)
+                contains, not_at = self.parse_contains(constraints.get('contains', ''))
+                mask_constraints = {'pattern': constraints.get('pattern'), 'contains': contains,
+                                    'excludes': constraints.get('excludes', ''), 'not_at': not_at}
+                words = query.search(SEARCH_RESULT_LIMIT, **mask_constraints)
+                total = query.count(**mask_constraints)
+            except ValueError as error:
+                self.error_message = str(error)
+                constraints = {}
+                continue
+            self.print_search_screen(level, constraints, words, total)
+
+            try:
+                user_input = input(f"Level [{MIN_WORD_LENGTH}-{MAX_WORD_LENGTH}] or enter to keep {level}: ").strip()
+                if user_input.lower() in ['q', 'quit']:
+                    exit(0)
+                if user_input.lower() in ['b', 'back']:
+                    break
+                if user_input:
+                    if not user_input.isdigit() or not MIN_WORD_LENGTH <= int(user_input) <= MAX_WORD_LENGTH:
+                        self.error_message = f'Level must be between {MIN_WORD_LENGTH} and {MAX_WORD_LENGTH}.'
+                        continue
+                    level = int(user_input)
+                constraints = {
+                    'pattern': input("Pattern (enter for any): ").strip(),
+                    'contains': input("Contains (enter for none): ").strip(),
+                    'excludes': input("Excludes (enter for none): ").strip(),
+                }
+            except KeyboardInterrupt:
+                print('\nGoodbye!')
+                exit(0)
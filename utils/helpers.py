@@ -1,14 +1,37 @@
 from datetime import datetime
+from functools import lru_cache
 
 
-def format_date(timestamp: str, format_output: str = "%Y-%m-%d %H:%M") -> str:
+@lru_cache(maxsize=4096)
+def format_date(timestamp: int, format_output: str = "%Y-%m-%d %H:%M") -> str:
     """
-    Format the date from isoformat to a human-readable format
+    Format an epoch timestamp to a human-readable format, only done when it is displayed.
+    Cached, the same timestamps are formatted over and over when tables are redrawn
     :param format_output: the format to output the date
-    :param timestamp: isoformat timestamp
+    :param timestamp: epoch timestamp in seconds
     :return: 'YYYY-MM-DD HH:MM' formatted timestamp
     """
-    return datetime.fromisoformat(timestamp).strftime(format_output)
+    return datetime.fromtimestamp(timestamp).strftime(format_output)
+
+
+def parse_date(timestamp: str) -> int:
+    """
+    Convert an isoformat timestamp, like the ones the history used to store, to epoch seconds
+    :param timestamp: isoformat timestamp, in local time
+    :return: epoch timestamp in seconds
+    """
+    return int(datetime.fromisoformat(timestamp).timestamp())
+
+
+def get_time_buckets(timestamp: int) -> tuple[str, str]:
+    """
+    Get the day and ISO week a timestamp falls into, used to bucket time-windowed aggregates
+    :param timestamp: epoch timestamp in seconds
+    :return: ('YYYY-MM-DD', 'YYYY-Www')
+    """
+    date = datetime.fromtimestamp(timestamp)
+    year, week, _ = date.isocalendar()
+    return date.strftime('%Y-%m-%d'), f'{year}-W{week:02d}'
 
 
 def calculate_score(word_len: int, status: str, total_attempts: int, actual_attempts: int, factor=10, penalty_factor=5) -> int:
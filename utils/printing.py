@@ -1,9 +1,76 @@
 import shutil
+import sys
+from contextlib import contextmanager
+
 from common.constants import DEFAULT_WIDTH, DEFAULT_HEIGHT, DEFAULT_ALIGN, MAX_COLUMN_WIDTH
 from common.constants import DEFAULT_PADDING_LEFT, DEFAULT_PADDING_RIGHT, DEFAULT_PADDING_SPACE
 from common.constants import HEADER_HEIGHT, FOOTER_HEIGHT, TOTAL_PADDING, DEFAULT_BORDER, bcolors
 
 
+class Frame:
+    """
+    A screen being built. The printing helpers render their lines into the frame,
+    and the whole screen is written to the terminal with a single write when it is flushed.
+    """
+
+    def __init__(self):
+        self.__parts = []
+
+    def write(self, text: str):
+        """Adds text to the frame."""
+        self.__parts.append(text)
+
+    def get_text(self) -> str:
+        """Returns everything rendered into the frame so far."""
+        return ''.join(self.__parts)
+
+    def flush(self):
+        """Writes the frame to the terminal at once and empties it."""
+        text = self.get_text()
+        self.__parts = []
+        if text:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+
+
+# Frames being built, the innermost one last
+_frames = []
+
+
+@contextmanager
+def frame():
+    """
+    Collects everything the printing helpers print inside the block into one Frame,
+    flushed with a single write when the block ends. A frame opened inside another one
+    joins it, so the screen is still written once. Close the frame before asking for input,
+    or the prompt is shown before the screen. Also works as a decorator, @frame(), to write
+    everything a function prints at once.
+    """
+    if _frames:
+        yield _frames[-1]
+        return
+    current = Frame()
+    _frames.append(current)
+    try:
+        yield current
+    finally:
+        _frames.pop()
+        current.flush()
+
+
+def write(text: str):
+    """Writes text to the frame being built, or to the terminal if there is none."""
+    if _frames:
+        _frames[-1].write(text)
+    else:
+        sys.stdout.write(text)
+
+
+def write_line(text: str = ''):
+    """Writes a line to the frame being built, or to the terminal if there is none."""
+    write(text + '\n')
+
+
 def get_terminal_dimensions():
     """
     Get the dimensions of the terminal window.
@@ -54,10 +121,11 @@ def clear_screen():
     """
     Clear the terminal screen.
     """
-    # print("\x1b[1J\x1b[H", end="")
-    print("\x1b[2J\x1b[H", end="")
+    # write("\x1b[1J\x1b[H")
+    write("\x1b[2J\x1b[H")
 
 
+@frame()
 def print_menu_options(options):
     """
     Print a list of menu options within the terminal.
@@ -77,6 +145,7 @@ def print_menu_options(options):
     print_vertical_space_with_borders(height=height)
 
 
+@frame()
 def print_vertical_space_with_borders(height=DEFAULT_HEIGHT):
     """
     Print vertical space within the terminal with borders.
@@ -115,7 +184,7 @@ def print_with_borders(text='',
     else:
         formatted_text = f"{outline_symbol}{' ' * DEFAULT_PADDING_SPACE}{text}{' ' * padding}{' ' * DEFAULT_PADDING_SPACE}{outline_symbol}"
 
-    print(formatted_text)
+    write_line(formatted_text)
 
 
 def print_separator_line_for_centered_border(char=DEFAULT_BORDER,
@@ -157,7 +226,7 @@ def print_separator_line(char=DEFAULT_BORDER):
         char (str): Optional; The character to be used for the separator line.
     """
     width, _ = get_terminal_dimensions()
-    print(char * width)
+    write_line(char * width)
 
 
 def print_two_columns(left_text, right_text, padding_left=4, padding_right=4, left_length=None, right_length=None):
@@ -180,11 +249,12 @@ def print_two_columns(left_text, right_text, padding_left=4, padding_right=4, le
         width, padding_left, padding_right)
 
     empty_space = " " * padding
-    print(
+    write_line(
         f"=={' ' * DEFAULT_PADDING_SPACE}{left_text}{empty_space}{right_text}{' ' * DEFAULT_PADDING_SPACE}=="
     )
 
 
+@frame()
 def print_header():
     """
     Print the header of the program with the name of the program.
@@ -203,6 +273,7 @@ def print_header():
     print_separator_line()
 
 
+@frame()
 def print_footer(error=None, back_option=True, quit_option=True, restart_option=True):
     """
     Print the footer of the program with the available navigation options.
@@ -234,6 +305,7 @@ def print_footer(error=None, back_option=True, quit_option=True, restart_option=
     print_separator_line()
 
 
+@frame()
 def print_table(columns: [str], rows: [[str]], title: str = ''):
     """
     Print a table with the given columns and rows.
@@ -291,33 +363,27 @@ def print_boxes(word: str, colors: list[str] = None) -> None:
     if colors is None or len(word) != len(colors):
         colors = [bcolors.WHITE] * len(word)
 
-    # Function to print a single line of boxes
-    def print_line(content, is_border=False):
+    # Function to render a single line of boxes
+    def render_line(content, is_border=False):
         # Apply left padding
-        print('==' + ' ' * left_padding, end='')
+        line = '==' + ' ' * left_padding
         for letter, color in zip(word, colors):
             if is_border:
-                print(color + content + bcolors.ENDC, end=' ')
+                line += color + content + bcolors.ENDC + ' '
             else:
                 padding = ' ' * ((box_size - 1) // 2)
                 middle = '|' + padding + letter + padding
                 if box_size % 2 == 0:
                     middle += ' '
                 middle += '|'
-                print(color + middle + bcolors.ENDC, end=' ')
+                line += color + middle + bcolors.ENDC + ' '
         # Apply right padding
-        print(' ' * left_padding + '==')
+        return line + ' ' * left_padding + '==\n'
 
     # Calculate the components of the box
     top_bottom_border = '+' + '-' * box_size + '+'
 
-    # Print the top borders for all letters
-    print_line(top_bottom_border, is_border=True)
-
-    # Print the middle part for each letter
-    print_line('', is_border=False)
-
-    # Print the bottom borders for all letters
-    print_line(top_bottom_border, is_border=True)
-
-
+    # Render the top borders, the letters and the bottom borders, and write the three lines at once
+    write(render_line(top_bottom_border, is_border=True)
+          + render_line('', is_border=False)
+          + render_line(top_bottom_border, is_border=True))
@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, file_lock does not lock there
+    fcntl = None
+
+# Locks held by the current thread, lock path -> depth, so file_lock can be nested
+_held_locks = threading.local()
+# Permissions removed from new files, read once since os.umask can only be read by setting it
+_umask = os.umask(0)
+os.umask(_umask)
+
+
+def copy_file_mode(temp_path, file_path):
+    """
+    Give a temporary file the permissions of the file it is about to replace, or those of a new file.
+    mkstemp creates files only the owner can read, and os.replace keeps the mode of the temporary file.
+    """
+    try:
+        mode = os.stat(file_path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o666 & ~_umask
+    os.chmod(temp_path, mode)
+
+
+def atomic_write_json(file_path: Path, data, indent=4):
+    """
+    Write the data as JSON to a temporary file and move it over the target file.
+    Readers either see the old or the new content, never a partially written file.
+    :param file_path: the file to write
+    :param data: JSON serializable data
+    :param indent: indentation used for the JSON output
+    """
+    file_path = Path(file_path)
+    file_descriptor, temp_path = tempfile.mkstemp(dir=file_path.parent, prefix=f'.{file_path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'w', encoding='utf-8') as file:
+            json.dump(data, file, indent=indent)
+            file.flush()
+            os.fsync(file.fileno())
+        copy_file_mode(temp_path, file_path)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+@contextmanager
+def file_lock(file_path: Path, shared: bool = False):
+    """
+    Hold an advisory lock for a read-modify-write cycle on the file, across processes and threads.
+    The lock is taken on a separate `.lock` file, since an atomic write replaces the file itself.
+    It is reentrant within a thread. Without fcntl (Windows) nothing is locked.
+    :param file_path: the file, or directory, to lock
+    :param shared: take a shared lock for reading instead of an exclusive one
+    """
+    file_path = Path(file_path)
+    lock_path = file_path.with_name(file_path.name + '.lock')
+    held = _held_locks.__dict__.setdefault('paths', {})
+    if fcntl is None or lock_path in held:
+        held[lock_path] = held.get(lock_path, 0) + 1
+        try:
+            yield
+        finally:
+            held[lock_path] -= 1
+            if not held[lock_path]:
+                del held[lock_path]
+        return
+
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with lock_path.open('a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        held[lock_path] = 1
+        try:
+            yield
+        finally:
+            del held[lock_path]
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)